@@ -1,24 +1,44 @@
 # Sacred Essence v3.1 Core Algorithms
 
 import math
-from datetime import datetime
+import queue
+import threading
+from datetime import datetime, timedelta
 import numpy as np
-from typing import List, Union
+from typing import Any, Dict, List, Union, Sequence, Optional, Iterable, Iterator, Callable, Tuple, TypeVar
 
 # Import config
 try:
     from config import (
         INITIAL_IMPORTANCE, 
         GRACE_PERIOD_DAYS, 
+        THRESHOLD_SILVER,
+        THRESHOLD_DUST,
         DENSITY_BASE, 
         WEIGHT_ACCESS, 
-        WEIGHT_RETRIEVAL
+        WEIGHT_RETRIEVAL,
+        EMBEDDING_BATCH_SIZE,
+        EMBEDDING_QUEUE_SIZE,
+        EMBEDDING_MODEL,
+        EMBEDDING_BACKEND,
+        HASH_EMBEDDING_DIM,
+        HASH_EMBEDDING_NGRAMS,
+        EMBEDDING_CACHE_ENABLED,
+        EMBEDDING_CACHE_MAX_ENTRIES,
+        EMBEDDING_SERVER_SOCKET,
+        MEMORY_DIR
     )
-    from models import MemoryNode
+    from models import MemoryNode, NodeState
 except ImportError:
     # Fallback or local dev
     pass
 
+MAX_DENSITY_BONUS = 5.0 # Prevent infinite score growth
+T = TypeVar("T")
+_MICROS_PER_DAY = 86_400_000_000
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICRO = timedelta(microseconds=1)
+
 def calculate_density(node: 'MemoryNode') -> float:
     """
     Calculate Density (D) based on interaction frequency.
@@ -58,56 +78,406 @@ def calculate_importance(node: 'MemoryNode', current_date: datetime = None) -> f
     
     # 4. Formula
     # Current = Initial * (S ^ days_unused) + min(MAX_DENSITY_BONUS, ln(1 + D))
-    MAX_DENSITY_BONUS = 5.0 # Prevent infinite score growth
     decay_term = INITIAL_IMPORTANCE * (math.pow(s_factor, days_unused))
     growth_term = min(MAX_DENSITY_BONUS, math.log(1 + density))
     
     current_score = decay_term + growth_term
     return current_score
 
+def days_until_below(threshold: float, stability: float, density: float) -> Optional[int]:
+    """
+    Smallest number of unused days after which the decayed (post-grace) score
+    Initial * S^days + min(MAX_DENSITY_BONUS, ln(1 + D)) is below `threshold`.
+    None when it never gets there (S >= 1, or the growth term alone stays above).
+    """
+    growth = min(MAX_DENSITY_BONUS, math.log(1 + density))
+
+    def score(days: int) -> float:
+        return INITIAL_IMPORTANCE * math.pow(stability, days) + growth
+
+    if score(0) < threshold:
+        return 0
+    if stability >= 1 or stability <= 0 or threshold - growth <= 0:
+        return None
+    days = math.floor(math.log((threshold - growth) / INITIAL_IMPORTANCE) / math.log(stability)) + 1
+    days = max(days, 0)
+    # Closed form; verify against the formula itself to absorb float rounding (±1 day)
+    while days > 0 and score(days - 1) < threshold:
+        days -= 1
+    while score(days) >= threshold:
+        days += 1
+    return days
+
+def predict_transition_date(node: 'MemoryNode') -> Optional[datetime]:
+    """
+    First moment at which GC would move `node` to a lower state, assuming no
+    further interaction: SILVER falls below THRESHOLD_SILVER, BRONZE below
+    THRESHOLD_DUST. DUST is due immediately; GOLDEN never decays (None).
+    """
+    if node.state == NodeState.DUST:
+        return node.creation_date
+    threshold = {NodeState.SILVER: THRESHOLD_SILVER, NodeState.BRONZE: THRESHOLD_DUST}.get(node.state)
+    if threshold is None:
+        return None
+    density = calculate_density(node)
+    if INITIAL_IMPORTANCE + math.log(1 + density) < threshold:
+        return node.creation_date  # below the threshold even during the grace period
+    days = days_until_below(threshold, node.stability_factor, density)
+    if days is None:
+        return None
+    grace_end = node.creation_date + timedelta(days=GRACE_PERIOD_DAYS + 1)
+    if days == 0:
+        return grace_end
+    return max(node.last_access_date + timedelta(days=days), grace_end)
+
+def to_datetime64(dates: Sequence) -> np.ndarray:
+    """
+    Convert naive datetimes to a datetime64[us] array.
+    Integer arithmetic is ~5x faster than np.asarray(..., 'datetime64[us]')
+    on a list of datetime objects.
+    """
+    if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+        return dates.astype('datetime64[us]')
+    micros = np.fromiter(((d - _EPOCH) // _ONE_MICRO for d in dates), dtype=np.int64, count=len(dates))
+    return micros.view('datetime64[us]')
+
+def _whole_days(later: np.ndarray, earlier: np.ndarray) -> np.ndarray:
+    """Vectorized `(later - earlier).days` (floor division, like timedelta.days)."""
+    delta = (later - earlier).astype('timedelta64[us]').astype(np.int64)
+    return np.floor_divide(delta, _MICROS_PER_DAY)
+
+def calculate_importance_batch(
+    creation_dates: Sequence,
+    last_access_dates: Sequence,
+    stability_factors: Sequence[float],
+    access_counts: Sequence[int],
+    retrieval_counts: Sequence[int],
+    current_date: datetime = None
+) -> np.ndarray:
+    """
+    Vectorized calculate_importance over whole arrays of node stats.
+    Dates may be datetime sequences or datetime64 arrays.
+    Same semantics as the scalar version: grace period, negative-day
+    clamping and the MAX_DENSITY_BONUS cap on the growth term.
+    """
+    if current_date is None:
+        current_date = datetime.now()
+    now = np.datetime64(current_date, 'us')
+    created = to_datetime64(creation_dates)
+    accessed = to_datetime64(last_access_dates)
+    s_factor = np.asarray(stability_factors, dtype=np.float64)
+
+    density = (DENSITY_BASE
+               + np.asarray(access_counts, dtype=np.float64) * WEIGHT_ACCESS
+               + np.asarray(retrieval_counts, dtype=np.float64) * WEIGHT_RETRIEVAL)
+    log_density = np.log(1 + density)
+
+    in_grace = _whole_days(now, created) <= GRACE_PERIOD_DAYS
+    days_unused = np.maximum(_whole_days(now, accessed), 0)
+
+    decayed = INITIAL_IMPORTANCE * np.power(s_factor, days_unused) + np.minimum(MAX_DENSITY_BONUS, log_density)
+    return np.where(in_grace, INITIAL_IMPORTANCE + log_density, decayed)
+
+def calculate_importance_many(nodes: Sequence['MemoryNode'], current_date: datetime = None) -> np.ndarray:
+    """Batch importance for a list of MemoryNode objects (one score per node, same order)."""
+    if not nodes:
+        return np.zeros(0, dtype=np.float64)
+    return calculate_importance_batch(
+        [n.creation_date for n in nodes],
+        [n.last_access_date for n in nodes],
+        [n.stability_factor for n in nodes],
+        [n.access_count for n in nodes],
+        [n.retrieval_count for n in nodes],
+        current_date,
+    )
+
+def normalize_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-normalize a matrix (or a single vector) to unit length.
+    Returns (unit rows as float32, original L2 norms). Zero rows stay zero.
+    """
+    mat = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=-1)
+    safe = np.where(norms > 0, norms, 1.0).astype(np.float32)
+    return mat / safe[..., None], norms
+
+
+_SCORE_CHUNK = 8192  # quantized rows upcast to float32 per BLAS call
+
+
+def _row_dots(rows: np.ndarray, q: np.ndarray, with_norms: bool):
+    """
+    rows @ q (and row norms). float16/int8 rows are upcast chunk by chunk so the
+    product runs through BLAS without materializing a float32 copy of the matrix.
+    """
+    if rows.dtype in (np.float32, np.float64):
+        return rows @ q, (np.linalg.norm(rows, axis=1) if with_norms else None)
+    dots = np.empty(len(rows), dtype=np.float32)
+    norms = np.empty(len(rows), dtype=np.float32) if with_norms else None
+    for start in range(0, len(rows), _SCORE_CHUNK):
+        block = rows[start:start + _SCORE_CHUNK].astype(np.float32)
+        dots[start:start + len(block)] = block @ q
+        if with_norms:
+            norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+    return dots, norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k best scores (1-D), best first; ties keep index order
+    (heapq.nlargest semantics), so equal scores rank deterministically.
+    """
+    if k <= 0 or not len(scores):
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        cutoff = np.partition(scores, len(scores) - k)[len(scores) - k]
+        candidates = np.flatnonzero(scores >= cutoff)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]]
+
+
+def cosine_scores(query: Sequence[float], matrix: np.ndarray, mask: Optional[np.ndarray] = None,
+                  normalized: bool = False, norms: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cosine similarity of `query` to every (masked) row of `matrix`, in row
+    order and unsorted, for callers that rank by more than similarity.
+    Options as in `cosine_top_k`. Returns (row indices, similarities).
+    """
+    q = np.asarray(query, dtype=np.float32).reshape(-1)
+    mat = np.asarray(matrix)
+    empty = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    if mat.ndim != 2 or not len(mat) or q.shape[0] != mat.shape[1]:
+        return empty
+    if not normalized:
+        q_norm = float(np.linalg.norm(q))
+        if q_norm == 0:
+            return empty
+        q = q / q_norm
+    rows = np.flatnonzero(mask) if mask is not None else np.arange(len(mat))
+    sub = mat if mask is None else mat[rows]
+    scores, row_norms = _row_dots(sub, q, with_norms=not normalized and norms is None)
+    if not normalized:
+        if norms is not None:
+            row_norms = np.asarray(norms if mask is None else norms[rows], dtype=np.float32)
+        scores = scores / np.where(row_norms > 0, row_norms, 1.0)
+    return rows, scores.astype(np.float32)
+
+
+def cosine_top_k(query: Sequence[float], matrix: np.ndarray, k: int = 10,
+                 mask: Optional[np.ndarray] = None, normalized: bool = False,
+                 norms: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of `matrix` by cosine similarity to `query`.
+
+    - normalized: rows (and query) are already unit length; skips the norm pass.
+    - norms: precomputed row norms, used instead of recomputing them.
+    - mask: bool per row; only True rows are candidates (e.g. one topic/state).
+
+    float16 / int8 matrices (quantized stores) are scored in place; per-row
+    scales cancel out of the cosine.
+
+    Returns (row indices, similarities), best first; fewer than k when the
+    mask leaves fewer candidates. A zero or mismatched query returns nothing.
+    """
+    rows, scores = cosine_scores(query, matrix, mask=mask, normalized=normalized, norms=norms)
+    best = top_k_indices(scores, k)
+    return rows[best], scores[best]
+
+
+def cosine_similarity_matrix(queries: np.ndarray, matrix: np.ndarray,
+                             normalized: bool = False) -> np.ndarray:
+    """Pairwise cosine similarities, shape (len(queries), len(matrix))."""
+    a = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    b = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    if not normalized:
+        a, _ = normalize_rows(a)
+        b, _ = normalize_rows(b)
+    return a @ b.T
+
+
+def cosine_top_k_many(queries: np.ndarray, matrix: np.ndarray, k: int = 10,
+                      mask: Optional[np.ndarray] = None, normalized: bool = False,
+                      chunk_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of `matrix` for every query row (matrix-vs-matrix).
+
+    `mask` is either one bool row shared by all queries or a (queries, rows)
+    bool matrix. Returns (indices, similarities), each (len(queries), min(k, rows)),
+    best first; slots without an allowed candidate hold index -1 and -inf.
+    Queries are processed in chunks to bound the size of the score block.
+    """
+    a = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    b = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    if not normalized:
+        a, _ = normalize_rows(a)
+        b, _ = normalize_rows(b)
+    k = min(k, b.shape[0])
+    indices = np.full((len(a), k), -1, dtype=np.int64)
+    scores = np.full((len(a), k), -np.inf, dtype=np.float32)
+    if k <= 0:
+        return indices, scores
+    for start in range(0, len(a), chunk_size):
+        block = a[start:start + chunk_size] @ b.T
+        if mask is not None:
+            m = mask if np.ndim(mask) == 1 else mask[start:start + chunk_size]
+            block = np.where(m, block, -np.inf)
+        part = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(block, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind="stable")
+        idx = np.take_along_axis(part, order, axis=1)
+        val = np.take_along_axis(part_scores, order, axis=1)
+        indices[start:start + len(block)] = np.where(np.isfinite(val), idx, -1)
+        scores[start:start + len(block)] = val
+    return indices, scores
+
+
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """
     Calculate Cosine Similarity between two vectors.
+    Thin wrapper over cosine_top_k; empty, zero or mismatched vectors score 0.0.
     """
-    if not vec1 or not vec2:
+    if vec1 is None or vec2 is None or not len(vec1) or not len(vec2):
         return 0.0
-    
-    v1 = np.array(vec1)
-    v2 = np.array(vec2)
-    
-    if v1.shape != v2.shape:
-        print(f"Warning: Vector dimension mismatch ({v1.shape} vs {v2.shape}).")
-        return 0.0
-    
-    dot_product = np.dot(v1, v2)
-    norm_v1 = np.linalg.norm(v1)
-    norm_v2 = np.linalg.norm(v2)
-    
-    if norm_v1 == 0 or norm_v2 == 0:
-        return 0.0
-        
-    return float(dot_product / (norm_v1 * norm_v2))
+    _, scores = cosine_top_k(vec1, np.atleast_2d(np.asarray(vec2, dtype=np.float32)), k=1)
+    return float(scores[0]) if len(scores) else 0.0
 
 # Initializing embedding model is expensive, so we might do it in a class or lazy load
-_model_cache = None
+_embedder_cache = None
+_embedding_caches: Dict[str, Any] = {}  # cache file path -> EmbeddingCache (one per memory dir)
+_embedding_client = None
+
+def get_embedder():
+    """The configured embedding backend (see embedders.py); models load on first encode."""
+    global _embedder_cache
+    if _embedder_cache is None:
+        from embedders import create_embedder
+        _embedder_cache = create_embedder(
+            EMBEDDING_BACKEND, EMBEDDING_MODEL, HASH_EMBEDDING_DIM, tuple(HASH_EMBEDDING_NGRAMS)
+        )
+    return _embedder_cache
+
+def _remote_encode(backend_id: str, texts: Sequence[str]) -> Optional[np.ndarray]:
+    """Encode through a running embedding server (None when none answers or it serves another backend)."""
+    global _embedding_client
+    if _embedding_client is None:
+        from embedding_server import EmbeddingClient
+        _embedding_client = EmbeddingClient(EMBEDDING_SERVER_SOCKET)
+    reply = _embedding_client.encode(texts)
+    if reply is None:
+        return None
+    server_backend, vectors = reply
+    if server_backend != backend_id:
+        print(f"Warning: embedding server runs {server_backend}, expected {backend_id}; encoding in-process.")
+        return None
+    return vectors
 
-def get_embedding(text: str) -> List[float]:
+def get_embedding_cache(cache_path: Optional[str] = None):
     """
-    Generate embedding for text using sentence-transformers.
+    Lazy open the content-hash embedding cache at `cache_path` (a store's
+    MemoryStore.embedding_cache_path; default: under MEMORY_DIR). One cache
+    per path; None when caching is disabled.
+    """
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    import os
+    path = os.path.abspath(cache_path or os.path.join(MEMORY_DIR, "embeddings", "embedding_cache.sqlite3"))
+    cache = _embedding_caches.get(path)
+    if cache is None:
+        from embedding_cache import EmbeddingCache
+        cache = _embedding_caches[path] = EmbeddingCache(
+            path,
+            model=get_embedder().id,
+            max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+        )
+    return cache
+
+def get_embeddings(texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE,
+                   cache_path: Optional[str] = None) -> np.ndarray:
+    """
+    Generate embeddings for many texts in real model batches.
+    Returns a (len(texts), dim) float32 array; empty/blank texts get zero rows.
+    The content-hash cache (at `cache_path`, see get_embedding_cache) is
+    consulted first; misses go to the embedding server when one is running,
+    and only otherwise to the in-process backend.
+    """
+    embedder = get_embedder()
+    todo = [i for i, t in enumerate(texts) if t and t.strip()]
+    cache = get_embedding_cache(cache_path)
+    cached = cache.get_many([texts[i] for i in todo]) if (cache is not None and todo) else [None] * len(todo)
+    missing = [i for i, vec in zip(todo, cached) if vec is None]
+
+    vectors = None
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        vectors = _remote_encode(embedder.id, missing_texts)
+        if vectors is None:
+            vectors = embedder.encode(missing_texts, batch_size=batch_size)
+        dim = vectors.shape[1]
+    elif todo:
+        dim = cached[0].shape[0]
+    else:
+        dim = embedder.dim
+
+    result = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, vec in zip(todo, cached):
+        if vec is not None:
+            if vec.shape[0] != dim:
+                raise ValueError(f"Cached embedding has dimension {vec.shape[0]}, expected {dim}")
+            result[i] = vec
+    if missing:
+        if vectors.ndim != 2 or vectors.shape[1] != dim:
+            raise ValueError(f"Embedding model returned shape {vectors.shape}, expected (*, {dim})")
+        result[missing] = vectors
+        if cache is not None:
+            cache.put_many([texts[i] for i in missing], vectors)
+    return result
+
+def get_embedding(text: str, cache_path: Optional[str] = None) -> List[float]:
+    """
+    Generate embedding for text with the configured backend.
     Lazy loads the model.
     """
-    global _model_cache
-    if _model_cache is None:
+    return get_embeddings([text], cache_path=cache_path)[0].tolist()
+
+def iter_embedding_batches(
+    items: Iterable[T],
+    text_of: Callable[[T], str],
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    max_pending: int = EMBEDDING_QUEUE_SIZE,
+    cache_path: Optional[str] = None
+) -> Iterator[Tuple[List[T], np.ndarray]]:
+    """
+    Embed a stream of items batch by batch, yielding (items, vectors).
+    A producer thread reads the texts (typically file I/O) into a bounded
+    queue of at most `max_pending` batches while the model encodes, so
+    memory stays flat and disk reads overlap with inference.
+    """
+    work: "queue.Queue" = queue.Queue(maxsize=max(1, max_pending))
+    done = object()
+
+    def produce():
         try:
-            from sentence_transformers import SentenceTransformer
-            # Using the model specified in config or default
-            _model_cache = SentenceTransformer('google/embeddinggemma-300m')
-        except ImportError:
-            print("Warning: sentence-transformers not installed. Returning dummy vector.")
-            return [0.0] * 384 # Dummy 384-dim vector for testing without deps
-            
-    if not text or not text.strip():
-        return [0.0] * 384
-        
-    embedding = _model_cache.encode(text)
-    return embedding.tolist()
+            batch: List[T] = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    work.put((batch, [text_of(x) for x in batch]))
+                    batch = []
+            if batch:
+                work.put((batch, [text_of(x) for x in batch]))
+        except Exception as e:  # surface producer errors in the consumer
+            work.put(e)
+        finally:
+            work.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        entry = work.get()
+        if entry is done:
+            break
+        if isinstance(entry, Exception):
+            raise entry
+        batch, texts = entry
+        yield batch, get_embeddings(texts, batch_size=batch_size, cache_path=cache_path)
@@ -0,0 +1,203 @@
+# Sacred Essence ANN Index
+# 近似最近鄰索引：純 NumPy IVF-flat，建立在 EmbeddingStore 的列之上
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+from algorithms import normalize_rows, cosine_top_k
+
+_ASSIGN_CHUNK = 8192  # rows scored against the centroids per matmul
+
+
+class ANNIndex:
+    """
+    Inverted-file (IVF-flat) cosine index over the rows of an EmbeddingStore.
+
+    - Spherical k-means splits the vectors into ~sqrt(N) lists.
+    - A query scores the centroids, probes the `nprobe` closest lists and
+      ranks their members exactly.
+    - Below `min_train` vectors it simply scans every row exactly.
+
+    The index addresses store rows, so it catches up on its own. Rows appended
+    since the last save (e.g. encodes from another process) are assigned on
+    load. Tombstoned rows are skipped at query time. A store compaction
+    (`layout_version` change) or 4x growth since training triggers a rebuild.
+    """
+
+    def __init__(self, store: EmbeddingStore, path: str, nprobe: int = 8,
+                 min_train: int = 2048, kmeans_iters: int = 8):
+        self.store = store
+        self.path = path
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.kmeans_iters = kmeans_iters
+        self.centroids: Optional[np.ndarray] = None   # (nlist, dim) unit vectors
+        self.assignments = np.zeros(0, dtype=np.int32) # row -> list id (-1 = none)
+        self.norms = np.zeros(0, dtype=np.float32)     # row -> L2 norm
+        self.trained_on = 0
+        self.layout_version = -1
+        self._lists: List[np.ndarray] = []
+        self._load()
+        self.sync()
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = np.load(self.path)
+            self.layout_version = int(data["layout_version"])
+            self.trained_on = int(data["trained_on"])
+            self.assignments = data["assignments"].astype(np.int32)
+            self.norms = data["norms"].astype(np.float32)
+            self.centroids = data["centroids"] if data["centroids"].size else None
+        except Exception as e:
+            print(f"⚠️  ANN index unreadable, rebuilding: {e}")
+            self.layout_version = -1
+        self._rebuild_lists()
+
+    def save(self):
+        tmp = self.path + ".tmp.npz"
+        np.savez(
+            tmp,
+            layout_version=self.layout_version,
+            trained_on=self.trained_on,
+            assignments=self.assignments,
+            norms=self.norms,
+            centroids=self.centroids if self.centroids is not None else np.zeros((0, 0), np.float32),
+        )
+        os.replace(tmp, self.path)
+
+    def _rebuild_lists(self):
+        if self.centroids is None:
+            self._lists = []
+            return
+        order = np.argsort(self.assignments, kind="stable")
+        sorted_ids = self.assignments[order]
+        bounds = np.searchsorted(sorted_ids, np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]].astype(np.int64) for i in range(len(self.centroids))]
+
+    # ---------- build / maintenance ----------
+
+    def _assign(self, unit_rows: np.ndarray) -> np.ndarray:
+        out = np.empty(len(unit_rows), dtype=np.int32)
+        for start in range(0, len(unit_rows), _ASSIGN_CHUNK):
+            chunk = unit_rows[start:start + _ASSIGN_CHUNK]
+            out[start:start + len(chunk)] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return out
+
+    def _train(self, unit_rows: np.ndarray, nlist: int) -> np.ndarray:
+        """Spherical k-means on a sample of at most 64 points per list."""
+        rng = np.random.default_rng(0)
+        sample_size = min(len(unit_rows), 64 * nlist)
+        sample = unit_rows[np.sort(rng.choice(len(unit_rows), sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            counts = np.bincount(assign, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            present = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = counts == 0
+            if empty.any():  # reseed empty lists with random sample points
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            centroids, _ = normalize_rows(sums)
+        return centroids
+
+    def build(self):
+        """(Re)train the coarse quantizer and assign every live row."""
+        keys, mat = self.store.matrix()
+        unit_rows, norms = normalize_rows(mat)
+        live = self.store.live_mask()
+        self.norms = norms.astype(np.float32)
+        self.layout_version = self.store.layout_version
+        n_live = int(live.sum())
+        if n_live < self.min_train:
+            self.centroids = None
+            self.assignments = np.full(len(keys), -1, dtype=np.int32)
+            self.trained_on = 0
+        else:
+            nlist = int(np.clip(np.sqrt(n_live), 1, 4096))
+            self.centroids = self._train(unit_rows[live], nlist)
+            self.assignments = np.where(live, self._assign(unit_rows), -1).astype(np.int32)
+            self.trained_on = n_live
+        self._rebuild_lists()
+        self.save()
+
+    def sync(self, persist: bool = True):
+        """Bring the index in line with the store (catch up on appended rows or rebuild)."""
+        keys, mat = self.store.matrix()
+        n_live = len(self.store)
+        needs_train = self.centroids is None and n_live >= self.min_train
+        grew = self.trained_on and n_live > 4 * self.trained_on
+        if self.layout_version != self.store.layout_version or len(self.assignments) > len(keys) \
+                or needs_train or grew:
+            self.build()
+            return
+        start = len(self.assignments)
+        if start < len(keys):
+            unit_rows, norms = normalize_rows(mat[start:])
+            self.norms = np.concatenate([self.norms, norms.astype(np.float32)])
+            if self.centroids is not None:
+                new = self._assign(unit_rows)
+            else:
+                new = np.full(len(unit_rows), -1, dtype=np.int32)
+            new[[keys[start + i] is None for i in range(len(new))]] = -1
+            self.assignments = np.concatenate([self.assignments, new])
+            self._rebuild_lists()
+            if persist:
+                self.save()
+
+    def add(self, row: int):
+        """Index a freshly appended store row (persisted on the next search or save)."""
+        self.sync(persist=False)
+
+    def remove(self, row: int):
+        """Drop a tombstoned store row from its list."""
+        if row < len(self.assignments) and self.assignments[row] >= 0:
+            list_id = self.assignments[row]
+            self.assignments[row] = -1
+            members = self._lists[list_id]
+            self._lists[list_id] = members[members != row]
+
+    # ---------- query ----------
+
+    def search(self, query: Sequence[float], k: int = 10,
+               row_mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k store rows by cosine similarity to `query`.
+        `row_mask` (bool per store row) restricts the candidates, e.g. to one topic.
+        """
+        self.sync()
+        keys, mat = self.store.matrix()
+        q, q_norm = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        if not len(keys) or q_norm == 0 or q.shape[0] != mat.shape[1]:
+            return []
+
+        live = self.store.live_mask()
+        allowed = live if row_mask is None else live & row_mask[:len(keys)]
+
+        if self.centroids is None:
+            candidates = np.flatnonzero(allowed)
+        else:
+            nprobe = min(self.nprobe, len(self.centroids))
+            while True:
+                probe = np.argsort(-(self.centroids @ q))[:nprobe]
+                candidates = np.concatenate([self._lists[i] for i in probe])
+                candidates = candidates[allowed[candidates]]
+                if len(candidates) >= k or nprobe >= len(self.centroids):
+                    break
+                nprobe = min(nprobe * 4, len(self.centroids))
+        if not len(candidates):
+            return []
+
+        candidates = np.sort(candidates)
+        best, scores = cosine_top_k(q, mat[candidates], k, normalized=False,
+                                    norms=self.norms[candidates])
+        return [(int(candidates[i]), float(s)) for i, s in zip(best, scores)]
@@ -0,0 +1,60 @@
+# Sacred Essence Embedding Precision Benchmark
+# 比較 float32 / float16 / int8 向量倉庫的 recall@k 與佔用空間
+#
+# Usage: python bench_quantization.py [n_vectors] [dim]   (default 20000 384)
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from embedding_store import EmbeddingStore, PRECISIONS
+from algorithms import cosine_top_k
+
+
+def make_vectors(n: int, dim: int, seed: int = 11) -> np.ndarray:
+    """Clustered vectors, closer to real embeddings than pure noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 50), dim))
+    labels = rng.integers(0, len(centers), size=n)
+    return (centers[labels] + 0.5 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def recall_at_k(exact, approx) -> float:
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact, approx))
+    return hits / sum(len(e) for e in exact)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    k, n_queries = 10, 200
+    vectors = make_vectors(n, dim)
+    queries = vectors[:n_queries] + 0.1 * np.random.default_rng(1).normal(size=(n_queries, dim))
+    exact = [cosine_top_k(q, vectors, k)[0] for q in queries]
+    legacy_bytes = n * dim * 8  # per-node float64 embedding.npy
+
+    print(f"📊 {n} vectors x {dim} dims, recall@{k} over {n_queries} queries")
+    print(f"   {'precision':<10} {'MB':>8} {'vs f64':>7} {'recall':>7} {'ms/query':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for precision in PRECISIONS:
+            store = EmbeddingStore(os.path.join(tmp, precision), precision=precision)
+            store.put_many([(f"bench/n{i}", v) for i, v in enumerate(vectors)])
+            _, mat = store.matrix()
+            start = time.perf_counter()
+            found = [cosine_top_k(q, mat, k)[0] for q in queries]
+            per_query = (time.perf_counter() - start) / n_queries * 1000
+            recall = recall_at_k(exact, found)
+            print(f"   {precision:<10} {store.nbytes / 1e6:>8.1f} {legacy_bytes / store.nbytes:>6.1f}x "
+                  f"{recall:>7.3f} {per_query:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Sacred Essence Semantic Sibling Benchmark
+# 量測語意兄弟節點挑選（相似度 × 重要度混合排序）的延遲（預設單一主題 5k 節點、384 維）
+#
+# Usage: python bench_semantic_siblings.py [n_nodes] [dim]   (default 5000 384)
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from models import MemoryNode, NodeState
+from storage import MemoryStore
+from algorithms import cosine_similarity, calculate_importance
+
+
+def run(n: int, dim: int):
+    rng = np.random.default_rng(3)
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=os.path.join(tmp, "trash"))
+        nodes = []
+        for i in range(n):
+            created = now - timedelta(days=float(rng.uniform(0, 300)))
+            node = MemoryNode(id=f"n{i:05d}", topic="bench", title=f"n{i}", content_path="",
+                              creation_date=created, last_access_date=created + timedelta(days=float(rng.uniform(0, 30))),
+                              access_count=int(rng.choice([0, 1, 5, 40])), state=NodeState.SILVER)
+            store.save_node(node)
+            nodes.append(node)
+        vectors = rng.standard_normal((n, dim)).astype(np.float32)
+        store.embeddings.put_many([(f"bench/{node.id}", vec) for node, vec in zip(nodes, vectors)])
+
+        targets = [nodes[i] for i in rng.integers(0, n, 200)]
+        store.semantic_siblings(targets[0], 5, current_date=now)  # warm the column / alignment caches
+        start = time.perf_counter()
+        for target in targets:
+            store.semantic_siblings(target, 5, current_date=now)
+        elapsed = (time.perf_counter() - start) / len(targets)
+        print(f"semantic_siblings, {n} nodes x {dim}d: {elapsed * 1000:.2f} ms/call")
+
+        target = targets[0]
+        start = time.perf_counter()
+        for node, vec in zip(nodes, vectors):
+            if node.id != target.id:
+                cosine_similarity(vectors[0].tolist(), vec.tolist())
+                calculate_importance(node, now)
+        print(f"per-pair cosine_similarity + calculate_importance: {(time.perf_counter() - start) * 1000:.0f} ms/call")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    run(n, dim)
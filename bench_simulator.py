@@ -0,0 +1,62 @@
+# Sacred Essence Decay Simulator Benchmark
+# 量測逐日重播 GC 狀態機的速度（預設 100k 節點 × 365 天）
+#
+# Usage: python bench_simulator.py [n_nodes] [days]   (default 100000 365)
+
+import sys
+import time
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from simulator import simulate_columns
+from models import NodeState
+from config import STABILITY_USER, STABILITY_ROLE, STABILITY_WORLD
+
+
+def make_columns(n: int, now: datetime, seed: int = 7):
+    """Synthetic catalog columns shaped like NodeCatalog.score_columns()."""
+    rng = np.random.default_rng(seed)
+    now64 = np.datetime64(now, 'us')
+    day = np.timedelta64(86_400_000_000, 'us')
+    created = now64 - (rng.uniform(0, 720, n) * day).astype('timedelta64[us]')
+    accessed = created + (rng.uniform(0, 200, n) * day).astype('timedelta64[us]')
+    states = [NodeState.GOLDEN.value, NodeState.SILVER.value, NodeState.BRONZE.value]
+    return {
+        "topic_dir": ["bench"] * n,
+        "id": [f"n{i}" for i in range(n)],
+        "state": rng.choice(states, n, p=[0.01, 0.6, 0.39]).astype(object),
+        "creation_date": created,
+        "last_access_date": np.minimum(accessed, now64),
+        "stability_factor": rng.choice([STABILITY_USER, STABILITY_ROLE, STABILITY_WORLD], n),
+        "access_count": rng.choice([0, 1, 3, 20, 500], n),
+        "retrieval_count": rng.integers(0, 300, n),
+    }
+
+
+def run(n: int, days: int):
+    now = datetime.now()
+    cols = make_columns(n, now)
+    sizes = np.random.default_rng(1).integers(1_000, 20_000, n)
+
+    start = time.perf_counter()
+    history = simulate_columns(cols, days, now, file_bytes=sizes, embedding_bytes=np.full(n, 1536))
+    elapsed = time.perf_counter() - start
+
+    print(f"{n} nodes x {days + 1} days: {elapsed:.2f}s ({elapsed / (days + 1) * 1000:.1f} ms/day)")
+    for entry in history:
+        if entry["day"] in (0, 30, 90, 365):
+            print(f"  day {entry['day']:>3}: GOLDEN={entry['golden']} SILVER={entry['silver']} "
+                  f"BRONZE={entry['bronze']} live={entry['live_bytes'] / 1e6:.1f}MB "
+                  f"trash={entry['trash_bytes'] / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    run(n, days)
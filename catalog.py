@@ -0,0 +1,253 @@
+# Sacred Essence Node Catalog
+# 節點目錄索引：以單一 SQLite 檔案取代 glob + 逐節點 JSON 解析
+
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import List, Optional, Iterable, Dict, Any, Sequence
+
+import numpy as np
+
+from models import MemoryNode
+from algorithms import predict_transition_date
+
+# Bump whenever the table layout changes; a mismatch drops the table and
+# the owning MemoryStore rebuilds it from the node files.
+SCHEMA_VERSION = 3
+
+_EPOCH = datetime(1970, 1, 1)
+_KEYS_PER_QUERY = 400  # (topic_dir, id) pairs per lookup; 2 parameters each stays under SQLite's 999 limit
+_ONE_MICRO = timedelta(microseconds=1)
+
+_CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS nodes (
+    topic_dir        TEXT NOT NULL,
+    id               TEXT NOT NULL,
+    topic            TEXT NOT NULL,
+    title            TEXT NOT NULL,
+    state            TEXT NOT NULL,
+    access_count     INTEGER NOT NULL,
+    retrieval_count  INTEGER NOT NULL,
+    stability_factor REAL NOT NULL,
+    creation_date    TEXT NOT NULL,
+    last_access_date TEXT NOT NULL,
+    creation_us      INTEGER NOT NULL,
+    last_access_us   INTEGER NOT NULL,
+    content_path     TEXT NOT NULL,
+    due_us           INTEGER,
+    PRIMARY KEY (topic_dir, id)
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_state ON nodes (state);
+CREATE INDEX IF NOT EXISTS idx_nodes_due ON nodes (due_us);
+"""
+
+_COLUMNS = (
+    "topic_dir", "id", "topic", "title", "state",
+    "access_count", "retrieval_count", "stability_factor",
+    "creation_date", "last_access_date", "creation_us", "last_access_us",
+    "content_path", "due_us",
+)
+
+
+class NodeCatalog:
+    """
+    Persistent metadata index for MemoryStore.
+
+    The node files (node.meta.json / L0.md / L1.md / content.md) remain the
+    source of truth; the catalog only mirrors the scalar metadata so that
+    listing and filtering cost one query instead of a glob plus N file reads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.created = False  # True when the table had to be (re)created
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> 'NodeCatalog':
+        """Open the database and run the schema check (sets `created`)."""
+        self._connect()
+        return self
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS nodes")
+                self.created = True
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='nodes'"
+            ).fetchone()
+            if not exists:
+                self.created = True
+            conn.executescript(_CREATE_SQL)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _row_values(topic_dir: str, node: MemoryNode) -> tuple:
+        # Decay calendar: predicted next state transition (NULL = never)
+        due = predict_transition_date(node)
+        return (
+            topic_dir, node.id, node.topic, node.title, node.state.value,
+            node.access_count, node.retrieval_count, node.stability_factor,
+            node.creation_date.isoformat(), node.last_access_date.isoformat(),
+            (node.creation_date - _EPOCH) // _ONE_MICRO,
+            (node.last_access_date - _EPOCH) // _ONE_MICRO,
+            node.content_path or "",
+            None if due is None else (due - _EPOCH) // _ONE_MICRO,
+        )
+
+    def upsert(self, topic_dir: str, node: MemoryNode):
+        """Insert or refresh the catalog row of a node."""
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        conn.execute(
+            f"INSERT OR REPLACE INTO nodes ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+            self._row_values(topic_dir, node),
+        )
+        conn.commit()
+
+    def remove(self, topic_dir: str, node_id: str):
+        """Drop a node from the catalog (e.g. after moving it to trash)."""
+        conn = self._connect()
+        conn.execute("DELETE FROM nodes WHERE topic_dir = ? AND id = ?", (topic_dir, node_id))
+        conn.commit()
+
+    def replace_all(self, entries: Iterable[tuple]):
+        """Atomically replace the whole catalog with (topic_dir, node) entries."""
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with conn:
+            conn.execute("DELETE FROM nodes")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO nodes ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                (self._row_values(topic_dir, node) for topic_dir, node in entries),
+            )
+
+    @staticmethod
+    def _where(topic_dir: Optional[str], state: Optional[str]):
+        clauses, params = [], []
+        if topic_dir is not None:
+            clauses.append("topic_dir = ?")
+            params.append(topic_dir)
+        if state is not None:
+            clauses.append("state = ?")
+            params.append(state)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def rows(self, topic_dir: str = None, state: str = None) -> List[sqlite3.Row]:
+        """Return catalog rows in deterministic (topic_dir, id) order."""
+        conn = self._connect()
+        where, params = self._where(topic_dir, state)
+        return conn.execute(
+            f"SELECT * FROM nodes{where} ORDER BY topic_dir, id", params
+        ).fetchall()
+
+    def score_columns(self, topic_dir: str = None, state: str = None) -> Dict[str, Any]:
+        """
+        Columnar view of the scoring inputs, in (topic_dir, id) order.
+        Dates come back as datetime64[us] arrays ready for calculate_importance_batch.
+        """
+        conn = self._connect()
+        where, params = self._where(topic_dir, state)
+        rows = conn.execute(
+            "SELECT topic_dir, id, state, creation_us, last_access_us, stability_factor, "
+            f"access_count, retrieval_count FROM nodes{where} ORDER BY topic_dir, id", params
+        ).fetchall()
+        n = len(rows)
+
+        def column(i, dtype):
+            return np.fromiter((r[i] for r in rows), dtype=dtype, count=n)
+
+        return {
+            "topic_dir": [r[0] for r in rows],
+            "id": [r[1] for r in rows],
+            "state": np.array([r[2] for r in rows], dtype=object),
+            "creation_date": column(3, np.int64).view('datetime64[us]'),
+            "last_access_date": column(4, np.int64).view('datetime64[us]'),
+            "stability_factor": column(5, np.float64),
+            "access_count": column(6, np.int64),
+            "retrieval_count": column(7, np.int64),
+        }
+
+    def due_rows(self, until: datetime, topic_dir: str = None) -> List[sqlite3.Row]:
+        """Rows whose predicted transition date is at or before `until` (soonest first)."""
+        conn = self._connect()
+        where, params = self._where(topic_dir, None)
+        where = f"{where} AND" if where else " WHERE"
+        return conn.execute(
+            f"SELECT * FROM nodes{where} due_us IS NOT NULL AND due_us <= ? ORDER BY due_us, topic_dir, id",
+            params + [(until - _EPOCH) // _ONE_MICRO],
+        ).fetchall()
+
+    def topic_dirs(self) -> List[str]:
+        conn = self._connect()
+        return [r[0] for r in conn.execute("SELECT DISTINCT topic_dir FROM nodes ORDER BY topic_dir")]
+
+    def rows_after(self, after: Optional[tuple], limit: int,
+                   due_until: Optional[datetime] = None) -> List[sqlite3.Row]:
+        """
+        Up to `limit` rows strictly after the (topic_dir, id) key `after`, in
+        key order; with `due_until`, only rows due by then. Used to walk the
+        catalog in resumable batches.
+        """
+        conn = self._connect()
+        clauses, params = [], []
+        if after is not None:
+            clauses.append("(topic_dir > ? OR (topic_dir = ? AND id > ?))")
+            params += [after[0], after[0], after[1]]
+        if due_until is not None:
+            clauses.append("due_us IS NOT NULL AND due_us <= ?")
+            params.append((due_until - _EPOCH) // _ONE_MICRO)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return conn.execute(
+            f"SELECT * FROM nodes{where} ORDER BY topic_dir, id LIMIT ?", params + [limit]
+        ).fetchall()
+
+    def rows_for(self, keys: Sequence[tuple]) -> List[sqlite3.Row]:
+        """Rows of the given (topic_dir, id) keys, in the order of `keys` (missing ones skipped)."""
+        conn = self._connect()
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), _KEYS_PER_QUERY):
+            chunk = keys[start:start + _KEYS_PER_QUERY]
+            values = ", ".join(["(?, ?)"] * len(chunk))
+            params = [part for key in chunk for part in key]
+            # CROSS JOIN keeps the key list as the outer loop, so each key is one primary-key probe
+            # (`(topic_dir, id) IN (VALUES ...)` would scan the whole table)
+            query = (f"WITH keys(topic_dir, id) AS (VALUES {values}) SELECT nodes.* FROM keys "
+                     "CROSS JOIN nodes ON nodes.topic_dir = keys.topic_dir AND nodes.id = keys.id")
+            for row in conn.execute(query, params):
+                found[(row["topic_dir"], row["id"])] = row
+        return [found[key] for key in map(tuple, keys) if key in found]
+
+    def oldest_rows(self, state: str, limit: int) -> List[sqlite3.Row]:
+        """The `limit` least recently accessed rows in `state`."""
+        conn = self._connect()
+        return conn.execute(
+            "SELECT * FROM nodes WHERE state = ? ORDER BY last_access_us, topic_dir, id LIMIT ?",
+            (state, limit),
+        ).fetchall()
+
+    def state_counts(self) -> Dict[str, int]:
+        conn = self._connect()
+        return dict(conn.execute("SELECT state, COUNT(*) FROM nodes GROUP BY state").fetchall())
+
+    def data_version(self) -> int:
+        """SQLite's `PRAGMA data_version`: changes when another connection commits."""
+        conn = self._connect()
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def count(self) -> int:
+        conn = self._connect()
+        return conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
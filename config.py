@@ -21,7 +21,36 @@ TRASH_DIR = os.path.join(BASE_DIR, ".trash")
 # memory/
 #   topics/ (L0/L1)
 #   storage/ (L2 raw files)
-#   embeddings/ (.npy)
+#   embeddings/ (packed vectors.npy + row index, see embedding_store.py)
+#   catalog.sqlite3 (node metadata index, see catalog.py)
+
+# Parallel node loading (ThreadPoolExecutor fan-out for list_nodes / get_siblings)
+# 1 = serial; raise on network filesystems or cold page caches
+LOAD_WORKERS = int(os.environ.get("SACRED_ESSENCE_LOAD_WORKERS", "1"))
+
+# Parallel GC (ProcessPoolExecutor, one shard per topic); 1 = serial
+GC_WORKERS = int(os.environ.get("SACRED_ESSENCE_GC_WORKERS", "1"))
+
+# Background maintenance scheduler (main.py scheduler); an interval of 0 disables the task
+SCHEDULER_INTERVALS = {
+    "gc": 6 * 3600,        # incremental GC pass
+    "trash": 24 * 3600,    # purge trash older than RETENTION_DAYS
+    "audit": 24 * 3600,    # QMD consistency audit
+    "sync": 24 * 3600,     # QMD mirror sync
+}
+SCHEDULER_MAX_FILES_PER_SECOND = 200   # I/O budget: node files touched per second
+SCHEDULER_NICE = 10                    # CPU niceness added at startup
+SCHEDULER_IDLE_SECONDS = 120           # back off while encode/search ran more recently than this
+SCHEDULER_POLL_SECONDS = 30            # how often the daemon wakes up
+SCHEDULER_GC_SLICE_SECONDS = 60        # GC time per wake-up; unfinished passes resume next time
+
+# Projection cache (ProjectionEngine): contexts are reused until a node changes or the TTL
+# expires (scores drift with time)
+PROJECTION_CACHE_SIZE = 256
+PROJECTION_CACHE_TTL = 60.0  # seconds
+PROJECTION_MAX_TOKENS = 4000  # combined render budget of ProjectionEngine.project_many
+# Semantic sibling mode: weight of cosine similarity to the target vs. importance (relative to the topic's best)
+PROJECTION_SEMANTIC_WEIGHT = 0.7
 
 # Thresholds
 SOFT_CAP_GOLDEN = 50
@@ -29,6 +58,7 @@ THRESHOLD_SILVER = 5.0   # Score < 5.0 -> Prune to Bronze (if not Golden)
 THRESHOLD_DUST = 1.0     # Score < 1.0 -> Mark as Dust (or Soil extraction)
 RETENTION_DAYS = 30      # Days to keep in Trash
 MIN_KEEP_NODES = 20      # Safety Net: Minimum active nodes to preserve
+GC_BATCH_SIZE = 256      # Incremental GC: nodes scored and applied per checkpointed batch
 GRACE_PERIOD_DAYS = 3    # Days before decay starts for new nodes
 
 # Formula Constants
@@ -49,3 +79,33 @@ WEIGHT_RETRIEVAL = 0.1   # Reading/Projecting
 SIMILARITY_THRESHOLD = 0.75  # > 0.75 -> Potential duplicate
 MERGE_THRESHOLD = 0.85       # > 0.85 -> Auto-merge (increment access_count only)
 EMBEDDING_MODEL = 'google/embeddinggemma-300m'
+# "auto" (sentence-transformers when installed, else hashing), "sentence-transformers" or "hashing"
+EMBEDDING_BACKEND = os.environ.get("SACRED_ESSENCE_EMBEDDING_BACKEND", "auto")
+HASH_EMBEDDING_DIM = 512          # Buckets of the model-free hashing embedder
+HASH_EMBEDDING_NGRAMS = (3, 5)    # UTF-8 byte n-gram lengths it hashes
+
+# Embedding Generation
+EMBEDDING_BATCH_SIZE = 32    # Texts per SentenceTransformer.encode call
+EMBEDDING_QUEUE_SIZE = 4     # Max text batches prepared ahead of the encoder
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000  # LRU cap of the content-hash embedding cache
+# Packed store precision: "float32", "float16" (2x smaller) or "int8" (~4x smaller, per-vector scale).
+# Changing it converts the existing store the next time it is opened.
+EMBEDDING_PRECISION = os.environ.get("SACRED_ESSENCE_EMBEDDING_PRECISION", "float32")
+
+# Resident embedding worker (`python main.py embed-server`); used automatically when running
+EMBEDDING_SERVER_SOCKET = os.environ.get(
+    "SACRED_ESSENCE_EMBED_SOCKET", os.path.join(MEMORY_DIR, "embed.sock")
+)
+EMBEDDING_SERVER_MAX_BATCH = 64   # Texts per coalesced model call
+EMBEDDING_SERVER_WAIT_MS = 5      # How long the worker waits to coalesce concurrent requests
+
+# Semantic Recall (IVF index over the packed embedding matrix)
+ANN_NPROBE = 8        # Inverted lists scanned per query
+ANN_MIN_TRAIN = 2048  # Below this many vectors queries scan exactly
+
+# Lexical Dedup (MinHash over content.md, no embedding model needed)
+MINHASH_PERMUTATIONS = 128
+MINHASH_BANDS = 16            # 16 bands x 8 rows -> candidates from ~0.7 Jaccard
+MINHASH_SHINGLE_BYTES = 9     # UTF-8 bytes per shingle (~3 CJK / 9 Latin characters)
+DEDUP_JACCARD_THRESHOLD = 0.8
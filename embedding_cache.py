@@ -0,0 +1,111 @@
+# Sacred Essence Embedding Cache
+# 內容雜湊快取：相同文字（同一模型）不重複計算 embedding
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS entries (
+    key       TEXT PRIMARY KEY,
+    model     TEXT NOT NULL,
+    dim       INTEGER NOT NULL,
+    vector    BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+_SQL_CHUNK = 500  # stay well below SQLite's bound-parameter limit
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC, trimmed, whitespace runs collapsed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding cache keyed by sha256(model + normalized text).
+    `model` is the embedding backend id (see embedders.py).
+
+    Entries written under another backend id are purged when the cache is
+    opened, so changing EMBEDDING_MODEL / EMBEDDING_BACKEND invalidates them.
+    The cache holds at most `max_entries` vectors, evicting the least
+    recently used ones first.
+    """
+
+    def __init__(self, path: str, model: str, max_entries: int = 100_000):
+        self.path = path
+        self.model = model
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript(_CREATE_SQL)
+        with self._conn:
+            self._conn.execute("DELETE FROM entries WHERE model != ?", (model,))
+
+    def key(self, text: str) -> str:
+        payload = f"{self.model}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Look up vectors for texts (None for misses) and refresh their LRU stamp."""
+        keys = [self.key(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        for start in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[start:start + _SQL_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            for key, dim, blob in self._conn.execute(
+                f"SELECT key, dim, vector FROM entries WHERE key IN ({placeholders})", chunk
+            ):
+                found[key] = np.frombuffer(blob, dtype=np.float32, count=dim).copy()
+        if found:
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                )
+        result = [found.get(k) for k in keys]
+        self.hits += sum(1 for v in result if v is not None)
+        self.misses += sum(1 for v in result if v is None)
+        return result
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        """Store vectors for texts, then evict least recently used entries over the cap."""
+        now = time.time()
+        rows = []
+        for text, vec in zip(texts, vectors):
+            vec = np.ascontiguousarray(vec, dtype=np.float32)
+            rows.append((self.key(text), self.model, vec.shape[0], vec.tobytes(), now))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, model, dim, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY last_used ASC LIMIT ?)",
+                    (excess,),
+                )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses,
+                "max_entries": self.max_entries}
+
+    def close(self):
+        self._conn.close()
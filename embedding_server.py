@@ -0,0 +1,214 @@
+# Sacred Essence Embedding Server
+# 常駐嵌入模型服務：Unix socket 上提供批次 encode，合併並行請求，避免每次 CLI 重新載入模型
+
+import os
+import json
+import time
+import queue
+import socket
+import struct
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_HEADER = struct.Struct("!I")  # big-endian length prefix of every JSON header
+_MAX_HEADER = 64 * 1024 * 1024
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    chunks, remaining = [], n
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, header: Dict[str, Any], payload: bytes = b""):
+    """Frame = length-prefixed JSON header, then `header['nbytes']` raw payload bytes."""
+    header = dict(header, nbytes=len(payload))
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data + payload)
+
+
+def recv_message(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if length > _MAX_HEADER:
+        raise ValueError(f"message header too large ({length} bytes)")
+    header = json.loads(_recv_exact(sock, length).decode("utf-8"))
+    payload = _recv_exact(sock, header.get("nbytes", 0)) if header.get("nbytes") else b""
+    return header, payload
+
+
+class EmbeddingServer:
+    """
+    Keeps one embedder (see embedders.py) resident and serves `encode` requests on a Unix socket.
+
+    Each connection gets a reader thread; requests are queued for a single
+    batcher thread that waits up to `max_wait_ms` for more requests and runs
+    them through the model as one batch of at most `max_batch` texts, so
+    concurrent clients share model calls.
+    """
+
+    def __init__(self, socket_path: str, embedder: Any,
+                 max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.socket_path = socket_path
+        self.embedder = embedder
+        self.dim = int(embedder.dim)  # loads the model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = 0
+        self.batches = 0
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._sock: Optional[socket.socket] = None
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> 'EmbeddingServer':
+        """Bind the socket and start the accept and batcher threads."""
+        if os.path.exists(self.socket_path):
+            if EmbeddingClient(self.socket_path).status() is not None:
+                raise RuntimeError(f"An embedding server is already listening on {self.socket_path}")
+            os.remove(self.socket_path)  # stale socket of a dead server
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._sock.listen(64)
+        self._sock.settimeout(0.2)
+        threading.Thread(target=self._accept_loop, name="embed-accept", daemon=True).start()
+        threading.Thread(target=self._batch_loop, name="embed-batcher", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while not self._stop.is_set():
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    # ---------- threads ----------
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    header, _ = recv_message(conn)
+                except (ConnectionError, ValueError, OSError):
+                    return
+                op = header.get("op")
+                if op == "status":
+                    send_message(conn, {"ok": True, "backend": self.embedder.id, "dim": self.dim,
+                                        "requests": self.requests, "batches": self.batches})
+                    continue
+                if op != "encode":
+                    send_message(conn, {"ok": False, "error": f"unknown op {op!r}"})
+                    continue
+                future: Future = Future()
+                self._queue.put((list(header.get("texts", [])), future))
+                try:
+                    vectors = future.result()
+                except Exception as e:
+                    send_message(conn, {"ok": False, "error": str(e)})
+                    continue
+                send_message(conn, {"ok": True, "backend": self.embedder.id, "dim": self.dim,
+                                    "count": len(vectors)}, vectors.tobytes())
+
+    def _batch_loop(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            pending = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._run_batch(pending)
+
+    def _run_batch(self, pending: List[Tuple[List[str], Future]]):
+        texts = [t for batch, _ in pending for t in batch]
+        try:
+            vectors = np.asarray(
+                self.embedder.encode(texts, batch_size=max(1, min(len(texts), self.max_batch))),
+                dtype=np.float32,
+            ).reshape(len(texts), self.dim)
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        self.requests += len(pending)
+        self.batches += 1
+        start = 0
+        for batch, future in pending:
+            future.set_result(np.ascontiguousarray(vectors[start:start + len(batch)]))
+            start += len(batch)
+
+
+class EmbeddingClient:
+    """Client of a running EmbeddingServer; every call returns None when no server answers."""
+
+    def __init__(self, socket_path: str, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _request(self, header: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        if not os.path.exists(self.socket_path):
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                send_message(sock, header)
+                return recv_message(sock)
+        except (OSError, ConnectionError, ValueError):
+            return None
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        reply = self._request({"op": "status"})
+        return reply[0] if reply is not None and reply[0].get("ok") else None
+
+    def encode(self, texts: Sequence[str]) -> Optional[Tuple[str, np.ndarray]]:
+        """Returns (server backend id, (len(texts), dim) float32 vectors), or None."""
+        reply = self._request({"op": "encode", "texts": list(texts)})
+        if reply is None or not reply[0].get("ok"):
+            return None
+        header, payload = reply
+        vectors = np.frombuffer(payload, dtype=np.float32).reshape(header["count"], header["dim"])
+        return header["backend"], vectors
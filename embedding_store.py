@@ -0,0 +1,482 @@
+# Sacred Essence Packed Embedding Store
+# 向量倉庫：單一 memory-mapped float32 矩陣 + id→row 映射，取代逐節點 embedding.npy
+
+import os
+import json
+import functools
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: single-process use only
+    fcntl = None
+
+
+def _exclusive(method):
+    """Run a mutating EmbeddingStore method under the store lock (see `_locked`)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._locked():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+MIN_CAPACITY = 64
+
+# Storage precision -> on-disk row dtype. int8 rows carry a per-vector scale.
+PRECISIONS = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def row_nbytes(dim: Optional[int], precision: str) -> int:
+    """On-disk bytes of one row (plus its int8 scale)."""
+    return (dim or 0) * np.dtype(PRECISIONS[precision]).itemsize + (4 if precision == "int8" else 0)
+
+
+def read_index(directory: str) -> Tuple[Dict, List[Optional[str]], int]:
+    """
+    (snapshot header, row -> key, journal lines) of a store directory, read
+    without locking, opening the matrix or creating any file, so read-only
+    reports can size a store without touching it.
+    """
+    snap, keys, replayed = {}, [], 0
+    snapshot_path = os.path.join(directory, "index.json")
+    log_path = os.path.join(directory, "index.log")
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            snap = json.load(f)
+        keys = list(snap.pop("keys", []))
+    if os.path.exists(log_path):
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                replayed += 1
+                op, _, rest = line.rstrip("\n").partition(" ")
+                if op == "+":
+                    row_str, _, key = rest.partition(" ")
+                    row, value = int(row_str), key
+                elif op == "-":
+                    row, value = int(rest), None
+                else:
+                    continue
+                if row >= len(keys):
+                    keys.extend([None] * (row + 1 - len(keys)))
+                keys[row] = value
+    return snap, keys, replayed
+
+
+class EmbeddingStore:
+    """
+    All node embeddings packed into one contiguous `.npy` matrix.
+
+    Layout under `directory`:
+        vectors.npy  - (capacity, dim) rows in the store precision, opened with np.memmap
+        scales.npy   - (capacity,) float32 per-vector scales (int8 precision only)
+        index.json   - snapshot: dim, precision, backend, row -> key (None = tombstone)
+        index.log    - append-only journal of row assignments since the snapshot
+        store.lock   - flock'ed around every mutation (several processes may share a store)
+
+    `precision` is float32, float16 or int8 (symmetric, scale = max|v| / 127).
+    Opening a store with another precision than it was written in converts it.
+    `get()` dequantizes; `matrix()` exposes the raw rows, which cosine scoring
+    can use directly because it is invariant to the per-vector scale.
+
+    `backend` records which embedder produced the vectors (see embedders.py);
+    vectors of another backend must not be mixed in, so switching backends
+    means `reset()` and re-embedding.
+
+    Keys are "topic_dir/node_id". Rows are append-only: an update tombstones
+    the old row and appends a new one, so every change is visible in the
+    journal to row-addressed indexes (see ann_index.py). Deleted rows are
+    zeroed and reclaimed by `compact()`, which bumps `layout_version` so
+    those indexes know to rebuild.
+
+    Every mutation holds an exclusive `fcntl.flock` on `store.lock` and first
+    reloads the snapshot, journal and files if another process changed them,
+    so concurrent writers never reuse a row or compact away each other's
+    vectors. Reads use the state as of the last mutation or `refresh()`.
+    """
+
+    def __init__(self, directory: str, precision: str = "float32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding precision {precision!r} (expected one of {sorted(PRECISIONS)})")
+        self.directory = directory
+        self.precision = precision
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.scales_path = os.path.join(directory, "scales.npy")
+        self.snapshot_path = os.path.join(directory, "index.json")
+        self.log_path = os.path.join(directory, "index.log")
+        self.lock_path = os.path.join(directory, "store.lock")
+        self.dim: Optional[int] = None
+        self.backend: Optional[str] = None
+        self.layout_version = 0
+        self._count = 0                      # rows in use (live + tombstones)
+        self._keys: List[Optional[str]] = [] # row -> key
+        self._rows: Dict[str, int] = {}      # key -> row
+        self._mat: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._version = 0                    # bumped on every row change (mask cache key)
+        self._mask_cache: Dict[object, np.ndarray] = {}
+        self._stamp = None                   # on-disk state this object last saw
+        self._lock_file = None
+        self._lock_depth = 0
+        os.makedirs(directory, exist_ok=True)
+        with self._locked():
+            if self.precision != precision:
+                self._rewrite(precision, live_only=False)
+
+    # ---------- cross-process coordination ----------
+
+    def _disk_stamp(self):
+        """
+        Identity of the on-disk state: snapshot and journal contents change
+        size / inode with every write; the matrix file is only ever replaced.
+        """
+        stamp = []
+        for path in (self.snapshot_path, self.log_path, self.vectors_path):
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_ino, st.st_size, st.st_mtime_ns) if path != self.vectors_path else st.st_ino)
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    @contextmanager
+    def _locked(self):
+        """Hold the store lock (re-entrant); on entry, catch up on other processes' writes."""
+        if self._lock_depth == 0:
+            self._lock_file = open(self.lock_path, 'a')
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            if self._lock_depth == 1 and self._disk_stamp() != self._stamp:
+                self._load()
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                self._stamp = self._disk_stamp()
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                self._lock_file.close()
+                self._lock_file = None
+
+    @_exclusive
+    def refresh(self):
+        """Reload the store if another process changed it since this object last looked."""
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        """(Re)read snapshot + journal and reopen the files. Call with the lock held."""
+        self._mat, self._scales = None, None
+        snap, self._keys, replayed = read_index(self.directory)
+        self.dim = snap.get("dim")
+        if snap:
+            self.precision = snap.get("precision", "float32")
+        self.backend = snap.get("backend")
+        self.layout_version = snap.get("layout_version", 0)
+        self._count = len(self._keys)
+        self._rows = {k: i for i, k in enumerate(self._keys) if k is not None}
+        if self.dim is not None and os.path.exists(self.vectors_path):
+            self._open_files()
+        self._version += 1
+        if replayed > 10000:
+            self._write_snapshot()  # fold a long journal back into the snapshot
+
+    def _open_files(self):
+        self._mat = np.lib.format.open_memmap(self.vectors_path, mode='r+')
+        self._scales = None
+        if self.precision == "int8":
+            self._scales = np.lib.format.open_memmap(self.scales_path, mode='r+')
+
+    def _set_row_key(self, row: int, key: Optional[str]):
+        if row >= len(self._keys):
+            self._keys.extend([None] * (row + 1 - len(self._keys)))
+        self._keys[row] = key
+
+    def _write_snapshot(self):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"dim": self.dim, "precision": self.precision, "backend": self.backend,
+                       "layout_version": self.layout_version,
+                       "keys": self._keys[:self._count]}, f)
+        os.replace(tmp, self.snapshot_path)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def _journal(self, line: str):
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+    def _write_files(self, capacity: int, rows: np.ndarray, scales: Optional[np.ndarray]):
+        """Atomically replace the backing files with `rows` (already in store precision)."""
+        targets = [(self.vectors_path, PRECISIONS[self.precision], (capacity, self.dim), rows)]
+        if self.precision == "int8":
+            targets.append((self.scales_path, np.float32, (capacity,), scales))
+        for path, dtype, shape, data in targets:
+            tmp = path + ".tmp"
+            new = np.lib.format.open_memmap(tmp, mode='w+', dtype=dtype, shape=shape)
+            if len(data):
+                new[:len(data)] = data
+            new.flush()
+            del new
+        self._mat = self._scales = None
+        for path, *_ in targets:
+            os.replace(path + ".tmp", path)
+        if self.precision != "int8" and os.path.exists(self.scales_path):
+            os.remove(self.scales_path)
+        self._open_files()
+
+    def _allocate(self, capacity: int):
+        """(Re)create the backing files with `capacity` rows, keeping used rows."""
+        used = self._count if self._mat is not None else 0
+        rows = self._mat[:used] if used else np.zeros((0, self.dim), PRECISIONS[self.precision])
+        scales = self._scales[:used] if self._scales is not None else np.zeros(0, np.float32)
+        self._write_files(capacity, rows, scales)
+
+    def _quantize(self, mat: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """float32 rows -> (rows in store precision, int8 scales or None)."""
+        mat = np.asarray(mat, dtype=np.float32)
+        if self.precision != "int8":
+            return mat.astype(PRECISIONS[self.precision]), None
+        scales = np.abs(mat).max(axis=-1) / 127.0
+        safe = np.where(scales > 0, scales, 1.0)
+        q = np.clip(np.rint(mat / safe[..., None]), -127, 127).astype(np.int8)
+        return q, scales.astype(np.float32)
+
+    def dequantize(self, rows: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+        """Stored rows (see matrix()) -> float32 values."""
+        out = np.asarray(rows, dtype=np.float32)
+        if scales is not None:
+            out = out * np.asarray(scales, dtype=np.float32)[..., None]
+        return out
+
+    # ---------- public API ----------
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    @property
+    def tombstones(self) -> int:
+        return self._count - len(self._rows)
+
+    def row_of(self, key: str) -> Optional[int]:
+        return self._rows.get(key)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return a copy of the vector stored for `key`, or None."""
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        return self.dequantize(self._mat[row], None if self._scales is None else self._scales[row])
+
+    @_exclusive
+    def put(self, key: str, vector: Sequence[float]) -> int:
+        """Insert or replace the vector of `key`. Returns the row it now lives in."""
+        vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.dim is None:
+            self.dim = int(vec.shape[0])
+            self._write_snapshot()
+        if vec.shape[0] != self.dim:
+            raise ValueError(f"Embedding dimension mismatch: store has {self.dim}, got {vec.shape[0]}")
+
+        stored, scale = self._quantize(vec)
+        old_row = self._rows.get(key)
+        if old_row is not None:
+            if np.array_equal(self._mat[old_row], stored) and \
+                    (scale is None or self._scales[old_row] == scale):
+                return old_row
+            self.delete(key)
+        if self._mat is None or self._count >= self._mat.shape[0]:
+            capacity = 0 if self._mat is None else self._mat.shape[0]
+            self._allocate(max(MIN_CAPACITY, capacity * 2))
+        row = self._count
+        self._count += 1
+        self._mat[row] = stored
+        self._mat.flush()
+        if scale is not None:
+            self._scales[row] = scale
+            self._scales.flush()
+        self._set_row_key(row, key)
+        self._rows[key] = row
+        self._version += 1
+        self._journal(f"+ {row} {key}")
+        return row
+
+    @_exclusive
+    def set_backend(self, backend: str):
+        """Record the embedder that produced this store's vectors."""
+        if backend != self.backend:
+            self.backend = backend
+            self._write_snapshot()
+
+    @_exclusive
+    def reset(self, backend: Optional[str] = None):
+        """Drop every vector (e.g. before re-embedding with another backend)."""
+        self._mat = self._scales = None
+        for path in (self.vectors_path, self.scales_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._keys, self._rows, self._count = [], {}, 0
+        self.dim = None
+        self.backend = backend
+        self.layout_version += 1
+        self._version += 1
+        self._write_snapshot()
+
+    @_exclusive
+    def put_many(self, items: Sequence[Tuple[str, Sequence[float]]]) -> List[int]:
+        """Bulk `put`: one resize, one flush and one journal write for the whole batch."""
+        if not items:
+            return []
+        mat = np.asarray([vec for _, vec in items], dtype=np.float32).reshape(len(items), -1)
+        if self.dim is None:
+            self.dim = int(mat.shape[1])
+            self._write_snapshot()
+        if mat.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension mismatch: store has {self.dim}, got {mat.shape[1]}")
+        keys = [key for key, _ in items]
+        last = {key: i for i, key in enumerate(keys)}  # later duplicates win
+        for key in last:
+            if key in self._rows:
+                self.delete(key)
+        picks = sorted(last.values())
+        stored, scales = self._quantize(mat[picks])
+        needed = self._count + len(picks)
+        if self._mat is None or needed > self._mat.shape[0]:
+            capacity = 0 if self._mat is None else self._mat.shape[0]
+            while capacity < needed:
+                capacity = max(MIN_CAPACITY, capacity * 2)
+            self._allocate(capacity)
+        start = self._count
+        self._mat[start:needed] = stored
+        self._mat.flush()
+        if scales is not None:
+            self._scales[start:needed] = scales
+            self._scales.flush()
+        lines = []
+        for offset, i in enumerate(picks):
+            row = start + offset
+            self._set_row_key(row, keys[i])
+            self._rows[keys[i]] = row
+            lines.append(f"+ {row} {keys[i]}")
+        self._count = needed
+        self._version += 1
+        self._journal("\n".join(lines))
+        return [self._rows[key] for key in keys]
+
+    @_exclusive
+    def delete(self, key: str) -> Optional[int]:
+        """Tombstone the row of `key` (returns it); space is reclaimed by `compact()`."""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return None
+        self._mat[row] = 0
+        self._mat.flush()
+        if self._scales is not None:
+            self._scales[row] = 0.0
+            self._scales.flush()
+        self._keys[row] = None
+        self._version += 1
+        self._journal(f"- {row}")
+        return row
+
+    @_exclusive
+    def compact(self) -> int:
+        """Rewrite live rows contiguously. Returns the number of reclaimed rows."""
+        if self._mat is None:
+            return 0
+        return self._rewrite(self.precision, live_only=True)
+
+    def _rewrite(self, precision: str, live_only: bool) -> int:
+        """
+        Rewrite the matrix in `precision`, optionally dropping tombstones.
+        Bumps `layout_version` so row-addressed indexes rebuild. Returns reclaimed rows.
+        """
+        reclaimed = self.tombstones if live_only else 0
+        if self._mat is None:
+            self.precision = precision
+            if self.dim is not None:
+                self._write_snapshot()
+            return 0
+        rows = [row for row, key in enumerate(self._keys[:self._count]) if key is not None or not live_only]
+        values = self.dequantize(self._mat[rows], None if self._scales is None else self._scales[rows])
+        self.precision = precision
+        stored, scales = self._quantize(values)
+        self._write_files(max(MIN_CAPACITY, len(rows)), stored,
+                          scales if scales is not None else np.zeros(0, np.float32))
+        self._keys = [self._keys[row] for row in rows]
+        self._count = len(self._keys)
+        self._rows = {k: i for i, k in enumerate(self._keys) if k is not None}
+        self.layout_version += 1
+        self._version += 1
+        self._write_snapshot()
+        return reclaimed
+
+    @_exclusive
+    def maybe_compact(self, max_tombstone_ratio: float = 0.25) -> int:
+        """Compact when tombstones exceed the given share of used rows."""
+        if self._count and self.tombstones / self._count > max_tombstone_ratio:
+            return self.compact()
+        return 0
+
+    def matrix(self) -> Tuple[List[Optional[str]], np.ndarray]:
+        """
+        Zero-copy view of all used rows (in store precision) and their keys.
+        Tombstoned rows are zero vectors with a None key. Rows are scaled per
+        vector under int8, which cosine scores ignore; use `scales()` +
+        `dequantize()` when actual values are needed.
+        """
+        if self._mat is None:
+            return [], np.zeros((0, self.dim or 0), dtype=PRECISIONS[self.precision])
+        return self._keys[:self._count], self._mat[:self._count]
+
+    def scales(self) -> Optional[np.ndarray]:
+        """Per-row scales of the used rows (int8 precision), else None."""
+        return None if self._scales is None else self._scales[:self._count]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes taken by the used rows (and their scales)."""
+        return self._count * row_nbytes(self.dim, self.precision)
+
+    def _cached_mask(self, cache_key, build) -> np.ndarray:
+        entry = self._mask_cache.get(cache_key)
+        if entry is None or entry[0] != self._version:
+            if len(self._mask_cache) > 256:
+                self._mask_cache.clear()
+            entry = (self._version, build())
+            self._mask_cache[cache_key] = entry
+        return entry[1]
+
+    def live_mask(self) -> np.ndarray:
+        """Bool per used row: True for live (non-tombstoned) rows."""
+        return self._cached_mask("__live__", lambda: np.fromiter(
+            (k is not None for k in self._keys[:self._count]), dtype=bool, count=self._count))
+
+    def topic_mask(self, topic_dir: str) -> np.ndarray:
+        """Bool per used row: True for live rows whose key belongs to `topic_dir`."""
+        prefix = f"{topic_dir}/"
+        return self._cached_mask(("topic", topic_dir), lambda: np.fromiter(
+            (k is not None and k.startswith(prefix) for k in self._keys[:self._count]),
+            dtype=bool, count=self._count))
+
+    @_exclusive
+    def import_legacy(self, items: Sequence[Tuple[str, Sequence[float]]]) -> List[str]:
+        """
+        Bulk-insert (key, vector) pairs, e.g. migrated per-node embedding.npy
+        files. Returns the keys actually stored (mismatched vectors are skipped).
+        """
+        imported = []
+        for key, vector in items:
+            try:
+                self.put(key, vector)
+                imported.append(key)
+            except ValueError as e:
+                print(f"Skipping embedding {key}: {e}")
+        return imported
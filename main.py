@@ -3,7 +3,6 @@
 
 import argparse
 import sys
-import os
 from datetime import datetime
 from uuid import uuid4
 from typing import Set
@@ -12,7 +11,17 @@ from storage import MemoryStore
 from models import MemoryNode, NodeState
 from maintenance import MaintenanceManager
 from projection import ProjectionEngine
-from algorithms import calculate_importance
+from algorithms import (
+    get_embeddings, iter_embedding_batches, get_embedding_cache
+)
+from config import (
+    EMBEDDING_BATCH_SIZE, EMBEDDING_SERVER_SOCKET, EMBEDDING_SERVER_MAX_BATCH,
+    EMBEDDING_SERVER_WAIT_MS, SIMILARITY_THRESHOLD, MERGE_THRESHOLD, DEDUP_JACCARD_THRESHOLD,
+    GC_BATCH_SIZE, GC_WORKERS, STABILITY_USER, STABILITY_ROLE, STABILITY_WORLD,
+    THRESHOLD_SILVER, THRESHOLD_DUST, SOFT_CAP_GOLDEN,
+    SCHEDULER_INTERVALS, SCHEDULER_MAX_FILES_PER_SECOND, SCHEDULER_NICE, SCHEDULER_IDLE_SECONDS,
+    PROJECTION_MAX_TOKENS,
+)
 
 def main():
     parser = argparse.ArgumentParser(description="Sacred Essence v3.1 Memory System")
@@ -24,20 +33,81 @@ def main():
     encode_parser.add_argument("--title", required=True, help="Memory title")
     encode_parser.add_argument("--content", required=True, help="Memory content (L2)")
     encode_parser.add_argument("--abstract", default="", help="L0 Abstract")
+    encode_parser.add_argument("--no-embed", action="store_true", help="Skip computing the embedding")
+    encode_parser.add_argument("--no-dedup", action="store_true", help="Always create a new node, even for near-duplicates")
+    encode_parser.add_argument("--global-dedup", action="store_true", help="Check duplicates across all topics (default: same topic)")
+
+    # Re-embed
+    reembed_parser = subparsers.add_parser("reembed", help="Recompute embeddings for stored nodes in batches")
+    reembed_parser.add_argument("--topic", help="Only re-embed this topic")
+    reembed_parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="Texts per model batch")
+
+    # Resident embedding worker
+    server_parser = subparsers.add_parser("embed-server", help="Keep the embedding model loaded and serve other commands over a Unix socket")
+    server_parser.add_argument("--socket", default=EMBEDDING_SERVER_SOCKET, help="Unix socket path")
+    server_parser.add_argument("--max-batch", type=int, default=EMBEDDING_SERVER_MAX_BATCH, help="Texts per coalesced model call")
+    server_parser.add_argument("--wait-ms", type=float, default=EMBEDDING_SERVER_WAIT_MS, help="Coalescing window for concurrent requests")
 
     # Decay / GC
     gc_parser = subparsers.add_parser("gc", help="Run Garbage Collection")
     gc_parser.add_argument("--execute", action="store_true", help="Execute changes (default is dry-run)")
+    gc_parser.add_argument("--full", action="store_true", help="Rescore every node instead of only those due per the decay calendar")
+    gc_parser.add_argument("--workers", type=int, default=GC_WORKERS, help="Worker processes, one topic shard each (1 = serial)")
+    gc_parser.add_argument("--incremental", action="store_true", help="Process in checkpointed batches and resume an unfinished pass")
+    gc_parser.add_argument("--batch-size", type=int, default=GC_BATCH_SIZE, help="Nodes per incremental batch")
+    gc_parser.add_argument("--max-nodes", type=int, default=None, help="Incremental: stop after this many nodes")
+    gc_parser.add_argument("--max-seconds", type=float, default=None, help="Incremental: stop after this many seconds")
+    gc_parser.add_argument("--restart", action="store_true", help="Incremental: drop the checkpoint and start a new pass")
 
     # Project
     proj_parser = subparsers.add_parser("project", help="Project Context for a node")
     proj_parser.add_argument("--topic", required=True)
-    proj_parser.add_argument("--id", required=True)
+    proj_parser.add_argument("--id", required=True, nargs="+", help="One or more node IDs (several: one combined context)")
+    proj_parser.add_argument("--max-tokens", type=int,
+                             help=f"Token budget of the rendered context (default: none for one ID, "
+                                  f"{PROJECTION_MAX_TOKENS} for several)")
+    proj_parser.add_argument("--semantic", action="store_true",
+                             help="Pick siblings by similarity to the target blended with importance")
     
     # List
     list_parser = subparsers.add_parser("list", help="List nodes")
     list_parser.add_argument("--topic", help="Filter by topic")
+    list_parser.add_argument("--state", choices=["GOLDEN", "SILVER", "BRONZE", "DUST"], help="Filter by state")
+
+    # Rebuild catalog index
+    subparsers.add_parser("rebuild-index", help="Regenerate the node catalog from the Markdown files")
+
+    # Lexical dedup (MinHash/LSH, no embedding model)
+    dedup_parser = subparsers.add_parser("dedup", help="List clusters of near-identical memories (MinHash/LSH)")
+    dedup_parser.add_argument("--topic", help="Only check this topic")
+    dedup_parser.add_argument("--threshold", type=float, default=DEDUP_JACCARD_THRESHOLD,
+                              help="Minimum estimated Jaccard similarity (0-1)")
     
+    # Background maintenance daemon
+    sched_parser = subparsers.add_parser("scheduler", help="Run GC, trash cleanup and QMD audit/sync on intervals in the background")
+    sched_parser.add_argument("--once", action="store_true", help="Run the due tasks once and exit")
+    sched_parser.add_argument("--status", action="store_true", help="Print the running scheduler's status file")
+    for task, default in SCHEDULER_INTERVALS.items():
+        sched_parser.add_argument(f"--{task}-interval", type=float, default=default, help=f"Seconds between {task} runs (0 = off)")
+    sched_parser.add_argument("--max-files-per-second", type=float, default=SCHEDULER_MAX_FILES_PER_SECOND, help="I/O budget")
+    sched_parser.add_argument("--nice", type=int, default=SCHEDULER_NICE, help="CPU niceness increment")
+    sched_parser.add_argument("--idle-seconds", type=float, default=SCHEDULER_IDLE_SECONDS,
+                              help="Back off while encode/search ran within this many seconds")
+
+    # Decay forecast (read-only)
+    sim_parser = subparsers.add_parser("simulate", help="Forecast state counts and disk usage by replaying daily GC (no writes)")
+    sim_parser.add_argument("--days", type=int, default=365, help="Days to simulate")
+    sim_parser.add_argument("--report-days", type=int, nargs="+", default=[0, 30, 90, 365], help="Days to print")
+    sim_parser.add_argument("--daily", action="store_true", help="Print every simulated day")
+    sim_parser.add_argument("--json", action="store_true", help="Dump the full per-day history as JSON")
+    sim_parser.add_argument("--stability-user", type=float, help=f"Try a new STABILITY_USER (now {STABILITY_USER})")
+    sim_parser.add_argument("--stability-role", type=float, help=f"Try a new STABILITY_ROLE (now {STABILITY_ROLE})")
+    sim_parser.add_argument("--stability-world", type=float, help=f"Try a new STABILITY_WORLD (now {STABILITY_WORLD})")
+    sim_parser.add_argument("--threshold-silver", type=float, default=THRESHOLD_SILVER)
+    sim_parser.add_argument("--threshold-dust", type=float, default=THRESHOLD_DUST)
+    sim_parser.add_argument("--soft-cap-golden", type=int, default=SOFT_CAP_GOLDEN)
+    sim_parser.add_argument("--no-disk", action="store_true", help="Skip measuring node sizes on disk")
+
     # Search (新增：統一搜索入口)
     search_parser = subparsers.add_parser("search", help="Smart search with Sacred Essence + QMD + Fallback")
     search_parser.add_argument("text", help="Query text")
@@ -95,8 +165,35 @@ def main():
     store = MemoryStore()
     maintenance = MaintenanceManager(store)
     projection = ProjectionEngine(store)
+    if args.command in ("encode", "search", "project"):
+        store.mark_activity()  # background maintenance backs off while the agent is working
 
     if args.command == "encode":
+        # Embed L2 content (falls back to the abstract / title when empty)
+        vector = None
+        if not args.no_embed:
+            text = store.embedding_source(args.content, args.abstract, args.title)
+            vector = get_embeddings([text], cache_path=store.embedding_cache_path)[0]
+            if not vector.any():
+                vector = None
+
+        # Near-duplicate check against stored embeddings (same topic unless --global-dedup)
+        if vector is not None and not args.no_dedup:
+            similar = store.find_similar(
+                vector, SIMILARITY_THRESHOLD, topic=None if args.global_dedup else args.topic
+            )
+            if similar and similar[0][2] >= MERGE_THRESHOLD:
+                topic_dir, dup_id, sim = similar[0]
+                existing = store.load_node(topic_dir, dup_id)
+                if existing is not None:
+                    existing.update_access()
+                    store.save_node(existing)
+                    print(f"🔁 Merged into existing memory {topic_dir}/{dup_id} - {existing.title} "
+                          f"(similarity {sim:.3f}, access_count={existing.access_count})")
+                    return
+            for topic_dir, dup_id, sim in similar:
+                print(f"⚠️  Probable duplicate: {topic_dir}/{dup_id} (similarity {sim:.3f})")
+
         # Create new node
         node_id = str(uuid4())[:8]
         node = MemoryNode(
@@ -111,17 +208,11 @@ def main():
             L1_overview=""
         )
         
-        # Save content first
-        node_dir = store._get_node_dir(node.topic, node.id)
-        os.makedirs(node_dir, exist_ok=True)
-        content_file = os.path.join(node_dir, "content.md")
-        with open(content_file, 'w', encoding='utf-8') as f:
-            f.write(args.content)
-        
-        node.content_path = content_file
+        if vector is not None:
+            node.embedding = vector.tolist()
 
-        # Save node to Sacred Essence
-        store.save_node(node)
+        # Save node (content + metadata) to Sacred Essence
+        store.save_node(node, content=args.content)
         print(f"✅ Encoded to Sacred Essence: {node.topic}/{node.id} - {node.title}")
         
         # Auto-sync to QMD (方案 B: 自動同步)
@@ -145,11 +236,19 @@ def main():
 
     elif args.command == "gc":
         print(f"Running Garbage Collection (Dry Run: {not args.execute})...")
-        report = maintenance.run_garbage_collection(dry_run=not args.execute)
+        if args.incremental:
+            if args.restart:
+                maintenance.clear_checkpoint()
+            report = maintenance.run_incremental_gc(
+                dry_run=not args.execute, full=args.full, batch_size=args.batch_size,
+                max_nodes=args.max_nodes, max_seconds=args.max_seconds)
+        else:
+            report = maintenance.run_garbage_collection(dry_run=not args.execute, full=args.full,
+                                                        workers=args.workers)
         print("Report:", report)
         
         # GC 後觸發 QMD 審計（修補 Edge Case 2）
-        if args.execute:
+        if args.execute and report.get("complete", True):
             print("\n🔍 Triggering QMD audit after GC...")
             try:
                 from qmd_bridge import QMDBridge
@@ -162,16 +261,128 @@ def main():
                 print(f"⚠️  QMD audit skipped: {e}")
 
     elif args.command == "project":
-        ctx = projection.project_context(args.topic, args.id)
-        print(projection.render_context(ctx))
+        if len(args.id) == 1:
+            ctx = projection.project_context(args.topic, args.id[0], semantic=args.semantic)
+            for chunk in projection.iter_render(ctx, args.max_tokens):
+                sys.stdout.write(chunk)
+            print()
+        else:
+            if args.max_tokens is None:
+                args.max_tokens = PROJECTION_MAX_TOKENS
+            batch = projection.project_many([(args.topic, node_id) for node_id in args.id],
+                                            max_tokens=args.max_tokens, semantic=args.semantic)
+            print(batch["rendered"])
+            if batch["omitted"]:
+                print(f"\n⚠️  {batch['omitted']} entries left out to stay within {args.max_tokens} tokens")
         
     elif args.command == "list":
-        nodes = store.list_nodes(args.topic)
+        state = NodeState(args.state) if args.state else None
+        nodes = store.list_nodes(args.topic, state=state)
+        # Scores come from the catalog columns in one batch, not from the node objects
+        cols, scores = store.score_catalog(args.topic, state)
+        score_of = dict(zip(zip(cols["topic_dir"], cols["id"]), scores))
         print(f"Found {len(nodes)} nodes.")
         for n in nodes:
-            score = calculate_importance(n)
+            score = score_of[(store._topic_key(n.topic), n.id)]
             print(f"[{n.state.value}] {n.topic}/{n.id} - {n.title} (Score: {score:.2f})")
     
+    elif args.command == "reembed":
+        if not store.embeddings_compatible():
+            if args.topic:
+                print(f"❌ Stored embeddings come from {store.embeddings.backend}, not {store.embedding_backend}; "
+                      "re-embed all topics (without --topic) to switch backends")
+                return
+            print(f"🔁 Switching embeddings from {store.embeddings.backend} to {store.embedding_backend}")
+            store.embeddings.reset(store.embedding_backend)
+        nodes = store.list_nodes(args.topic)
+        print(f"🔄 Re-embedding {len(nodes)} nodes (batch size {args.batch_size})...")
+        embedded = skipped = 0
+        for batch, vectors in iter_embedding_batches(nodes, store.embedding_text, batch_size=args.batch_size,
+                                                     cache_path=store.embedding_cache_path):
+            for node, vector in zip(batch, vectors):
+                if vector.any():
+                    store.save_embedding(node, vector)
+                    embedded += 1
+                else:
+                    skipped += 1
+            print(f"   {embedded + skipped}/{len(nodes)}", end="\r")
+        print(f"\n✅ Re-embedded {embedded} nodes ({skipped} without text or model skipped)")
+        cache = get_embedding_cache(store.embedding_cache_path)
+        if cache is not None:
+            print(f"   Embedding cache: {cache.stats()}")
+
+    elif args.command == "embed-server":
+        from algorithms import get_embedder
+        from embedding_server import EmbeddingServer
+        embedder = get_embedder()
+        print(f"⏳ Loading {embedder.id}...")
+        server = EmbeddingServer(args.socket, embedder,
+                                 max_batch=args.max_batch, max_wait_ms=args.wait_ms)
+        print(f"🚀 Embedding server listening on {args.socket} (Ctrl+C to stop)")
+        server.serve_forever()
+        print(f"👋 Embedding server stopped after {server.requests} requests in {server.batches} batches")
+
+    elif args.command == "rebuild-index":
+        count = store.rebuild_index()
+        print(f"✅ Catalog rebuilt: {count} nodes indexed")
+
+    elif args.command == "dedup":
+        clusters = store.find_lexical_duplicates(topic=args.topic, threshold=args.threshold)
+        if not clusters:
+            print("✅ No near-duplicate memories found")
+        for n, (members, sim) in enumerate(clusters, 1):
+            print(f"\n🔁 Cluster {n}: {len(members)} memories (Jaccard ≥ {sim:.2f})")
+            for row in members:
+                print(f"   {row['topic_dir']}/{row['id']} [{row['state']}] {row['title']}")
+
+    elif args.command == "scheduler":
+        from scheduler import MaintenanceScheduler, read_status
+        if args.status:
+            import json
+            status = read_status(store.memory_dir)
+            print(json.dumps(status, indent=2, ensure_ascii=False) if status else "No scheduler status yet")
+            return
+        scheduler = MaintenanceScheduler(
+            store,
+            intervals={task: getattr(args, f"{task}_interval") for task in SCHEDULER_INTERVALS},
+            max_files_per_second=args.max_files_per_second,
+            idle_seconds=args.idle_seconds,
+        )
+        if args.once:
+            ran = scheduler.run_pending()
+            print(f"Ran: {', '.join(ran) if ran else 'nothing due'}")
+        else:
+            scheduler.run_forever(nice=args.nice)
+
+    elif args.command == "simulate":
+        from simulator import simulate_store
+        stability = {
+            old: new for old, new in ((STABILITY_USER, args.stability_user),
+                                      (STABILITY_ROLE, args.stability_role),
+                                      (STABILITY_WORLD, args.stability_world))
+            if new is not None
+        }
+        history = simulate_store(
+            store, days=args.days, disk=not args.no_disk, stability=stability,
+            threshold_silver=args.threshold_silver, threshold_dust=args.threshold_dust,
+            soft_cap_golden=args.soft_cap_golden,
+        )
+        if args.json:
+            import json
+            print(json.dumps(history, indent=2))
+        else:
+            days = range(args.days + 1) if args.daily else sorted(d for d in set(args.report_days) if d <= args.days)
+            print(f"{'day':>5} {'date':>10} {'GOLDEN':>7} {'SILVER':>7} {'BRONZE':>7} {'trashed':>8} "
+                  f"{'live MB':>9} {'trash MB':>9}")
+            trashed = 0
+            for entry in history:
+                trashed += entry["trashed"]
+                if entry["day"] in days:
+                    note = "  ⚠️  safety net" if entry["safety_net"] else ""
+                    print(f"{entry['day']:>5} {entry['date']:>10} {entry['golden']:>7} {entry['silver']:>7} "
+                          f"{entry['bronze']:>7} {trashed:>8} {entry['live_bytes'] / 1e6:>9.2f} "
+                          f"{entry['trash_bytes'] / 1e6:>9.2f}{note}")
+
     elif args.command == "search":
         # 新增：統一搜索入口（含逃生艙機制）
         try:
@@ -188,13 +399,18 @@ def main():
         
         if not node_whitelist:
             print("🔍 No whitelist provided, retrieving relevant nodes from Sacred Essence...")
-            # 簡化：列出所有節點作為白名單（實際應使用神髓的語義檢索）
-            all_nodes = store.list_nodes()
-            # 按重要性排序，取前 20
-            scored_nodes = [(n, calculate_importance(n)) for n in all_nodes]
-            scored_nodes.sort(key=lambda x: x[1], reverse=True)
-            node_whitelist = {n.id for n, _ in scored_nodes[:20]}
-            print(f"   Selected top {len(node_whitelist)} nodes as whitelist")
+            # 語義檢索：以 ANN 索引取最相近的 20 個節點
+            semantic_hits = store.semantic_search(args.text, k=20)
+            if semantic_hits:
+                node_whitelist = {node_id for _, node_id, _ in semantic_hits}
+                print(f"   Selected {len(node_whitelist)} semantically closest nodes as whitelist")
+            else:
+                # 無 embedding 時退回：按重要性排序，取前 20（直接以目錄索引欄位批次評分）
+                cols, scores = store.score_catalog()
+                scored_ids = list(zip(cols["id"], scores))
+                scored_ids.sort(key=lambda x: x[1], reverse=True)
+                node_whitelist = {node_id for node_id, _ in scored_ids[:20]}
+                print(f"   Selected top {len(node_whitelist)} nodes as whitelist")
             sacred_confidence = 0.4  # 自動選擇時降低信心閾值
         
         # 執行智能搜索（含逃生艙）
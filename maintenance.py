@@ -2,26 +2,80 @@
 
 from datetime import datetime, timedelta
 import os
+import json
+import time
 import shutil
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
 from config import (
     SOFT_CAP_GOLDEN,
     THRESHOLD_SILVER,
     THRESHOLD_DUST,
     MIN_KEEP_NODES,
-    TRASH_DIR,
-    RETENTION_DAYS
+    RETENTION_DAYS,
+    GC_BATCH_SIZE
 )
 from models import MemoryNode, NodeState
 from storage import MemoryStore
 from algorithms import calculate_importance
 
+
+# ---------- parallel GC shards (module level so worker processes can import them) ----------
+
+def _score_shard(memory_dir: str, trash_dir: str, topic_dir: str, current_time: datetime,
+                 full: bool, include_golden: bool) -> Tuple[List[tuple], Dict[str, int]]:
+    """
+    Worker: score one topic's GC candidates and apply the per-node decay rules.
+    Returns ([(topic_dir, id, original state, new state, score, last access)], counters).
+    """
+    store = MemoryStore(memory_dir=memory_dir, trash_dir=trash_dir)
+    if full:
+        candidates = store.list_nodes(topic=topic_dir)
+    else:
+        candidates = store.list_due_nodes(current_time, topic=topic_dir)
+        if include_golden:
+            candidates += store.list_nodes(topic=topic_dir, state=NodeState.GOLDEN)
+    report = {"scanned": 0, "downgraded_silver": 0, "marked_dust": 0}
+    records = []
+    for node in candidates:
+        score = calculate_importance(node, current_time)
+        original = node.state
+        report["scanned"] += 1
+        MaintenanceManager._apply_decay(node, score, report)
+        records.append((topic_dir, node.id, original.value, node.state.value, float(score), node.last_access_date))
+    return records, report
+
+
+def _apply_shard(memory_dir: str, trash_dir: str, topic_dir: str,
+                 changes: Dict[str, Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Worker: persist one topic's GC decisions, {node id: (new state, action)} with
+    action "trash", "save" or "reindex". Returns (topic, id) of the nodes moved to trash.
+    """
+    store = MemoryStore(memory_dir=memory_dir, trash_dir=trash_dir)
+    trashed = []
+    for node in store.list_nodes(topic=topic_dir):
+        if node.id not in changes:
+            continue
+        state, action = changes[node.id]
+        node.state = NodeState(state)
+        if action == "trash":
+            store.move_to_trash(node)
+            trashed.append((node.topic, node.id))
+        elif action == "save":
+            store.save_node(node)
+        else:
+            store.reindex_node(node)
+    return trashed
+
+
 class MaintenanceManager:
     def __init__(self, store: MemoryStore):
         self.store = store
 
-    def run_garbage_collection(self, dry_run: bool = False) -> Dict[str, int]:
+    def run_garbage_collection(self, dry_run: bool = False, full: bool = False, workers: int = 1,
+                               current_time: Optional[datetime] = None) -> Dict[str, int]:
         """
         Execute the Garbage Collection (GC) cycle.
         1. Update Scores & States
@@ -29,35 +83,45 @@ class MaintenanceManager:
         3. Identify Dust & Move to Trash
         4. Clean old Trash
         5. Trigger QMD Audit (Edge Case 2: Data Consistency)
+
+        By default only nodes whose predicted transition date has passed are
+        scored (the catalog's decay calendar), so cost tracks the number of
+        transitions. `full=True` rescores every node.
+
+        With `workers > 1` topics are scored and applied on a process pool
+        (see `_run_parallel_gc`); the report is the same as a serial run's.
         """
         report = {"scanned": 0, "downgraded_silver": 0, "marked_dust": 0, "trashed": 0, "cleaned_trash": 0, "qmd_audit": None}
-        
-        all_nodes = self.store.list_nodes()
+        current_time = current_time or datetime.now()
+        if workers > 1 and hasattr(self.store, "list_topics"):
+            return self._run_parallel_gc(report, dry_run, full, workers, current_time)
+        due_only = not full and hasattr(self.store, "list_due_nodes")
+
+        if due_only:
+            counts = self.store.count_by_state()
+            total_nodes = sum(counts.values())
+            candidates = self.store.list_due_nodes(current_time)
+            # Golden nodes never come due; load them only when the soft cap needs enforcing
+            if counts[NodeState.GOLDEN] > SOFT_CAP_GOLDEN:
+                candidates += self.store.list_nodes(state=NodeState.GOLDEN)
+            dust_outside = counts[NodeState.DUST] - sum(1 for n in candidates if n.state == NodeState.DUST)
+        else:
+            candidates = self.store.list_nodes()
+            total_nodes = len(candidates)
+            dust_outside = 0
+
         nodes_by_state = {s: [] for s in NodeState}
+        original_state = {id(node): node.state for node in candidates}
         
         # 1-4. Original GC logic...
-        current_time = datetime.now()
         updated_nodes = []
+        score_of = {}
         
-        for node in all_nodes:
-            report["scanned"] += 1
+        for node in candidates:
             score = calculate_importance(node, current_time)
-            
-            if node.state == NodeState.GOLDEN:
-                pass 
-            elif node.state == NodeState.SILVER:
-                if score < THRESHOLD_SILVER:
-                    if score < THRESHOLD_DUST:
-                        node.state = NodeState.DUST
-                        report["marked_dust"] += 1
-                    else:
-                        node.state = NodeState.BRONZE
-                        report["downgraded_silver"] += 1
-            elif node.state == NodeState.BRONZE:
-                if score < THRESHOLD_DUST:
-                     node.state = NodeState.DUST
-                     report["marked_dust"] += 1
-            
+            report["scanned"] += 1
+            score_of[id(node)] = score
+            self._apply_decay(node, score, report)
             nodes_by_state[node.state].append(node)
             updated_nodes.append(node)
 
@@ -69,36 +133,21 @@ class MaintenanceManager:
             for i in range(excess):
                 node = golden_nodes[i]
                 
-                # Evaluate score immediately to prevent delayed state transition
-                score = calculate_importance(node, current_time)
-                if score < THRESHOLD_DUST:
-                    node.state = NodeState.DUST
-                    report["marked_dust"] += 1
-                elif score < THRESHOLD_SILVER:
-                    node.state = NodeState.BRONZE
-                    report["downgraded_silver"] += 1
-                else:
-                    node.state = NodeState.SILVER
-                    report["downgraded_silver"] += 1
+                node.state = self._demote_golden(score_of[id(node)], report)
                     
                 # Add to corresponding state list so it will be trashed if DUST
                 nodes_by_state[node.state].append(node)
 
         # Safety Net Check
-        active_count = len(all_nodes) - len(nodes_by_state[NodeState.DUST])
+        active_count = total_nodes - dust_outside - len(nodes_by_state[NodeState.DUST])
         if active_count < MIN_KEEP_NODES:
             print(f"WARNING: Safety Net Triggered! Active nodes ({active_count}) < Min ({MIN_KEEP_NODES}). Aborting GC.")
             return report
 
         # Move Dust to Trash
         if not dry_run:
-            # 引入 QMD Bridge 以執行刪除
-            bridge_instance = None
-            try:
-                from qmd_bridge import QMDBridge
-                bridge_instance = QMDBridge("sacred-l2")
-            except Exception as e:
-                print(f"⚠️  Could not init QMD Bridge for GC deletion: {e}")
+            # 引入 QMD Bridge 以執行刪除（整個 GC 共用一個實例）
+            bridge_instance = self._open_bridge()
                 
             for node in nodes_by_state[NodeState.DUST]:
                 # Exclude nodes that were inherently DUST and trashed before to prevent duplicate trash moves
@@ -106,48 +155,338 @@ class MaintenanceManager:
                 self.store.move_to_trash(node)
                 report["trashed"] += 1
                 
-                # 防禦『資料幽靈』：同步從 QMD 中刪除
-                if bridge_instance:
-                    bridge_instance.delete_node(node.id)
+            # 防禦『資料幽靈』：同步從 QMD 中刪除（批次，只跑一次 update/embed）
+            if bridge_instance:
+                bridge_instance.delete_nodes(self._qmd_mirrors(
+                    (node.topic, node.id) for node in nodes_by_state[NodeState.DUST]))
             
             for node in updated_nodes:
                 if node.state != NodeState.DUST:
-                    # Optimize File I/O: Only save if changed state or interacted (is_dirty)
-                    is_modified = getattr(node, 'is_dirty', False)
-                    # We can't easily check state change here without tracking original.
-                    # As a workaround, just save if is_dirty flag is True.
-                    # Let's save unconditionally if it's dirty, OR if its score indicates a recent change.
-                    # Better solution: Always save nodes whose state is not DUST and is dirty.
-                    if getattr(node, 'is_dirty', True):
+                    # Optimize File I/O: only save nodes that changed state or were interacted with
+                    if node.state != original_state[id(node)] or getattr(node, 'is_dirty', False):
                         self.store.save_node(node)
-                        if hasattr(node, 'is_dirty'):
-                            node.is_dirty = False
+                        node.is_dirty = False
+                    elif due_only:
+                        # Came due without transitioning: move its due date forward
+                        self.store.reindex_node(node)
 
-            report["cleaned_trash"] = self._clean_trash()
-            
-            # 5. Trigger QMD Audit (Edge Case 2)
-            try:
-                from qmd_bridge import QMDBridge
-                bridge = QMDBridge("sacred-l2")
-                audit_report = bridge.audit_and_cleanup(dry_run=True)
-                report["qmd_audit"] = {
-                    "orphaned": len(audit_report["orphaned_in_qmd"]),
-                    "missing": len(audit_report["missing_in_qmd"])
-                }
-            except Exception as e:
-                report["qmd_audit"] = {"error": str(e)}
+            self._finish(report, bridge_instance)
             
         return report
 
+    # ---------- parallel GC ----------
+
+    def _run_parallel_gc(self, report: Dict[str, Any], dry_run: bool, full: bool, workers: int,
+                         current_time: datetime) -> Dict[str, Any]:
+        """
+        Decay transitions only look at a node itself, so every topic is scored
+        in its own worker process. The golden soft cap and the safety net are
+        global: the parent reduces them over all shard results, then the
+        workers apply trash moves and saves per topic.
+        """
+        store = self.store
+        counts = store.count_by_state()
+        include_golden = not full and counts[NodeState.GOLDEN] > SOFT_CAP_GOLDEN
+        topics = store.list_topics()
+        if not dry_run:
+            store.embeddings  # open (and migrate) once here, not concurrently in the workers
+
+        records = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_score_shard, store.memory_dir, store.trash_dir, topic_dir,
+                                   current_time, full, include_golden) for topic_dir in topics]
+            for future in futures:
+                shard_records, shard_report = future.result()
+                records += shard_records
+                for key, value in shard_report.items():
+                    report[key] += value
+
+            # Reduce: golden soft cap, oldest access first (ties in catalog order)
+            state = {(t, i): NodeState(new) for t, i, _, new, _, _ in records}
+            golden = sorted((r for r in records if state[r[:2]] == NodeState.GOLDEN), key=lambda r: r[5])
+            for topic_dir, node_id, _, _, score, _ in golden[:max(0, len(golden) - SOFT_CAP_GOLDEN)]:
+                state[(topic_dir, node_id)] = self._demote_golden(score, report)
+
+            # Reduce: safety net
+            total_nodes = sum(counts.values()) if not full else len(records)
+            dust = sum(1 for s in state.values() if s == NodeState.DUST)
+            dust_outside = 0 if full else counts[NodeState.DUST] - sum(
+                1 for r in records if r[2] == NodeState.DUST.value)
+            active_count = total_nodes - dust_outside - dust
+            if active_count < MIN_KEEP_NODES:
+                print(f"WARNING: Safety Net Triggered! Active nodes ({active_count}) < Min ({MIN_KEEP_NODES}). Aborting GC.")
+                return report
+            if dry_run:
+                return report
+
+            changes: Dict[str, Dict[str, Tuple[str, str]]] = {}
+            for topic_dir, node_id, original, _, _, _ in records:
+                new = state[(topic_dir, node_id)]
+                if new == NodeState.DUST:
+                    action = "trash"
+                elif new.value != original:
+                    action = "save"
+                elif not full:
+                    action = "reindex"
+                else:
+                    continue
+                changes.setdefault(topic_dir, {})[node_id] = (new.value, action)
+            trashed = []
+            futures = [pool.submit(_apply_shard, store.memory_dir, store.trash_dir, topic_dir, shard)
+                       for topic_dir, shard in sorted(changes.items())]
+            for future in futures:
+                trashed += future.result()
+
+        # Workers wrote the embedding journal and catalog behind our back
+        store.refresh_indexes()
+        report["trashed"] = len(trashed)
+        bridge_instance = self._open_bridge()
+        if bridge_instance:
+            bridge_instance.delete_nodes(self._qmd_mirrors(trashed))
+        self._finish(report, bridge_instance)
+        return report
+
+    # ---------- incremental GC ----------
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.store.memory_dir, "gc_checkpoint.json")
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """The unfinished incremental pass, or None."""
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️  GC checkpoint unreadable, starting a new pass: {e}")
+            return None
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def run_incremental_gc(self, dry_run: bool = False, full: bool = False,
+                           batch_size: int = GC_BATCH_SIZE, max_nodes: Optional[int] = None,
+                           max_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        GC in bounded batches that can stop and resume.
+
+        A pass walks the due nodes (or every node with `full=True`) in
+        (topic_dir, id) order, scored against the pass's fixed start time.
+        Each batch is applied (trash, saves, catalog) before the cursor in
+        `gc_checkpoint.json` moves past it, so an interrupted run loses at
+        most one batch of work, which the next run redoes. A run stops once
+        it has processed `max_nodes` nodes or spent `max_seconds`; the next
+        call resumes the pass. The pass finishes with the trash cleanup and
+        QMD audit of a regular run and removes the checkpoint.
+
+        The safety net and the golden soft cap work from the catalog's
+        aggregate counts; only the current batch (or the excess golden
+        nodes) is ever loaded. A dry run previews from the saved cursor
+        without writing anything.
+        """
+        started = time.monotonic()
+        checkpoint = self.load_checkpoint()
+        if checkpoint is None:
+            checkpoint = {
+                "as_of": datetime.now().isoformat(),
+                "full": full,
+                "stage": "golden",
+                "cursor": None,
+                "report": {"scanned": 0, "downgraded_silver": 0, "marked_dust": 0, "trashed": 0},
+            }
+        elif checkpoint["full"] != full:
+            print(f"Resuming the unfinished {'full' if checkpoint['full'] else 'due-only'} GC pass "
+                  f"started {checkpoint['as_of']}")
+        as_of = datetime.fromisoformat(checkpoint["as_of"])
+        if dry_run:
+            checkpoint = dict(checkpoint, report={k: 0 for k in checkpoint["report"]})
+        report = checkpoint["report"]
+        processed = 0
+        pending_dust = 0  # dry run only: nodes marked DUST that the catalog still counts as active
+
+        def out_of_budget() -> bool:
+            return ((max_nodes is not None and processed >= max_nodes)
+                    or (max_seconds is not None and time.monotonic() - started >= max_seconds))
+
+        bridge = None if dry_run else self._open_bridge()
+
+        if checkpoint["stage"] == "golden":
+            counts = self.store.count_by_state()
+            excess = counts[NodeState.GOLDEN] - SOFT_CAP_GOLDEN
+            if excess > 0:
+                golden = self.store.list_oldest_nodes(NodeState.GOLDEN, excess)
+                for node in golden:
+                    node.state = self._demote_golden(calculate_importance(node, as_of), report)
+                if not self._apply_batch(golden, counts, pending_dust, report, dry_run, bridge):
+                    return self._incremental_result(checkpoint, dry_run, processed, complete=False, safety_net=True)
+                if dry_run:
+                    pending_dust += sum(1 for n in golden if n.state == NodeState.DUST)
+                processed += len(golden)
+            checkpoint["stage"] = "decay"
+            if not dry_run:
+                self._save_checkpoint(checkpoint)
+
+        while checkpoint["stage"] == "decay":
+            if out_of_budget():
+                return self._incremental_result(checkpoint, dry_run, processed, complete=False)
+            limit = batch_size if max_nodes is None else max(1, min(batch_size, max_nodes - processed))
+            cursor = tuple(checkpoint["cursor"]) if checkpoint["cursor"] else None
+            nodes, last_key = self.store.list_nodes_after(
+                cursor, limit, due_until=None if checkpoint["full"] else as_of)
+            if last_key is None:
+                checkpoint["stage"] = "finish"
+                break
+            counts = self.store.count_by_state()
+            original_state = {id(node): node.state for node in nodes}
+            for node in nodes:
+                report["scanned"] += 1
+                self._apply_decay(node, calculate_importance(node, as_of), report)
+            if not self._apply_batch(nodes, counts, pending_dust, report, dry_run, bridge,
+                                     original_state):
+                return self._incremental_result(checkpoint, dry_run, processed, complete=False, safety_net=True)
+            if dry_run:
+                pending_dust += sum(1 for n in nodes if n.state == NodeState.DUST
+                                    and original_state[id(n)] != NodeState.DUST)
+            processed += len(nodes)
+            checkpoint["cursor"] = list(last_key)
+            if not dry_run:
+                self._save_checkpoint(checkpoint)
+
+        if not dry_run:
+            self._finish(report, bridge)
+            self.clear_checkpoint()
+        return self._incremental_result(checkpoint, dry_run, processed, complete=True)
+
+    def _apply_batch(self, nodes: List[MemoryNode], counts: Dict[NodeState, int],
+                     pending_dust: int, report: Dict[str, Any], dry_run: bool, bridge,
+                     original_state: Optional[Dict[int, NodeState]] = None) -> bool:
+        """
+        Trash and persist one scored batch; False (and no changes) if the
+        safety net trips. `counts` are the catalog counts before the batch.
+        """
+        if original_state is None:
+            original_state = {}
+        new_dust = sum(1 for n in nodes if n.state == NodeState.DUST
+                       and original_state.get(id(n), NodeState.GOLDEN) != NodeState.DUST)
+        active_count = sum(counts.values()) - counts[NodeState.DUST] - pending_dust - new_dust
+        if active_count < MIN_KEEP_NODES:
+            print(f"WARNING: Safety Net Triggered! Active nodes ({active_count}) < Min ({MIN_KEEP_NODES}). Aborting GC.")
+            return False
+        if dry_run:
+            return True
+        trashed = []
+        for node in nodes:
+            if node.state == NodeState.DUST:
+                self.store.move_to_trash(node)
+                report["trashed"] += 1
+                trashed.append((node.topic, node.id))
+            elif node.state != original_state.get(id(node)) or getattr(node, 'is_dirty', False):
+                self.store.save_node(node)
+                node.is_dirty = False
+            else:
+                # Came due without transitioning: move its due date forward
+                self.store.reindex_node(node)
+        if bridge and trashed:
+            bridge.delete_nodes(self._qmd_mirrors(trashed))
+        return True
+
+    def _qmd_mirrors(self, nodes: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        (topic, id) pairs the QMD mirror files of trashed nodes may be named
+        by: the topic as given at encode time and its topic directory (sync).
+        """
+        return [(name, node_id) for topic, node_id in nodes
+                for name in dict.fromkeys((topic, self.store._topic_key(topic)))]
+
+    def _incremental_result(self, checkpoint: Dict[str, Any], dry_run: bool, processed: int,
+                            complete: bool, safety_net: bool = False) -> Dict[str, Any]:
+        """Pass totals so far, plus `processed`: nodes handled by this call."""
+        report = dict(checkpoint["report"])
+        report.update(complete=complete, pass_started=checkpoint["as_of"], processed=processed,
+                      stage="done" if complete else checkpoint["stage"])
+        if safety_net:
+            report["safety_net"] = True
+        if not complete and not dry_run and not safety_net:
+            print(f"GC pass paused at {checkpoint['cursor']}; run again to resume.")
+        return report
+
+    # ---------- shared steps ----------
+
+    @staticmethod
+    def _apply_decay(node: MemoryNode, score: float, report: Dict[str, Any]):
+        """Downgrade a SILVER/BRONZE node whose score fell below its threshold."""
+        if node.state == NodeState.SILVER:
+            if score < THRESHOLD_SILVER:
+                if score < THRESHOLD_DUST:
+                    node.state = NodeState.DUST
+                    report["marked_dust"] += 1
+                else:
+                    node.state = NodeState.BRONZE
+                    report["downgraded_silver"] += 1
+        elif node.state == NodeState.BRONZE:
+            if score < THRESHOLD_DUST:
+                node.state = NodeState.DUST
+                report["marked_dust"] += 1
+
+    @staticmethod
+    def _demote_golden(score: float, report: Dict[str, Any]) -> NodeState:
+        """State of a soft-capped GOLDEN node: straight to the state its score allows."""
+        # Evaluate score immediately to prevent delayed state transition
+        if score < THRESHOLD_DUST:
+            report["marked_dust"] += 1
+            return NodeState.DUST
+        report["downgraded_silver"] += 1
+        return NodeState.BRONZE if score < THRESHOLD_SILVER else NodeState.SILVER
+
+    @staticmethod
+    def _open_bridge():
+        try:
+            from qmd_bridge import QMDBridge
+            return QMDBridge("sacred-l2")
+        except Exception as e:
+            print(f"⚠️  Could not init QMD Bridge for GC deletion: {e}")
+            return None
+
+    def _finish(self, report: Dict[str, Any], bridge=None):
+        """End-of-pass housekeeping: compaction, trash retention, QMD audit (on the run's bridge)."""
+        # Reclaim tombstoned rows of trashed nodes in the packed embedding matrix
+        if hasattr(self.store, "embeddings"):
+            self.store.embeddings.maybe_compact()
+
+        report["cleaned_trash"] = self._clean_trash()
+        
+        # 5. Trigger QMD Audit (Edge Case 2)
+        if bridge is None:
+            report["qmd_audit"] = {"error": "QMD bridge unavailable"}
+            return
+        try:
+            audit_report = bridge.audit_and_cleanup(dry_run=True)
+            report["qmd_audit"] = {
+                "orphaned": len(audit_report["orphaned_in_qmd"]),
+                "missing": len(audit_report["missing_in_qmd"])
+            }
+        except Exception as e:
+            report["qmd_audit"] = {"error": str(e)}
+
     def _clean_trash(self) -> int:
         """Permanently delete old files from trash."""
         cleaned = 0
         now = datetime.now()
-        if not os.path.exists(TRASH_DIR):
+        trash_dir = self.store.trash_dir
+        if not os.path.exists(trash_dir):
             return 0
             
-        for item in os.listdir(TRASH_DIR):
-            item_path = os.path.join(TRASH_DIR, item)
+        for item in os.listdir(trash_dir):
+            item_path = os.path.join(trash_dir, item)
             # Name format: {topic}_{id}_{timestamp}
             try:
                 parts = item.split('_')
@@ -0,0 +1,218 @@
+# Sacred Essence MinHash / LSH
+# 字面近似重複偵測：content.md 的 MinHash 簽章 + LSH 分帶索引，不需載入嵌入模型
+
+import os
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from embedding_cache import normalize_text
+
+_CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS signatures (
+    topic_dir  TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    mtime_ns   INTEGER NOT NULL,
+    size       INTEGER NOT NULL,
+    signature  BLOB NOT NULL,
+    PRIMARY KEY (topic_dir, id)
+);
+"""
+
+_HASH_BASE = np.uint64(1099511628211)  # FNV prime, used as the rolling-hash base
+_MAX_BUCKET_PAIRS = 64                 # larger LSH buckets are chained instead of fully paired
+EMPTY_SLOT = 0xFFFFFFFF                # signature value of texts without shingles
+
+
+def _permutations(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fixed odd multipliers and offsets of the multiply-shift hash family."""
+    rng = np.random.default_rng(0x5AC2ED)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingle_hashes(text: str, shingle_bytes: int = 9) -> np.ndarray:
+    """
+    Distinct 64-bit hashes of every `shingle_bytes`-long window of the
+    normalized, lower-cased UTF-8 text (9 bytes ~ 3 CJK or 9 Latin characters).
+    """
+    data = np.frombuffer(normalize_text(text).lower().encode("utf-8"), dtype=np.uint8)
+    if not len(data):
+        return np.zeros(0, dtype=np.uint64)
+    shingle_bytes = min(shingle_bytes, len(data))  # short texts form a single shingle
+    n = len(data) - shingle_bytes + 1
+    h = np.zeros(n, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(shingle_bytes):
+            h = h * _HASH_BASE + data[j:j + n].astype(np.uint64)
+    return np.unique(h)
+
+
+def text_signature(text: str, num_perm: int = 128, shingle_bytes: int = 9,
+                   perms: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+    """MinHash signature (uint32 per permutation); all-ones for empty text."""
+    hashes = shingle_hashes(text, shingle_bytes)
+    if not len(hashes):
+        return np.full(num_perm, EMPTY_SLOT, dtype=np.uint32)
+    a, b = perms if perms is not None else _permutations(num_perm)
+    with np.errstate(over="ignore"):
+        mixed = (hashes[None, :] * a[:, None] + b[:, None]) >> np.uint64(32)
+    return mixed.min(axis=1).astype(np.uint32)
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """
+    Candidate pairs (i < j) sharing at least one identical LSH band.
+    Returns a (pairs, 2) int64 array without duplicates.
+    """
+    n, num_perm = signatures.shape
+    if n < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+    rows = num_perm // bands
+    found = []
+    with np.errstate(over="ignore"):
+        for band in range(bands):
+            block = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+            keys = np.zeros(n, dtype=np.uint64)
+            for col in range(rows):
+                keys = keys * _HASH_BASE + block[:, col]
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            sizes = np.diff(np.r_[starts, n])
+            for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+                members = order[start:start + size]
+                if size <= _MAX_BUCKET_PAIRS:
+                    i, j = np.triu_indices(size, k=1)
+                    found.append(np.stack([members[i], members[j]], axis=1))
+                else:
+                    found.append(np.stack([members[:-1], members[1:]], axis=1))
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(found), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def duplicate_clusters(signatures: np.ndarray, bands: int,
+                       threshold: float) -> List[Tuple[List[int], float]]:
+    """
+    Group rows whose estimated Jaccard similarity reaches `threshold`.
+    Empty texts never match. Returns [(member row indices, lowest verified
+    pair similarity)], largest clusters first.
+    """
+    pairs = lsh_candidate_pairs(signatures, bands)
+    if not len(pairs):
+        return []
+    empty = (signatures == EMPTY_SLOT).all(axis=1)
+    sims = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    keep = (sims >= threshold) & ~empty[pairs[:, 0]] & ~empty[pairs[:, 1]]
+    pairs, sims = pairs[keep], sims[keep]
+
+    parent = list(range(len(signatures)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in pairs:
+        ri, rj = find(int(i)), find(int(j))
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    members: Dict[int, List[int]] = {}
+    weakest: Dict[int, float] = {}
+    for (i, _), sim in zip(pairs, sims):
+        root = find(int(i))
+        weakest[root] = min(weakest.get(root, 1.0), float(sim))
+    for row in sorted({int(x) for x in pairs.ravel()}):
+        members.setdefault(find(row), []).append(row)
+    clusters = [(rows, weakest[root]) for root, rows in members.items()]
+    clusters.sort(key=lambda c: (-len(c[0]), c[0][0]))
+    return clusters
+
+
+class MinHashIndex:
+    """
+    Sidecar SQLite store of per-node MinHash signatures of `content.md`.
+
+    Signatures are recomputed only when the content file's mtime or size
+    changed, so a nightly run over an unchanged store is a stat per node.
+    """
+
+    def __init__(self, path: str, num_perm: int = 128, shingle_bytes: int = 9):
+        self.path = path
+        self.num_perm = num_perm
+        self.shingle_bytes = shingle_bytes
+        self._perms = _permutations(num_perm)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript(_CREATE_SQL)
+        stored = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        layout = num_perm * 100 + shingle_bytes
+        if stored != layout:  # different signature parameters: start over
+            with self._conn:
+                self._conn.execute("DELETE FROM signatures")
+                self._conn.execute(f"PRAGMA user_version = {layout}")
+
+    def signature(self, text: str) -> np.ndarray:
+        return text_signature(text, self.num_perm, self.shingle_bytes, self._perms)
+
+    def refresh(self, entries: Sequence[Tuple[str, str, str]], map_fn=map,
+                prune: bool = True) -> Tuple[np.ndarray, int]:
+        """
+        Signatures for (topic_dir, id, content_path) entries, in entry order.
+        Stale or missing ones are recomputed (through `map_fn`, e.g. a thread
+        pool's map). With `prune`, rows of nodes not in `entries` are dropped.
+        Returns (signature matrix, number recomputed).
+        """
+        cached = {
+            (t, i): (m, s, blob)
+            for t, i, m, s, blob in self._conn.execute(
+                "SELECT topic_dir, id, mtime_ns, size, signature FROM signatures")
+        }
+        sigs = np.empty((len(entries), self.num_perm), dtype=np.uint32)
+        stale = []
+        for row, (topic_dir, node_id, path) in enumerate(entries):
+            try:
+                st = os.stat(path)
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = (0, 0)
+            hit = cached.get((topic_dir, node_id))
+            if hit is not None and hit[:2] == stamp:
+                sigs[row] = np.frombuffer(hit[2], dtype=np.uint32)
+            else:
+                stale.append((row, topic_dir, node_id, path, stamp))
+
+        def compute(item):
+            path = item[3]
+            text = ""
+            if item[4] != (0, 0):
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            return self.signature(text)
+
+        updates = []
+        for item, sig in zip(stale, map_fn(compute, stale)):
+            row, topic_dir, node_id, _, (mtime_ns, size) = item
+            sigs[row] = sig
+            updates.append((topic_dir, node_id, mtime_ns, size, sig.tobytes()))
+
+        live = {(t, i) for t, i, _ in entries}
+        gone = [key for key in cached if key not in live] if prune else []
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO signatures (topic_dir, id, mtime_ns, size, signature) "
+                "VALUES (?, ?, ?, ?, ?)", updates)
+            self._conn.executemany("DELETE FROM signatures WHERE topic_dir = ? AND id = ?", gone)
+        return sigs, len(updates)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
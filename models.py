@@ -1,9 +1,9 @@
 # Sacred Essence Data Models
 
 from enum import Enum
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields, asdict
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 import json
 
 class NodeState(str, Enum):
@@ -61,7 +61,15 @@ class MemoryNode:
 
     def to_dict(self) -> Dict[str, Any]:
         """Serialize to dictionary."""
-        data = asdict(self)
+        return self._encode(asdict(self))
+
+    def metadata_dict(self) -> Dict[str, Any]:
+        """Serialize what node.meta.json stores (everything but the embedding)."""
+        data = self.to_dict()
+        data.pop('embedding', None)
+        return data
+
+    def _encode(self, data: Dict[str, Any]) -> Dict[str, Any]:
         data.pop('is_dirty', None)  # Don't serialize transient tracking flag
         data['creation_date'] = self.creation_date.isoformat()
         data['last_access_date'] = self.last_access_date.isoformat()
@@ -83,3 +91,66 @@ class MemoryNode:
         filtered_data = {k: v for k, v in data.items() if k in valid_fields}
         
         return cls(**filtered_data)
+
+
+# Fields of LazyMemoryNode that are read from disk on first access.
+# `content` (the L2 text) is not a dataclass field but is loaded the same way.
+LAZY_FIELDS = ("L0_abstract", "L1_overview", "embedding", "content")
+_LAZY_DEFAULTS = {"L0_abstract": "", "L1_overview": "", "embedding": None, "content": ""}
+
+
+def _lazy_property(name: str) -> property:
+    def getter(self):
+        values = self.__dict__["_lazy_values"]
+        if name not in values:
+            loader = self.__dict__.get("_loader")
+            values[name] = loader(self, name) if loader else _LAZY_DEFAULTS[name]
+        return values[name]
+
+    def setter(self, value):
+        self.__dict__["_lazy_values"][name] = value
+
+    return property(getter, setter)
+
+
+class LazyMemoryNode(MemoryNode):
+    """
+    MemoryNode hydrated from metadata only.
+    L0/L1/L2 text and the embedding are pulled through `loader(node, field)`
+    the first time they are accessed, so scans that only need state, counters
+    and dates never open the per-node content files.
+    """
+    L0_abstract = _lazy_property("L0_abstract")
+    L1_overview = _lazy_property("L1_overview")
+    embedding = _lazy_property("embedding")
+    content = _lazy_property("content")
+
+    def __init__(self, *args, loader: Optional[Callable[['LazyMemoryNode', str], Any]] = None, **kwargs):
+        self.__dict__["_lazy_values"] = {}
+        super().__init__(*args, **kwargs)
+        # Drop the dataclass defaults set by __init__; keep explicitly passed values.
+        self.__dict__["_lazy_values"] = {
+            k: v for k, v in self.__dict__["_lazy_values"].items() if k in kwargs
+        }
+        self.__dict__["_loader"] = loader
+
+    def bind_loader(self, loader: Callable[['LazyMemoryNode', str], Any]) -> 'LazyMemoryNode':
+        self.__dict__["_loader"] = loader
+        return self
+
+    def is_loaded(self, name: str) -> bool:
+        """Whether a lazy field has already been read from disk (or assigned)."""
+        return name in self.__dict__["_lazy_values"]
+
+    def metadata_dict(self) -> Dict[str, Any]:
+        """
+        Like MemoryNode.metadata_dict, but never loads anything: L0/L1 that
+        were not read are left out (L0.md / L1.md remain their source).
+        """
+        values = self.__dict__["_lazy_values"]
+        data = {
+            f.name: values[f.name] if f.name in LAZY_FIELDS else getattr(self, f.name)
+            for f in fields(self)
+            if f.name != "embedding" and (f.name not in LAZY_FIELDS or f.name in values)
+        }
+        return self._encode(data)
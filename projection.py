@@ -1,19 +1,247 @@
 # Sacred Essence v3.1 Projection System
 
-from typing import List, Dict
-from models import MemoryNode, NodeState
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Hashable, Iterator, Optional, Sequence, Tuple
+from models import MemoryNode
 from storage import MemoryStore
-from algorithms import calculate_importance
+from config import PROJECTION_CACHE_SIZE, PROJECTION_CACHE_TTL, PROJECTION_MAX_TOKENS
+
+SECTIONS = ("core", "siblings", "golden")  # render order = budget priority
+HEADINGS = {"core": "--- TARGET CORE ---", "siblings": "\n--- RELATED SIBLINGS ---", "golden": "\n--- GLOBAL ANCHORS ---"}
+# Where the L0 abstract / L1 overview start inside a rendered entry (see ProjectionEngine._context)
+L0_MARK = "\nAbstract: "
+L1_MARK = "\nOverview: "
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~1.5 characters per token for mixed CJK / English)."""
+    return math.ceil(len(text) / 1.5)
+
+
+class ContextRenderer:
+    """
+    Streams a context mask chunk by chunk within a token budget.
+
+    The budget counts every chunk with `tokenizer`. Headings always go out.
+    Entries are filled core -> siblings -> golden. An entry that does not
+    fit is cut back at its L1 boundary (drop the overview), then at its L0
+    boundary (drop the abstract, keep the title line). If even that does
+    not fit, it is left out and later, shorter entries may still fit.
+    After iterating, `tokens`, `truncated` and `omitted` describe the render.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, tokenizer: Callable[[str], int] = estimate_tokens):
+        self.max_tokens = max_tokens
+        self.tokenizer = tokenizer
+        self.tokens = 0
+        self.truncated = 0
+        self.omitted = 0
+
+    @staticmethod
+    def _cuts(entry: str) -> Iterator[str]:
+        """The entry, then its shorter versions cut at the L1 and L0 boundaries."""
+        yield entry
+        l0 = entry.find(L0_MARK)
+        l1 = entry.find(L1_MARK, max(l0, 0))
+        if l1 > 0:
+            yield entry[:l1]
+        if l0 > 0:
+            yield entry[:l0]
+
+    def iter_chunks(self, context: Dict[str, List[str]]) -> Iterator[str]:
+        self.tokens = self.truncated = self.omitted = 0
+        chunks = ["=== CONTEXT MASK ==="] + ["\n" + HEADINGS[section] for section in SECTIONS]
+        remaining = None
+        if self.max_tokens is not None:
+            remaining = self.max_tokens - sum(self.tokenizer(chunk) for chunk in chunks)
+
+        yield chunks[0]
+        self.tokens += self.tokenizer(chunks[0])
+        for section, heading in zip(SECTIONS, chunks[1:]):
+            yield heading
+            self.tokens += self.tokenizer(heading)
+            for entry in context.get(section, []):
+                for i, cut in enumerate(self._cuts(entry)):
+                    chunk = "\n" + cut
+                    cost = self.tokenizer(chunk)
+                    if remaining is None or cost <= remaining:
+                        if remaining is not None:
+                            remaining -= cost
+                        self.truncated += i > 0
+                        self.tokens += cost
+                        yield chunk
+                        break
+                else:
+                    self.omitted += 1
+
+
+class ProjectionCache:
+    """
+    LRU cache of projected contexts.
+
+    Entries remember the store generation they were built at and expire
+    after `ttl` seconds (importance scores drift with time). A lookup
+    whose generation no longer matches counts as an invalidation.
+    """
+
+    def __init__(self, max_entries: int = PROJECTION_CACHE_SIZE, ttl: float = PROJECTION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, generation: Any) -> Optional[Dict[str, List[str]]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            built_at, expires, context = entry
+            if built_at == generation and time.monotonic() < expires:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return {section: list(items) for section, items in context.items()}
+            del self._entries[key]
+            self.invalidations += 1
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, generation: Any, context: Dict[str, List[str]]):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (generation, time.monotonic() + self.ttl,
+                              {section: list(items) for section, items in context.items()})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
 
 class ProjectionEngine:
-    def __init__(self, store: MemoryStore):
+    def __init__(self, store: MemoryStore, cache_size: int = PROJECTION_CACHE_SIZE,
+                 cache_ttl: float = PROJECTION_CACHE_TTL, tokenizer: Callable[[str], int] = estimate_tokens):
         self.store = store
+        self.cache = ProjectionCache(cache_size, cache_ttl)
+        self.tokenizer = tokenizer  # text -> token count, used for every token budget
 
-    def project_context(self, topic: str, target_id: str) -> Dict[str, List[str]]:
+    def project_context(self, topic: str, target_id: str, max_siblings: int = 5,
+                        max_golden: int = 10, use_cache: bool = True, semantic: bool = False) -> Dict[str, List[str]]:
         """
         Generate Context Mask based on v3.1 Protocol.
         Returns dictionary with keys: 'core', 'siblings', 'ancestors', 'golden'.
+
+        semantic: pick siblings by similarity to the target blended with
+        importance (MemoryStore.semantic_siblings) instead of importance alone.
+
+        Results are cached per (topic, target, options) until the store
+        generation changes (any save/trash) or the cache TTL passes.
         """
+        if not use_cache:
+            return self._project(topic, target_id, max_siblings, max_golden, semantic)
+        key = (topic, target_id, max_siblings, max_golden, semantic)
+        generation = self.store.generation
+        context = self.cache.get(key, generation)
+        if context is None:
+            context = self._project(topic, target_id, max_siblings, max_golden, semantic)
+            self.cache.put(key, generation, context)
+        return context
+
+    def project_many(self, targets: Sequence[Tuple[str, str]], max_siblings: int = 5, max_golden: int = 10,
+                     max_tokens: Optional[int] = PROJECTION_MAX_TOKENS, use_cache: bool = True,
+                     semantic: bool = False) -> Dict[str, Any]:
+        """
+        Project contexts for many (topic, target_id) pairs in one pass.
+
+        Global anchors are ranked once for all targets, and sibling rankings
+        once per topic (semantic siblings are chosen per target, sharing the
+        topic's cached columns). Returns:
+        - contexts: one context dict per target, in input order (the same
+          dicts `project_context` would return, and shared with its cache)
+        - rendered: one combined render with duplicate entries removed,
+          filled core -> siblings -> golden within `max_tokens` (None = no limit)
+        - tokens / truncated / omitted: size of the render, entries cut back or left out
+        """
+        contexts: List[Optional[Dict[str, List[str]]]] = [None] * len(targets)
+        generation = self.store.generation
+        missing = []
+        for i, (topic, target_id) in enumerate(targets):
+            key = (topic, target_id, max_siblings, max_golden, semantic)
+            if use_cache:
+                contexts[i] = self.cache.get(key, generation)
+            if contexts[i] is None:
+                missing.append(i)
+
+        if missing:
+            now = datetime.now()
+            loaded = {i: self.store.load_node(*targets[i]) for i in missing}
+            found = [i for i in missing if loaded[i] is not None]
+            # Each target can push at most one entry out of a shared ranking
+            golden = self.store.top_golden(max_golden + len(found), current_date=now) if found else []
+            by_topic: Dict[str, List[int]] = {}
+            for i in found:
+                by_topic.setdefault(loaded[i].topic, []).append(i)
+            for topic, members in by_topic.items():
+                if not semantic:
+                    ranked = self.store.top_in_topic(topic, max_siblings + len(members), current_date=now)
+                for i in members:
+                    target = loaded[i]
+                    if semantic:
+                        siblings = self.store.semantic_siblings(target, max_siblings, current_date=now)
+                    else:
+                        siblings = [(n, s) for n, s in ranked if n.id != target.id][:max_siblings]
+                    anchors = [(n, s) for n, s in golden if n.id != target.id][:max_golden]
+                    contexts[i] = self._context(target, siblings, anchors)
+            for i in missing:
+                if contexts[i] is None:
+                    contexts[i] = self._context(None, [], [])
+                if use_cache:
+                    topic, target_id = targets[i]
+                    self.cache.put((topic, target_id, max_siblings, max_golden, semantic), generation, contexts[i])
+
+        merged = {section: [] for section in SECTIONS}
+        seen = set()
+        for context in contexts:
+            for section in SECTIONS:
+                for entry in context[section]:
+                    if entry not in seen:
+                        seen.add(entry)
+                        merged[section].append(entry)
+        renderer = ContextRenderer(max_tokens, self.tokenizer)
+        rendered = "".join(renderer.iter_chunks(merged))
+        return {"contexts": contexts, "rendered": rendered, "tokens": renderer.tokens,
+                "truncated": renderer.truncated, "omitted": renderer.omitted}
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    def _project(self, topic: str, target_id: str, max_siblings: int, max_golden: int,
+                 semantic: bool = False) -> Dict[str, List[str]]:
+        target = self.store.load_node(topic, target_id)
+        if not target:
+            return self._context(None, [], [])
+        if semantic:
+            siblings = self.store.semantic_siblings(target, max_siblings)
+        else:
+            siblings = self.store.top_siblings(target, max_siblings)
+        golden = self.store.top_golden(max_golden, exclude_id=target_id)
+        return self._context(target, siblings, golden)
+
+    def _context(self, target: Optional[MemoryNode], siblings: List[Tuple[MemoryNode, float]],
+                 golden: List[Tuple[MemoryNode, float]]) -> Dict[str, List[str]]:
         context = {
             "core": [],
             "siblings": [],
@@ -24,65 +252,37 @@ class ProjectionEngine:
         }
         
         # 1. Target (Core)
-        target = self.store.load_node(topic, target_id)
         if target:
             # Full L1 + L0
             # If we had L1 content loaded:
-            core_content = f"Title: {target.title}\nTopic: {target.topic}\nAbstract: {target.L0_abstract}\nOverview: {target.L1_overview}"
+            core_content = f"Title: {target.title}\nTopic: {target.topic}{L0_MARK}{target.L0_abstract}{L1_MARK}{target.L1_overview}"
             context["core"].append(core_content)
         else:
             return context # Empty if target not found
             
         # 2. Siblings (Neighbors)
-        # Rule: Top 5 by Current Score
-        all_siblings = self.store.get_siblings(target)
-        # Calculate current importance for sorting
-        scored_siblings = []
-        for sib in all_siblings:
-            score = calculate_importance(sib)
-            scored_siblings.append((sib, score))
-            
-        scored_siblings.sort(key=lambda x: x[1], reverse=True)
-        top_siblings = scored_siblings[:5]
-        
-        for sib, score in top_siblings:
+        # Rule: Top 5 by Current Score (ranked from the catalog; only the winners are loaded)
+        for sib, score in siblings:
             # Only L0 for siblings
-            content = f"Sibling: {sib.title} (Score: {score:.2f})\nAbstract: {sib.L0_abstract}"
+            content = f"Sibling: {sib.title} (Score: {score:.2f}){L0_MARK}{sib.L0_abstract}"
             context["siblings"].append(content)
             
         # 3. Global Golden (Ancestors/Roots)
-        # We fetch all Golden nodes
-        all_nodes = self.store.list_nodes()
-        golden_nodes = [n for n in all_nodes if n.state == NodeState.GOLDEN and n.id != target_id]
-        
-        # Limit Golden to max 10 (as per formula example "Max 10")
-        # Sort by importance or access? Usually importance.
-        scored_golden = []
-        for g in golden_nodes:
-            score = calculate_importance(g)
-            scored_golden.append((g, score))
-            
-        scored_golden.sort(key=lambda x: x[1], reverse=True)
-        top_golden = scored_golden[:10]
-        
-        for g, score in top_golden:
-            content = f"Global: {g.title}\nAbstract: {g.L0_abstract}"
+        # Limit Golden to max 10 (as per formula example "Max 10"), by importance
+        for g, score in golden:
+            content = f"Global: {g.title}{L0_MARK}{g.L0_abstract}"
             context["golden"].append(content)
             
         return context
 
-    def render_context(self, context: Dict[str, List[str]]) -> str:
-        """Render context to string for LLM injection."""
-        output = []
-        output.append("=== CONTEXT MASK ===")
-        
-        output.append("--- TARGET CORE ---")
-        output.extend(context["core"])
-        
-        output.append("\n--- RELATED SIBLINGS ---")
-        output.extend(context["siblings"])
-        
-        output.append("\n--- GLOBAL ANCHORS ---")
-        output.extend(context["golden"])
-        
-        return "\n".join(output)
+    def render_context(self, context: Dict[str, List[str]], max_tokens: Optional[int] = None) -> str:
+        """Render context to string for LLM injection (within `max_tokens`, if given)."""
+        return "".join(self.iter_render(context, max_tokens))
+
+    def iter_render(self, context: Dict[str, List[str]], max_tokens: Optional[int] = None) -> Iterator[str]:
+        """
+        Stream the rendered context chunk by chunk (headings, then one chunk
+        per entry), so a large mask can be written straight to the LLM client.
+        Joined, the chunks equal `render_context(context, max_tokens)`.
+        """
+        return ContextRenderer(max_tokens, self.tokenizer).iter_chunks(context)
@@ -6,11 +6,14 @@ import subprocess
 import json
 import os
 import re
-from typing import List, Dict, Optional, Tuple, Set
+from typing import List, Dict, Optional, Sequence, Tuple, Set
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+# 舊版鏡像檔 [TOPIC]_[NODE_ID]_[HASH].md 的雜湊後綴
+_HASH_SUFFIX = re.compile(r"[0-9a-fA-F]+")
+
 @dataclass
 class QMDContext:
     """QMD 上下文綁定資訊"""
@@ -388,29 +391,44 @@ class QMDBridge:
         
         return success
     
-    def delete_node(self, node_id: str) -> bool:
-        """從 QMD 中刪除特定節點 (防禦『資料幽靈』)"""
-        # QMD CLI 刪除指令 (假設支援 qmd delete <node_id> 或透過移除原檔後 update)
-        # 由於原始碼使用 `--mask *.md` 載入 temp_dir，刪除策略為：
-        # 將該檔案從 collection 中移除並 update
-        # 若 qmd 支援: qmd collection remove-doc -c <name> <doc_id>
-        print(f"🗑️  正在從 QMD 中移除幽靈節點: {node_id}")
-        
-        # 備用方案：找到含有該 node_id 的 cache file 並刪除，然後重新 update
+    def delete_node(self, node_id: str, topic: Optional[str] = None) -> bool:
+        """從 QMD 中刪除特定節點 (防禦『資料幽靈』)；未指定 topic 時比對任何主題下的該 node_id"""
+        return self.delete_nodes([(topic, node_id)]) > 0
+
+    def delete_nodes(self, nodes: Sequence[Tuple[Optional[str], str]]) -> int:
+        """
+        批次刪除 (topic, node_id)：先移除所有節點的鏡像檔，再只執行一次 update + embed。
+        GC 一次清掉數百個 DUST 節點時，避免每個節點各跑兩次 QMD 子程序。
+        只比對本橋接器寫出的確切檔名，不會誤刪其他主題或節點的鏡像檔；
+        topic 為 None 時沿用舊行為，刪除任何主題下該 node_id 的鏡像檔。
+        回傳移除的鏡像檔數量。
+        """
+        names = {f"{topic}_{node_id}" for topic, node_id in nodes if topic is not None}
+        any_topic = {node_id for topic, node_id in nodes if topic is None}
+        if not names and not any_topic:
+            return 0
+        print(f"🗑️  正在從 QMD 中移除 {len(names) + len(any_topic)} 個幽靈節點")
+
+        def wanted(stem: str) -> bool:
+            return stem in names or stem.rpartition("_")[2] in any_topic
+
+        # 由於 collection 以 `--mask *.md` 載入 temp_dir，刪除策略為移除鏡像檔後 update
+        # 鏡像檔命名：[TOPIC]_[NODE_ID].md，舊版為 [TOPIC]_[NODE_ID]_[HASH].md
         temp_dir = Path.home() / ".cache" / "sacred-essence" / "qmd-sync"
         deleted_files = 0
         if temp_dir.exists():
-            for f in temp_dir.glob(f"*_{node_id}_*.md"):
-                f.unlink()
-                deleted_files += 1
-                
+            for f in temp_dir.glob("*.md"):
+                base, _, suffix = f.stem.rpartition("_")
+                if wanted(f.stem) or (wanted(base) and _HASH_SUFFIX.fullmatch(suffix)):
+                    f.unlink()
+                    deleted_files += 1
+
         if deleted_files > 0 and self.collection_exists():
             # 重新更新索引，被刪除的檔案就會從 QMD 消失
             success, _ = self._run_qmd(["update"])
             if success:
                 self._run_qmd(["embed", "-f"])
-                return True
-        return False
+        return deleted_files
     
     def _is_node_synced(self, node_id: str, content: str) -> bool:
         """檢查節點是否已同步且內容未變"""
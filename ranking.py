@@ -0,0 +1,156 @@
+# Sacred Essence Ranking Index
+# 重要度排行索引：GOLDEN 成員集合 + 各主題 top-k 快取，投影時不再全量載入與排序
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import GRACE_PERIOD_DAYS
+from models import NodeState
+from algorithms import calculate_importance_batch, top_k_indices
+
+Key = Tuple[str, str]  # (topic_dir, id)
+_DAY = np.timedelta64(86_400_000_000, 'us')
+_GOLDEN_SCOPE = "\0golden"
+
+
+def next_score_change(creation: np.ndarray, last_access: np.ndarray, now: datetime) -> np.datetime64:
+    """
+    Earliest moment after `now` at which any of these nodes' importance can
+    change: scores only move when a node's whole days since last access
+    tick over, or when its grace period ends.
+    """
+    if not len(creation):
+        return np.datetime64('NaT')
+    now64 = np.datetime64(now, 'us')
+    unused = np.maximum((now64 - last_access) // _DAY, 0)
+    ticks = last_access + (unused + 1) * _DAY
+    grace_end = creation + (GRACE_PERIOD_DAYS + 1) * _DAY
+    ticks = np.where(grace_end > now64, np.minimum(ticks, grace_end), ticks)
+    return ticks.min()
+
+
+class RankingIndex:
+    """
+    Top-k importance rankings of a NodeCatalog, kept between writes.
+
+    - GOLDEN membership: an in-memory set of (topic_dir, id), loaded with
+      the golden columns and maintained by the owning MemoryStore on every
+      save/trash, so only writes that touch a golden node (or make one)
+      drop the golden ranking.
+    - Rankings: the top-k of a topic (or of the golden set) with the
+      moment it stops being valid. Scores only decay, so nodes outside a
+      top-k can never overtake it. The ranking therefore holds until the
+      first score change among its own members (`next_score_change`), or
+      until a write to its topic or to the golden set drops it.
+    - Columns: each topic's scoring columns, dropped with its rankings, so
+      full-topic scoring (semantic siblings) skips the catalog query.
+
+    Writes by other processes are detected through the catalog's SQLite
+    data_version and reset everything.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._golden: Optional[Set[Key]] = None
+        self._rankings: Dict[Tuple[str, int], Tuple[datetime, np.datetime64, List[Tuple[str, str, float]]]] = {}
+        self._columns: Dict[str, Dict[str, Any]] = {}
+        self._data_version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- maintenance (called by MemoryStore) ----------
+
+    def _check_external_writes(self):
+        version = self.catalog.data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self._golden = None
+            self._rankings.clear()
+            self._columns.clear()
+
+    def golden_members(self) -> Set[Key]:
+        self._check_external_writes()
+        if self._golden is None:
+            self.columns(None)
+        return self._golden
+
+    def _drop(self, scope: str):
+        for key in [key for key in self._rankings if key[0] == scope]:
+            del self._rankings[key]
+        self._columns.pop(scope, None)
+
+    def note_saved(self, topic_dir: str, node_id: str, state: NodeState):
+        """A node was written: refresh membership and drop the rankings it may appear in."""
+        self._drop(topic_dir)
+        if self._golden is None:
+            self._drop(_GOLDEN_SCOPE)
+            return
+        key = (topic_dir, node_id)
+        was_golden = key in self._golden
+        if state == NodeState.GOLDEN:
+            self._golden.add(key)
+        else:
+            self._golden.discard(key)
+        if was_golden or state == NodeState.GOLDEN:
+            self._drop(_GOLDEN_SCOPE)
+
+    def note_removed(self, topic_dir: str, node_id: str):
+        self.note_saved(topic_dir, node_id, NodeState.DUST)
+
+    def reset(self):
+        self._golden = None
+        self._rankings.clear()
+        self._columns.clear()
+
+    # ---------- queries ----------
+
+    def columns(self, topic_dir: Optional[str]) -> Dict[str, Any]:
+        """
+        Scoring columns (NodeCatalog.score_columns) of `topic_dir`, or of the
+        GOLDEN set when None; kept until a write to that scope.
+        """
+        self._check_external_writes()
+        scope = _GOLDEN_SCOPE if topic_dir is None else topic_dir
+        cols = self._columns.get(scope)
+        if cols is None:
+            if topic_dir is None:
+                cols = self.catalog.score_columns(state=NodeState.GOLDEN.value)
+                self._golden = set(zip(cols["topic_dir"], cols["id"]))
+            else:
+                cols = self.catalog.score_columns(topic_dir=topic_dir)
+            self._columns[scope] = cols
+        return cols
+
+    def scores(self, topic_dir: Optional[str], current_date: Optional[datetime] = None) -> Tuple[Dict[str, Any], np.ndarray]:
+        """(columns, importance of every row at `current_date`) of a topic or of the GOLDEN set."""
+        cols = self.columns(topic_dir)
+        return cols, calculate_importance_batch(
+            cols["creation_date"], cols["last_access_date"], cols["stability_factor"],
+            cols["access_count"], cols["retrieval_count"], current_date or datetime.now(),
+        )
+
+    def top(self, topic_dir: Optional[str], k: int,
+            current_date: Optional[datetime] = None) -> List[Tuple[str, str, float]]:
+        """
+        The k most important nodes of `topic_dir`, or of the GOLDEN set when
+        `topic_dir` is None: [(topic_dir, id, score)], best first, ties by key.
+        """
+        self._check_external_writes()
+        now = current_date or datetime.now()
+        scope = _GOLDEN_SCOPE if topic_dir is None else topic_dir
+        cached = self._rankings.get((scope, k))
+        if cached is not None:
+            computed_at, valid_until, ranking = cached
+            if computed_at <= now and (np.isnat(valid_until) or np.datetime64(now, 'us') < valid_until):
+                self.hits += 1
+                return ranking
+        self.misses += 1
+
+        cols, scores = self.scores(topic_dir, now)
+        best = top_k_indices(scores, k)
+        ranking = [(cols["topic_dir"][i], cols["id"][i], float(scores[i])) for i in best]
+        valid_until = next_score_change(cols["creation_date"][best], cols["last_access_date"][best], now)
+        self._rankings[(scope, k)] = (now, valid_until, ranking)
+        return ranking
@@ -0,0 +1,201 @@
+# Sacred Essence Maintenance Scheduler
+# 背景維護排程：定期執行 GC / 垃圾桶清理 / QMD 審計與同步，限制 I/O 速率並在代理忙碌時退讓
+
+import os
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import (
+    SCHEDULER_INTERVALS,
+    SCHEDULER_MAX_FILES_PER_SECOND,
+    SCHEDULER_NICE,
+    SCHEDULER_IDLE_SECONDS,
+    SCHEDULER_POLL_SECONDS,
+    SCHEDULER_GC_SLICE_SECONDS,
+    GC_BATCH_SIZE,
+)
+from storage import MemoryStore
+from maintenance import MaintenanceManager
+
+TASKS = ("gc", "trash", "audit", "sync")
+
+
+class MaintenanceScheduler:
+    """
+    Runs the maintenance tasks of a MemoryStore on fixed intervals.
+
+    - gc: incremental GC (`run_incremental_gc`) in batches, paced to
+      `max_files_per_second`. Each wake-up spends at most `gc_slice_seconds`
+      on it, and an unfinished pass stays due and resumes from its checkpoint.
+    - trash: `_clean_trash`. audit / sync: the QMD bridge.
+
+    Before each task and between GC batches the scheduler checks the
+    store's activity marker (touched by encode/search). While it is younger
+    than `idle_seconds` the scheduler backs off. Every task starts from
+    freshly loaded indexes (`store.refresh_indexes()`). Per-task timings and
+    results go to `scheduler_status.json` in the memory directory. Last-run
+    times are read back from it on restart, so a restart does not rerun
+    everything.
+    """
+
+    def __init__(self, store: MemoryStore, intervals: Optional[Dict[str, float]] = None,
+                 max_files_per_second: float = SCHEDULER_MAX_FILES_PER_SECOND,
+                 idle_seconds: float = SCHEDULER_IDLE_SECONDS,
+                 gc_slice_seconds: float = SCHEDULER_GC_SLICE_SECONDS,
+                 gc_batch_size: int = GC_BATCH_SIZE,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.store = store
+        self.maintenance = MaintenanceManager(store)
+        self.intervals = dict(SCHEDULER_INTERVALS, **(intervals or {}))
+        self.max_files_per_second = max_files_per_second
+        self.idle_seconds = idle_seconds
+        self.gc_slice_seconds = gc_slice_seconds
+        self.gc_batch_size = gc_batch_size
+        self.clock = clock
+        self.sleep = sleep
+        self.status_path = os.path.join(store.memory_dir, "scheduler_status.json")
+        self.status = self._load_status()
+        self._paced_files = 0
+        self._paced_since = 0.0
+
+    # ---------- status ----------
+
+    def _load_status(self) -> Dict[str, Any]:
+        try:
+            with open(self.status_path, 'r', encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            status = {}
+        status.setdefault("tasks", {})
+        for name in TASKS:
+            status["tasks"].setdefault(name, {"runs": 0, "last_run": None})
+        return status
+
+    def _save_status(self, state: str):
+        self.status.update(pid=os.getpid(), state=state, updated=self._iso(self.clock()))
+        self.status["next_due"] = {
+            name: self._iso(due) for name, due in ((n, self.next_due(n)) for n in TASKS) if due is not None
+        }
+        tmp = self.status_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.status, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp, self.status_path)
+
+    @staticmethod
+    def _iso(ts: float) -> str:
+        return datetime.fromtimestamp(ts).isoformat(timespec="seconds")
+
+    # ---------- scheduling ----------
+
+    def next_due(self, name: str) -> Optional[float]:
+        """Epoch seconds when `name` is next due (None = disabled)."""
+        interval = self.intervals.get(name) or 0
+        if interval <= 0:
+            return None
+        task = self.status["tasks"][name]
+        if task.get("pending"):  # unfinished GC pass: resume right away
+            return 0.0
+        return (task.get("last_run") or 0.0) + interval
+
+    def due_tasks(self) -> List[str]:
+        now = self.clock()
+        return [name for name in TASKS if self.next_due(name) is not None and self.next_due(name) <= now]
+
+    def busy(self) -> bool:
+        since = self.store.seconds_since_activity()
+        return since is not None and since < self.idle_seconds
+
+    def _pace(self, files: int):
+        """Sleep as needed to keep the work since the task started within the files/s budget."""
+        if self.max_files_per_second <= 0 or files <= 0:
+            return
+        self._paced_files += files
+        ahead = self._paced_files / self.max_files_per_second - (self.clock() - self._paced_since)
+        if ahead > 0:
+            self.sleep(ahead)
+
+    def run_pending(self) -> List[str]:
+        """Run every due task once (unless the agent is busy). Returns the tasks that ran."""
+        ran, state = [], "idle"
+        for name in self.due_tasks():
+            if self.busy():
+                state = "backing off"
+                break
+            self._run_task(name)
+            ran.append(name)
+        self._save_status(state)
+        return ran
+
+    def run_forever(self, poll_seconds: float = SCHEDULER_POLL_SECONDS, nice: int = SCHEDULER_NICE):
+        if nice and hasattr(os, "nice"):
+            os.nice(nice)
+        print(f"🕰️  Maintenance scheduler started (pid {os.getpid()}, status: {self.status_path})")
+        try:
+            while True:
+                self.run_pending()
+                self.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            self._save_status("stopped")
+
+    # ---------- tasks ----------
+
+    def _run_task(self, name: str):
+        task = self.status["tasks"][name]
+        started = self.clock()
+        self._paced_files, self._paced_since = 0, started
+        task["last_start"] = self._iso(started)
+        self._save_status(f"running {name}")
+        # encode / reembed in other processes write the embedding store while the daemon runs
+        self.store.refresh_indexes()
+        try:
+            result, finished = getattr(self, f"_task_{name}")()
+            task["error"] = None
+        except Exception as e:
+            result, finished = None, True
+            task["error"] = str(e)
+            print(f"⚠️  Scheduled {name} failed: {e}")
+        ended = self.clock()
+        task.update(result=result, duration_seconds=round(ended - started, 3), last_end=self._iso(ended),
+                    runs=task.get("runs", 0) + 1, pending=not finished)
+        if finished:
+            task["last_run"] = ended
+
+    def _task_gc(self):
+        deadline = self.clock() + self.gc_slice_seconds
+        while True:
+            report = self.maintenance.run_incremental_gc(batch_size=self.gc_batch_size,
+                                                         max_nodes=self.gc_batch_size)
+            self._pace(report["processed"])
+            if report["complete"] or report.get("safety_net"):
+                return report, True
+            if self.clock() >= deadline or self.busy():
+                return report, False
+
+    def _task_trash(self):
+        cleaned = self.maintenance._clean_trash()
+        self._pace(cleaned)
+        return {"cleaned_trash": cleaned}, True
+
+    def _qmd_bridge(self):
+        from qmd_bridge import QMDBridge
+        return QMDBridge("sacred-l2", memory_dir=os.path.join(self.store.memory_dir, "topics"))
+
+    def _task_audit(self):
+        audit = self._qmd_bridge().audit_and_cleanup(dry_run=False)
+        return {"orphaned": len(audit["orphaned_in_qmd"]), "missing": len(audit["missing_in_qmd"]),
+                "actions": audit["actions_taken"]}, True
+
+    def _task_sync(self):
+        return {"synced": self._qmd_bridge().sync_from_sacred_essence()}, True
+
+
+def read_status(memory_dir: str) -> Optional[Dict[str, Any]]:
+    """The status file of the scheduler running on `memory_dir`, if any."""
+    try:
+        with open(os.path.join(memory_dir, "scheduler_status.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
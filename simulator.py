@@ -0,0 +1,134 @@
+# Sacred Essence Decay Simulator
+# 衰減時光機：以向量化評分逐日重播 GC 狀態機，預估未來各狀態節點數與磁碟用量（唯讀）
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import (
+    SOFT_CAP_GOLDEN,
+    THRESHOLD_SILVER,
+    THRESHOLD_DUST,
+    MIN_KEEP_NODES,
+    RETENTION_DAYS,
+)
+from models import NodeState
+from algorithms import calculate_importance_batch
+
+# State codes of the simulation arrays
+GOLDEN, SILVER, BRONZE, DUST = range(4)
+_CODES = {NodeState.GOLDEN.value: GOLDEN, NodeState.SILVER.value: SILVER,
+          NodeState.BRONZE.value: BRONZE, NodeState.DUST.value: DUST}
+
+
+def simulate_columns(
+    cols: Dict[str, Any],
+    days: int = 365,
+    start: Optional[datetime] = None,
+    file_bytes: Optional[np.ndarray] = None,
+    embedding_bytes: Optional[np.ndarray] = None,
+    stability: Optional[Dict[float, float]] = None,
+    threshold_silver: float = THRESHOLD_SILVER,
+    threshold_dust: float = THRESHOLD_DUST,
+    soft_cap_golden: int = SOFT_CAP_GOLDEN,
+    min_keep_nodes: int = MIN_KEEP_NODES,
+    retention_days: int = RETENTION_DAYS,
+) -> List[Dict[str, Any]]:
+    """
+    Replay a daily full GC (MaintenanceManager.run_garbage_collection) over
+    catalog columns (NodeCatalog.score_columns order) for `days` days.
+
+    Day 0 is a GC at `start`; every later day another GC one day on. The
+    simulation assumes no new nodes and no further accesses. `stability`
+    remaps stability factors ({old: new}), and the threshold/cap arguments
+    stand in for their config values, to preview tuning changes.
+
+    Returns one entry per day: state counts after that day's GC, the day's
+    transitions, and projected bytes of live nodes and of the trash (nodes
+    trashed during the simulation, freed after `retention_days`).
+    """
+    start = start or datetime.now()
+    n = len(cols["id"])
+    state = np.fromiter((_CODES[s] for s in cols["state"]), dtype=np.int8, count=n)
+    alive = np.ones(n, dtype=bool)
+    trashed_on = np.full(n, -1, dtype=np.int64)
+
+    s_factor = np.asarray(cols["stability_factor"], dtype=np.float64).copy()
+    for old, new in (stability or {}).items():
+        s_factor[np.isclose(cols["stability_factor"], old)] = new
+    last_access = cols["last_access_date"]
+    args = (cols["creation_date"], last_access, s_factor, cols["access_count"], cols["retrieval_count"])
+
+    history = []
+    for day in range(days + 1):
+        scores = calculate_importance_batch(*args, start + timedelta(days=day))
+        new = state.copy()
+        below_silver = scores < threshold_silver
+        below_dust = scores < threshold_dust
+
+        silver = alive & (state == SILVER)
+        new[silver & below_silver] = BRONZE
+        new[silver & below_dust] = DUST
+        new[alive & (state == BRONZE) & below_dust] = DUST
+        downgraded = int((silver & below_silver & ~below_dust).sum())
+
+        # Golden soft cap: demote the least recently accessed (stable, catalog order)
+        golden = np.flatnonzero(alive & (state == GOLDEN))
+        if len(golden) > soft_cap_golden:
+            excess = golden[np.argsort(last_access[golden], kind="stable")][:len(golden) - soft_cap_golden]
+            new[excess] = np.where(below_dust[excess], DUST, np.where(below_silver[excess], BRONZE, SILVER))
+            downgraded += int((~below_dust[excess]).sum())
+
+        dust = alive & (new == DUST)
+        marked = int((dust & (state != DUST)).sum())
+        safety_net = int(alive.sum()) - int(dust.sum()) < min_keep_nodes
+        if safety_net:
+            downgraded = marked = 0
+        else:
+            state = new
+            alive &= ~dust
+            trashed_on[dust] = day
+
+        live_states = state[alive]
+        history.append({
+            "day": day,
+            "date": (start + timedelta(days=day)).date().isoformat(),
+            "golden": int((live_states == GOLDEN).sum()),
+            "silver": int((live_states == SILVER).sum()),
+            "bronze": int((live_states == BRONZE).sum()),
+            "dust": int((live_states == DUST).sum()),
+            "downgraded_silver": downgraded,
+            "marked_dust": marked,
+            "trashed": 0 if safety_net else int(dust.sum()),
+            "safety_net": safety_net,
+        })
+
+    # Disk usage per day from the trash days (cumulative sums, no per-day scans)
+    files = np.zeros(n, dtype=np.int64) if file_bytes is None else np.asarray(file_bytes, dtype=np.int64)
+    vectors = np.zeros(n, dtype=np.int64) if embedding_bytes is None else np.asarray(embedding_bytes, dtype=np.int64)
+    gone = trashed_on >= 0
+    per_day_files = np.bincount(trashed_on[gone], weights=files[gone], minlength=days + 1)
+    per_day_all = np.bincount(trashed_on[gone], weights=(files + vectors)[gone], minlength=days + 1)
+    trashed_total = np.cumsum(per_day_all)
+    moved = np.cumsum(per_day_files)
+    # _clean_trash frees items older than retention_days whole days
+    freed = np.concatenate([np.zeros(retention_days + 1), moved])[:days + 1]
+    live_total = int(files.sum() + vectors.sum())
+    for entry, gone_bytes, in_trash in zip(history, trashed_total, moved - freed):
+        entry["live_bytes"] = live_total - int(gone_bytes)
+        entry["trash_bytes"] = int(in_trash)
+    return history
+
+
+def simulate_store(store, days: int = 365, start: Optional[datetime] = None,
+                   disk: bool = True, **overrides) -> List[Dict[str, Any]]:
+    """
+    Read-only decay forecast of a MemoryStore: catalog columns plus (with
+    `disk`) each node's on-disk footprint, fed to `simulate_columns`.
+    """
+    cols = store.catalog.score_columns()
+    file_bytes = embedding_bytes = None
+    if disk:
+        file_bytes, embedding_bytes = store.disk_footprint(cols["topic_dir"], cols["id"])
+    return simulate_columns(cols, days, start, file_bytes, embedding_bytes, **overrides)
@@ -4,79 +4,279 @@ import os
 import json
 import shutil
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Callable, Sequence, Any, Tuple
 from glob import glob
+from concurrent.futures import ThreadPoolExecutor
 
-from config import MEMORY_DIR, TRASH_DIR
-from models import MemoryNode, NodeState
+from config import (
+    MEMORY_DIR, TRASH_DIR, LOAD_WORKERS, ANN_NPROBE, ANN_MIN_TRAIN, EMBEDDING_PRECISION, EMBEDDING_MODEL,
+    MINHASH_PERMUTATIONS, MINHASH_BANDS, MINHASH_SHINGLE_BYTES, DEDUP_JACCARD_THRESHOLD,
+    PROJECTION_SEMANTIC_WEIGHT,
+)
+from models import MemoryNode, LazyMemoryNode, NodeState
+from catalog import NodeCatalog
+from embedding_store import EmbeddingStore, read_index, row_nbytes
+from ann_index import ANNIndex
+from minhash import MinHashIndex, duplicate_clusters
+from ranking import RankingIndex
+from algorithms import cosine_scores, top_k_indices
 
 class MemoryStore:
-    def __init__(self):
+    def __init__(self, memory_dir: Optional[str] = None, trash_dir: Optional[str] = None,
+                 lazy: bool = True, load_workers: Optional[int] = None):
+        self.memory_dir = memory_dir or MEMORY_DIR
+        self.trash_dir = trash_dir or TRASH_DIR
+        # Loading mode: lazy nodes hydrate only metadata and read L0/L1/L2/embedding on access
+        self.lazy = lazy
+        # Thread fan-out for file-bound loading (1 = serial)
+        self.load_workers = LOAD_WORKERS if load_workers is None else load_workers
+        self._catalog: Optional[NodeCatalog] = None
+        self._embeddings: Optional[EmbeddingStore] = None
+        self._ann: Optional[ANNIndex] = None
+        self._minhash: Optional[MinHashIndex] = None
+        self._rankings: Optional[RankingIndex] = None
+        self._alignments: Dict[str, Tuple[Any, Any, Any]] = {}  # topic_dir -> (topic mask, columns, column per row)
+        self._backend_warned = False
+        self._generation = 0  # bumped by every node or embedding write of this store object
         self._ensure_dirs()
 
+    @property
+    def generation(self) -> Tuple[int, int]:
+        """
+        Changes whenever any node changes: local writes (node files or
+        vectors) bump a counter and writes by other processes move the
+        catalog's SQLite data_version.
+        Caches derived from node data compare it to detect staleness.
+        """
+        return (self._generation, self.catalog.data_version())
+
+    def _note_write(self, topic: str, node_id: str, state: Optional[NodeState]):
+        """Bookkeeping after a node write (state None = removed): generation and rankings."""
+        self._generation += 1
+        if self._rankings is not None:
+            if state is None:
+                self._rankings.note_removed(self._topic_key(topic), node_id)
+            else:
+                self._rankings.note_saved(self._topic_key(topic), node_id, state)
+
+    @property
+    def rankings(self) -> RankingIndex:
+        """Golden membership and cached per-topic top-k importance rankings."""
+        if self._rankings is None:
+            self._rankings = RankingIndex(self.catalog)
+        return self._rankings
+
     def _ensure_dirs(self):
-        os.makedirs(MEMORY_DIR, exist_ok=True)
-        os.makedirs(os.path.join(MEMORY_DIR, "topics"), exist_ok=True)
-        os.makedirs(TRASH_DIR, exist_ok=True)
+        os.makedirs(self.memory_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.memory_dir, "topics"), exist_ok=True)
+        os.makedirs(self.trash_dir, exist_ok=True)
 
-    def _get_topic_dir(self, topic: str) -> str:
+    @property
+    def catalog(self) -> NodeCatalog:
+        """Node catalog index; (re)built from the node files when missing or outdated."""
+        if self._catalog is None:
+            self._catalog = NodeCatalog(os.path.join(self.memory_dir, "catalog.sqlite3")).open()
+            if self._catalog.created:
+                self.rebuild_index()
+        return self._catalog
+
+    @property
+    def embeddings(self) -> EmbeddingStore:
+        """Packed embedding matrix; legacy per-node embedding.npy files are migrated on first open."""
+        if self._embeddings is None:
+            emb_dir = os.path.join(self.memory_dir, "embeddings")
+            fresh = not os.path.exists(os.path.join(emb_dir, "index.json"))
+            self._embeddings = EmbeddingStore(emb_dir, precision=EMBEDDING_PRECISION)
+            if fresh:
+                self.migrate_embeddings()
+            if self._embeddings.backend is None and len(self._embeddings):
+                # Vectors from before backends were recorded could only come from the configured model
+                self._embeddings.set_backend(f"sentence-transformers:{EMBEDDING_MODEL}")
+        return self._embeddings
+
+    @property
+    def embedding_cache_path(self) -> str:
+        """Content-hash embedding cache of this store (see algorithms.get_embedding_cache)."""
+        return os.path.join(self.memory_dir, "embeddings", "embedding_cache.sqlite3")
+
+    @property
+    def embedding_backend(self) -> str:
+        """Id of the active embedder (see embedders.py)."""
+        from algorithms import get_embedder
+        return get_embedder().id
+
+    def embeddings_compatible(self) -> bool:
+        """True when the stored vectors come from the active backend (or none are stored)."""
+        stored = self.embeddings.backend
+        return stored is None or not len(self.embeddings) or stored == self.embedding_backend
+
+    def _warn_backend_mismatch(self):
+        if not self._backend_warned:
+            self._backend_warned = True
+            print(f"⚠️  Stored embeddings come from {self.embeddings.backend}, active backend is "
+                  f"{self.embedding_backend}; run 'python main.py reembed' to switch")
+
+    @property
+    def ann(self) -> ANNIndex:
+        """Approximate nearest-neighbour index over the packed embeddings (loaded on first query)."""
+        if self._ann is None:
+            path = os.path.join(self.memory_dir, "embeddings", "ann.npz")
+            self._ann = ANNIndex(self.embeddings, path, nprobe=ANN_NPROBE, min_train=ANN_MIN_TRAIN)
+        return self._ann
+
+    @property
+    def minhash(self) -> MinHashIndex:
+        """Sidecar MinHash signatures of every node's content.md."""
+        if self._minhash is None:
+            self._minhash = MinHashIndex(os.path.join(self.memory_dir, "minhash.sqlite3"),
+                                         num_perm=MINHASH_PERMUTATIONS,
+                                         shingle_bytes=MINHASH_SHINGLE_BYTES)
+        return self._minhash
+
+    def _put_embedding(self, key: str, vector: Sequence[float]) -> bool:
+        """Store a vector of the active backend; refused (False) while the store holds another backend's."""
+        store, active = self.embeddings, self.embedding_backend
+        if store.backend != active:
+            if len(store) and store.backend is not None:
+                self._warn_backend_mismatch()
+                return False
+            if len(store) or store.dim is not None:
+                store.reset(active)
+            else:
+                store.set_backend(active)
+        store.put(key, vector)
+        if self._ann is not None:
+            self._ann.add(store.row_of(key))
+        self._generation += 1  # semantic projections depend on the vectors
+        return True
+
+    def migrate_embeddings(self) -> int:
+        """Move per-node embedding.npy files into the packed matrix."""
+        import numpy as np
+        files = sorted(glob(os.path.join(self.memory_dir, "topics", "*", "*", "embedding.npy")))
+        if not files:
+            return 0
+        items, paths = [], {}
+        for emb_path in files:
+            parts = os.path.normpath(emb_path).split(os.sep)
+            key = f"{parts[-3]}/{parts[-2]}"
+            try:
+                items.append((key, np.load(emb_path)))
+                paths[key] = emb_path
+            except Exception as e:
+                print(f"Error loading {emb_path}: {e}")
+        store = self._embeddings if self._embeddings is not None else self.embeddings
+        migrated = store.import_legacy(items)
+        # Only files that made it into the store go; the rest stay for a later retry
+        for key in migrated:
+            os.remove(paths[key])
+        kept = len(files) - len(migrated)
+        print(f"📦 Migrated {len(migrated)} embeddings into the packed store"
+              + (f" (⚠️  {kept} legacy files kept; fix them and rerun migrate_embeddings())" if kept else ""))
+        return len(migrated)
+
+    def _embedding_key(self, topic: str, node_id: str) -> str:
+        return f"{self._topic_key(topic)}/{node_id}"
+
+    def _topic_key(self, topic: str) -> str:
         # Sanitize topic to prevent path traversal vulnerabilities
         import re
         safe_topic = re.sub(r'[^a-zA-Z0-9_\-]', '', topic)
         if not safe_topic:
             safe_topic = "general"
-        return os.path.join(MEMORY_DIR, "topics", safe_topic)
+        return safe_topic
+
+    def _get_topic_dir(self, topic: str) -> str:
+        return os.path.join(self.memory_dir, "topics", self._topic_key(topic))
 
     def _get_node_dir(self, topic: str, node_id: str) -> str:
         # Each node gets a directory to store L0/L1/L2 and metadata
         # Structure: memory/topics/{topic}/{node_id}/
         return os.path.join(self._get_topic_dir(topic), node_id)
 
-    def save_node(self, node: MemoryNode):
+    def save_node(self, node: MemoryNode, content: Optional[str] = None):
         """Save MemoryNode to disk (Metadata + Content)."""
         node_dir = self._get_node_dir(node.topic, node.id)
         os.makedirs(node_dir, exist_ok=True)
         
         # 1. Save Content (L2) - "The Sacred Text"
-        # Only if content_path is set or we want to overwrite it.
-        # For this logic, we assume content management is handled here via `node.content_path` check
-        # But typically we'd write the content string to a .md file
-        # Here we assume `node.content_path` points to a file that might be external, 
-        # OR we save it inside the node structure.
-        # Let's enforce saving content inside the node dir for encapsulation.
+        # The L2 text lives inside the node dir for encapsulation. It is only
+        # written when given (`content`, or assigned to a lazy node); metadata
+        # saves (access updates, GC transitions) leave content.md untouched.
         content_file = os.path.join(node_dir, "content.md")
-        with open(content_file, 'w', encoding='utf-8') as f:
-            # We don't have raw content in MemoryNode in models.py, 
-            # we have content_path.
-            # If we are creating a new node, we expect the content to be passed or handled.
-            # Let's assume the caller handles the content file creation, 
-            # and just points `node.content_path` to it.
-            # But wait, `node.content_path` is in the model.
-            # Let's update the model to reflect where it actually lives.
-            node.content_path = content_file
-            pass # We assume content is written by whoever created the node or we add a `content` arg
+        node.content_path = content_file
+        if content is None and isinstance(node, LazyMemoryNode) and node.is_loaded("content"):
+            content = node.content
+        if content is not None:
+            with open(content_file, 'w', encoding='utf-8') as f:
+                f.write(content)
         
-        # 2. Save Metadata
+        # Lazy nodes write back only the fields they loaded (or were assigned);
+        # untouched L0/L1 files and the stored vector stay as they are
+        def touched(name: str) -> bool:
+            return not isinstance(node, LazyMemoryNode) or node.is_loaded(name)
+
+        # 2. Save Metadata (embeddings live in the packed store, not in JSON)
         meta_file = os.path.join(node_dir, "node.meta.json")
+        meta = node.metadata_dict()
         with open(meta_file, 'w', encoding='utf-8') as f:
-            json.dump(node.to_dict(), f, indent=2, ensure_ascii=False)
+            json.dump(meta, f, indent=2, ensure_ascii=False)
             
         # 3. Save L0/L1 (Abstracts)
-        if node.L0_abstract:
+        if touched("L0_abstract") and node.L0_abstract:
             with open(os.path.join(node_dir, "L0.md"), 'w', encoding='utf-8') as f:
                 f.write(node.L0_abstract)
-        if node.L1_overview:
+        if touched("L1_overview") and node.L1_overview:
             with open(os.path.join(node_dir, "L1.md"), 'w', encoding='utf-8') as f:
                 f.write(node.L1_overview)
 
-        # 4. Save Embedding (if exists)
-        if node.embedding:
-            import numpy as np
-            emb_path = os.path.join(node_dir, "embedding.npy")
-            np.save(emb_path, np.array(node.embedding))
+        # 4. Keep the catalog index in sync
+        self.catalog.upsert(self._topic_key(node.topic), node)
+        self._note_write(node.topic, node.id, node.state)
+
+        # 5. Save Embedding (if exists) into the packed matrix
+        if touched("embedding") and node.embedding is not None and len(node.embedding):
+            self._put_embedding(self._embedding_key(node.topic, node.id), node.embedding)
+
+    def _load_lazy_field(self, node: MemoryNode, name: str):
+        """Read one on-demand field (L0/L1/L2 text or embedding) of a node from disk."""
+        if name == "embedding":
+            return self.load_embedding(node)
+        node_dir = self._get_node_dir(node.topic, node.id)
+        filename = {"L0_abstract": "L0.md", "L1_overview": "L1.md", "content": "content.md"}[name]
+        path = os.path.join(node_dir, filename)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        return ""
+
+    def load_embedding(self, node: MemoryNode) -> Optional[List[float]]:
+        """Fetch a node's vector from the packed embedding store."""
+        vec = self.embeddings.get(self._embedding_key(node.topic, node.id))
+        return None if vec is None else vec.tolist()
 
-    def load_node(self, topic: str, node_id: str) -> Optional[MemoryNode]:
-        """Load MemoryNode from disk."""
+    def save_embedding(self, node: MemoryNode, vector: Sequence[float]):
+        """Store only a node's vector (re-embedding does not touch the node files)."""
+        key = self._embedding_key(node.topic, node.id)
+        if self._put_embedding(key, vector):
+            node.embedding = self.embeddings.get(key).tolist()
+
+    @staticmethod
+    def embedding_source(content: str, abstract: str, title: str) -> str:
+        """Text a node is embedded from: L2 content, falling back to the L0 abstract, then the title."""
+        for text in (content, abstract, title):
+            if text and text.strip():
+                return text
+        return ""
+
+    def embedding_text(self, node: MemoryNode) -> str:
+        """`embedding_source` of a stored node (encode and reembed embed the same text)."""
+        content = node.content if isinstance(node, LazyMemoryNode) else self._load_lazy_field(node, "content")
+        return self.embedding_source(content, node.L0_abstract, node.title)
+
+    def load_node(self, topic: str, node_id: str, lazy: Optional[bool] = None) -> Optional[MemoryNode]:
+        """Load MemoryNode from disk (metadata only when lazy)."""
+        lazy = self.lazy if lazy is None else lazy
         node_dir = self._get_node_dir(topic, node_id)
         meta_file = os.path.join(node_dir, "node.meta.json")
         
@@ -85,67 +285,373 @@ class MemoryStore:
             
         with open(meta_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
-            
+
+        if lazy:
+            for name in ("L0_abstract", "L1_overview", "embedding"):
+                data.pop(name, None)
+            return LazyMemoryNode.from_dict(data).bind_loader(self._load_lazy_field)
+
         node = MemoryNode.from_dict(data)
         
         # Load extra contents
         l0_path = os.path.join(node_dir, "L0.md")
         if os.path.exists(l0_path):
-            with open(l0_path, 'r', encoding='utf-8') as f:
-                node.L0_abstract = f.read()
+            node.L0_abstract = self._load_lazy_field(node, "L0_abstract")
                 
         l1_path = os.path.join(node_dir, "L1.md")
         if os.path.exists(l1_path):
-            with open(l1_path, 'r', encoding='utf-8') as f:
-                node.L1_overview = f.read()
+            node.L1_overview = self._load_lazy_field(node, "L1_overview")
 
         # Lazy load embedding?
         # For now, let's keep it None unless explicitly loaded to save memory
         return node
 
-    def list_nodes(self, topic: str = None) -> List[MemoryNode]:
-        """List all nodes, optionally filtered by topic."""
-        nodes = []
-        if topic:
-            search_path = os.path.join(self._get_topic_dir(topic), "**", "node.meta.json")
+    def _node_from_row(self, row, lazy: bool) -> MemoryNode:
+        """Build a MemoryNode from a catalog row; eager nodes also get L0/L1 from disk."""
+        fields = dict(
+            id=row["id"],
+            topic=row["topic"],
+            title=row["title"],
+            content_path=row["content_path"],
+            creation_date=datetime.fromisoformat(row["creation_date"]),
+            last_access_date=datetime.fromisoformat(row["last_access_date"]),
+            access_count=row["access_count"],
+            retrieval_count=row["retrieval_count"],
+            stability_factor=row["stability_factor"],
+            state=NodeState(row["state"]),
+        )
+        if lazy:
+            return LazyMemoryNode(loader=self._load_lazy_field, **fields)
+        node = MemoryNode(**fields)
+        node.L0_abstract = self._load_lazy_field(node, "L0_abstract")
+        node.L1_overview = self._load_lazy_field(node, "L1_overview")
+        return node
+
+    def _load_many(self, load: Callable[[Any], Optional[MemoryNode]], items: Sequence,
+                   label: Callable[[Any], str], workers: int) -> List[MemoryNode]:
+        """
+        Apply `load` to every item, serially or on a thread pool.
+        Results keep input order; a failing item is reported and skipped.
+        """
+        def safe_load(item):
+            try:
+                return load(item)
+            except Exception as e:
+                print(f"Error loading {label(item)}: {e}")
+                return None
+
+        if workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(safe_load, items))
         else:
-            search_path = os.path.join(MEMORY_DIR, "topics", "**", "node.meta.json")
-            
+            results = [safe_load(item) for item in items]
+        return [node for node in results if node is not None]
+
+    def list_nodes(self, topic: str = None, state: NodeState = None,
+                   lazy: Optional[bool] = None, workers: Optional[int] = None) -> List[MemoryNode]:
+        """List all nodes from the catalog, optionally filtered by topic and/or state."""
+        rows = self.catalog.rows(
+            topic_dir=self._topic_key(topic) if topic else None,
+            state=state.value if state else None,
+        )
+        return self._nodes_from_rows(rows, lazy, workers)
+
+    def _nodes_from_rows(self, rows: Sequence, lazy: Optional[bool], workers: Optional[int]) -> List[MemoryNode]:
+        lazy = self.lazy if lazy is None else lazy
+        workers = self.load_workers if workers is None else workers
+        # Lazy nodes are built from the catalog alone, so only eager loads fan out
+        return self._load_many(
+            lambda row: self._node_from_row(row, lazy),
+            rows,
+            lambda row: f"{row['topic_dir']}/{row['id']}",
+            1 if lazy else workers,
+        )
+
+    def list_due_nodes(self, current_date: datetime = None, lazy: Optional[bool] = None,
+                       workers: Optional[int] = None, topic: str = None) -> List[MemoryNode]:
+        """Nodes whose predicted decay transition (catalog `due_us`) has passed, soonest first."""
+        rows = self.catalog.due_rows(current_date or datetime.now(),
+                                     topic_dir=self._topic_key(topic) if topic else None)
+        return self._nodes_from_rows(rows, lazy, workers)
+
+    def list_topics(self) -> List[str]:
+        """Topic directory names that hold at least one node."""
+        return self.catalog.topic_dirs()
+
+    def list_nodes_after(self, after: Optional[Tuple[str, str]], limit: int,
+                         due_until: datetime = None, lazy: Optional[bool] = None,
+                         workers: Optional[int] = None) -> Tuple[List[MemoryNode], Optional[Tuple[str, str]]]:
+        """
+        One batch of a resumable catalog walk: up to `limit` nodes after the
+        (topic_dir, id) key `after` (optionally only those due by `due_until`).
+        Returns (nodes, key of the last row), the key being None at the end.
+        """
+        rows = self.catalog.rows_after(after, limit, due_until)
+        last = (rows[-1]["topic_dir"], rows[-1]["id"]) if rows else None
+        return self._nodes_from_rows(rows, lazy, workers), last
+
+    def list_oldest_nodes(self, state: NodeState, limit: int, lazy: Optional[bool] = None) -> List[MemoryNode]:
+        """The `limit` least recently accessed nodes in `state`."""
+        return self._nodes_from_rows(self.catalog.oldest_rows(state.value, limit), lazy, None)
+
+    def count_by_state(self) -> Dict[NodeState, int]:
+        counts = self.catalog.state_counts()
+        return {state: counts.get(state.value, 0) for state in NodeState}
+
+    def disk_footprint(self, topic_dirs: Sequence[str], ids: Sequence[str],
+                       workers: Optional[int] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Bytes on disk per node: (files in its node directory, its embedding:
+        packed row or legacy embedding.npy), aligned with the given
+        (topic_dir, id) pairs. Read-only: the embedding store is sized from
+        its index files, never opened (which would migrate legacy vectors).
+        """
+        import numpy as np
+
+        def dir_bytes(item):
+            files = legacy = 0
+            try:
+                with os.scandir(self._get_node_dir(*item)) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            if entry.name == "embedding.npy":
+                                legacy = entry.stat().st_size
+                            else:
+                                files += entry.stat().st_size
+            except OSError:
+                pass
+            return files, legacy
+
+        items = list(zip(topic_dirs, ids))
+        workers = self.load_workers if workers is None else workers
+        if workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                sizes = list(pool.map(dir_bytes, items))
+        else:
+            sizes = list(map(dir_bytes, items))
+        files = np.array([f for f, _ in sizes], dtype=np.int64).reshape(-1)
+        legacy = np.array([e for _, e in sizes], dtype=np.int64).reshape(-1)
+
+        if self._embeddings is not None:
+            store = self._embeddings
+            row_bytes, keys = row_nbytes(store.dim, store.precision), store
+        else:
+            snap, rows, _ = read_index(os.path.join(self.memory_dir, "embeddings"))
+            row_bytes = row_nbytes(snap.get("dim"), snap.get("precision", "float32")) if snap else 0
+            keys = {key for key in rows if key is not None}
+        packed = np.fromiter((self._embedding_key(t, i) in keys for t, i in items), dtype=bool, count=len(items))
+        return files, np.where(packed, row_bytes, legacy)
+
+    @property
+    def activity_path(self) -> str:
+        return os.path.join(self.memory_dir, ".activity")
+
+    def mark_activity(self):
+        """Record that an agent is encoding/searching right now (background maintenance backs off)."""
+        with open(self.activity_path, 'a'):
+            pass
+        os.utime(self.activity_path)
+
+    def seconds_since_activity(self) -> Optional[float]:
+        """Seconds since the last `mark_activity`, or None if there never was any."""
+        try:
+            return max(0.0, datetime.now().timestamp() - os.path.getmtime(self.activity_path))
+        except OSError:
+            return None
+
+    def refresh_indexes(self):
+        """Drop the cached embedding store and ANN index so they are re-read from disk (e.g. after other processes wrote to them)."""
+        self._embeddings = None
+        self._ann = None
+        self._generation += 1
+
+    def reindex_node(self, node: MemoryNode):
+        """Refresh a node's catalog row (e.g. its decay due date) without rewriting its files."""
+        self.catalog.upsert(self._topic_key(node.topic), node)
+        self._note_write(node.topic, node.id, node.state)
+
+    def score_catalog(self, topic: str = None, state: NodeState = None,
+                      current_date: datetime = None) -> Tuple[Dict[str, Any], "np.ndarray"]:
+        """
+        Importance scores straight from the catalog columns, without building nodes.
+        Returns (columns, scores) aligned with catalog (topic_dir, id) order.
+        """
+        from algorithms import calculate_importance_batch
+        cols = self.catalog.score_columns(
+            topic_dir=self._topic_key(topic) if topic else None,
+            state=state.value if state else None,
+        )
+        scores = calculate_importance_batch(
+            cols["creation_date"], cols["last_access_date"], cols["stability_factor"],
+            cols["access_count"], cols["retrieval_count"], current_date,
+        )
+        return cols, scores
+
+    def semantic_search(self, query, k: int = 10, topic: str = None) -> List[Tuple[str, str, float]]:
+        """
+        Nearest nodes to `query` (text or vector) by cosine similarity.
+        Returns [(topic_dir, node_id, similarity)], best first; `topic` restricts the search.
+        """
+        if not len(self.embeddings):
+            return []
+        if not self.embeddings_compatible():
+            self._warn_backend_mismatch()
+            return []
+        if isinstance(query, str):
+            from algorithms import get_embedding
+            query = get_embedding(query, cache_path=self.embedding_cache_path)
+        mask = self.embeddings.topic_mask(self._topic_key(topic)) if topic else None
+        keys, _ = self.embeddings.matrix()
+        results = []
+        for row, sim in self.ann.search(query, k=k, row_mask=mask):
+            topic_dir, _, node_id = keys[row].partition("/")
+            results.append((topic_dir, node_id, sim))
+        return results
+
+    def find_similar(self, vector: Sequence[float], threshold: float, topic: str = None,
+                     k: int = 10) -> List[Tuple[str, str, float]]:
+        """Nodes whose embedding is at least `threshold` cosine-similar to `vector` (best first)."""
+        return [hit for hit in self.semantic_search(vector, k=k, topic=topic) if hit[2] >= threshold]
+
+    def find_lexical_duplicates(self, topic: str = None, threshold: float = DEDUP_JACCARD_THRESHOLD
+                                ) -> List[Tuple[List[Dict[str, str]], float]]:
+        """
+        Clusters of nodes whose content.md are near-identical (MinHash/LSH Jaccard estimate).
+        Returns [(members as catalog dicts, lowest pair similarity)], largest clusters first.
+        """
+        rows = self.catalog.rows(topic_dir=self._topic_key(topic) if topic else None)
+        entries = [
+            (row["topic_dir"], row["id"],
+             os.path.join(self._get_node_dir(row["topic_dir"], row["id"]), "content.md"))
+            for row in rows
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, self.load_workers)) as pool:
+            sigs, _ = self.minhash.refresh(entries, map_fn=pool.map, prune=topic is None)
+        return [
+            ([dict(rows[i]) for i in members], sim)
+            for members, sim in duplicate_clusters(sigs, MINHASH_BANDS, threshold)
+        ]
+
+    def rebuild_index(self) -> int:
+        """Regenerate the catalog from the node.meta.json files on disk."""
+        search_path = os.path.join(self.memory_dir, "topics", "**", "node.meta.json")
         files = glob(search_path, recursive=True) # Recursive required for **
         # Glob patterns:
         # topics/*/*/node.meta.json -> topics/TOPIC/NODE/node.meta.json
         
-        for meta_file in files:
-            try:
-                # Extract topic & id from path
-                # .../topics/{topic}/{node_id}/node.meta.json
-                path_parts = os.path.normpath(meta_file).split(os.sep)
-                # Assumes standard structure
-                # [-1] = node.meta.json
-                # [-2] = node_id
-                # [-3] = topic
-                n_id = path_parts[-2]
-                n_topic = path_parts[-3]
-                
-                node = self.load_node(n_topic, n_id)
-                if node:
-                    nodes.append(node)
-            except Exception as e:
-                print(f"Error loading {meta_file}: {e}")
-                
-        return nodes
+        def load_meta(meta_file):
+            # Extract topic & id from path
+            # .../topics/{topic}/{node_id}/node.meta.json
+            path_parts = os.path.normpath(meta_file).split(os.sep)
+            # Assumes standard structure
+            # [-1] = node.meta.json
+            # [-2] = node_id
+            # [-3] = topic
+            n_id = path_parts[-2]
+            n_topic = path_parts[-3]
+            return self.load_node(n_topic, n_id, lazy=True)
+
+        nodes = self._load_many(load_meta, sorted(files), lambda f: f, self.load_workers)
+        entries = [(self._topic_key(node.topic), node) for node in nodes]
+
+        if self._catalog is None:
+            self._catalog = NodeCatalog(os.path.join(self.memory_dir, "catalog.sqlite3"))
+        self._catalog.replace_all(entries)
+        self._generation += 1
+        if self._rankings is not None:
+            self._rankings.reset()
+        return len(entries)
 
     def move_to_trash(self, node: MemoryNode):
         """Move node directory to trash."""
         src = self._get_node_dir(node.topic, node.id)
         # Trash structure: .trash/{topic}_{node_id}_{timestamp}/
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        dst = os.path.join(TRASH_DIR, f"{node.topic}_{node.id}_{timestamp}")
+        dst = os.path.join(self.trash_dir, f"{node.topic}_{node.id}_{timestamp}")
         
         if os.path.exists(src):
             shutil.move(src, dst)
+        self.catalog.remove(self._topic_key(node.topic), node.id)
+        self._note_write(node.topic, node.id, None)
+        row = self.embeddings.delete(self._embedding_key(node.topic, node.id))
+        if row is not None and self._ann is not None:
+            self._ann.remove(row)
             
-    def get_siblings(self, node: MemoryNode) -> List[MemoryNode]:
+    def _ranked_nodes(self, ranking: Sequence[Tuple[str, str, float]], k: int, exclude_id: Optional[str],
+                      lazy: Optional[bool]) -> List[Tuple[MemoryNode, float]]:
+        ranking = [entry for entry in ranking if entry[1] != exclude_id][:k]
+        rows = self.catalog.rows_for([(t, i) for t, i, _ in ranking])
+        nodes = dict(zip([(r["topic_dir"], r["id"]) for r in rows], self._nodes_from_rows(rows, lazy, None)))
+        return [(nodes[(t, i)], score) for t, i, score in ranking if (t, i) in nodes]
+
+    def top_siblings(self, node: MemoryNode, k: int = 5, current_date: datetime = None,
+                     lazy: Optional[bool] = None) -> List[Tuple[MemoryNode, float]]:
+        """The k most important other nodes of the node's topic, with their scores (best first)."""
+        ranking = self.rankings.top(self._topic_key(node.topic), k + 1, current_date)
+        return self._ranked_nodes(ranking, k, node.id, lazy)
+
+    def semantic_siblings(self, node: MemoryNode, k: int = 5, weight: float = PROJECTION_SEMANTIC_WEIGHT,
+                          current_date: datetime = None, lazy: Optional[bool] = None) -> List[Tuple[MemoryNode, float]]:
+        """
+        The k other nodes of the node's topic ranked by a blend of cosine
+        similarity to its embedding (`weight`) and importance relative to the
+        topic's most important node (1 - weight). Returns (node, importance)
+        pairs, best blend first. Only nodes with a stored embedding compete.
+        Without a target embedding (or with embeddings of another backend),
+        this falls back to `top_siblings`.
+        """
+        import numpy as np
+        store = self.embeddings
+        query = store.get(self._embedding_key(node.topic, node.id))
+        if query is None or not self.embeddings_compatible():
+            return self.top_siblings(node, k, current_date, lazy)
+        topic_dir = self._topic_key(node.topic)
+        cols, importance = self.rankings.scores(topic_dir, current_date)
+        mask, col_of = self._topic_alignment(topic_dir, cols)
+        candidates = mask & (col_of >= 0)  # catalogued rows of the topic, minus the node itself
+        candidates[store.row_of(self._embedding_key(node.topic, node.id))] = False
+        _, matrix = store.matrix()
+        rows, sims = cosine_scores(query, matrix, mask=candidates)
+        best_importance = float(importance.max()) if len(importance) else 0.0
+        relative = importance / best_importance if best_importance > 0 else np.zeros(len(importance))
+        # Blend per catalog column, so the partial top-k breaks ties by id
+        blend = np.full(len(importance), -np.inf)
+        blend[col_of[rows]] = weight * sims + (1.0 - weight) * relative[col_of[rows]]
+        best = top_k_indices(blend, min(k, len(rows)))
+        ranking = [(topic_dir, cols["id"][c], float(importance[c])) for c in best]
+        return self._ranked_nodes(ranking, k, None, lazy)
+
+    def _topic_alignment(self, topic_dir: str, cols: Dict[str, Any]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        The topic's embedding row mask and, per embedding row, the index of
+        its node in `cols` (-1 elsewhere). Rebuilt only when either changes.
+        """
+        import numpy as np
+        mask = self.embeddings.topic_mask(topic_dir)
+        cached = self._alignments.get(topic_dir)
+        if cached is None or cached[0] is not mask or cached[1] is not cols:
+            keys, _ = self.embeddings.matrix()
+            index = {node_id: i for i, node_id in enumerate(cols["id"])}
+            col_of = np.full(len(mask), -1, dtype=np.int64)
+            for row in np.flatnonzero(mask):
+                col_of[row] = index.get(keys[row].partition("/")[2], -1)
+            cached = self._alignments[topic_dir] = (mask, cols, col_of)
+        return cached[0], cached[2]
+
+    def top_in_topic(self, topic: str, k: int = 5, current_date: datetime = None,
+                     lazy: Optional[bool] = None) -> List[Tuple[MemoryNode, float]]:
+        """The k most important nodes of a topic, with their scores (best first)."""
+        ranking = self.rankings.top(self._topic_key(topic), k, current_date)
+        return self._ranked_nodes(ranking, k, None, lazy)
+
+    def top_golden(self, k: int = 10, exclude_id: Optional[str] = None, current_date: datetime = None,
+                   lazy: Optional[bool] = None) -> List[Tuple[MemoryNode, float]]:
+        """The k most important GOLDEN nodes store-wide, with their scores (best first)."""
+        ranking = self.rankings.top(None, k + (exclude_id is not None), current_date)
+        return self._ranked_nodes(ranking, k, exclude_id, lazy)
+
+    def get_siblings(self, node: MemoryNode, lazy: Optional[bool] = None,
+                     workers: Optional[int] = None) -> List[MemoryNode]:
         """Get all other nodes in the same topic."""
-        all_nodes = self.list_nodes(node.topic)
+        all_nodes = self.list_nodes(node.topic, lazy=lazy, workers=workers)
         return [n for n in all_nodes if n.id != node.id]
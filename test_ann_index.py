@@ -0,0 +1,99 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from models import MemoryNode
+from storage import MemoryStore
+from embedding_store import EmbeddingStore
+from ann_index import ANNIndex
+
+
+def _clustered(n, dim, n_clusters, rng):
+    centers = rng.normal(size=(n_clusters, dim))
+    labels = rng.integers(0, n_clusters, size=n)
+    return (centers[labels] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def test_ivf_recall_and_maintenance():
+    print("🧪 Testing IVF index recall and incremental maintenance")
+    rng = np.random.default_rng(7)
+    vectors = _clustered(3000, 32, 40, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(tmp)
+        for i, vec in enumerate(vectors):
+            store.put(f"t{i % 3}/n{i}", vec)
+        path = os.path.join(tmp, "ann.npz")
+        index = ANNIndex(store, path, nprobe=8, min_train=1000)
+        assert index.centroids is not None
+
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        hits = 0
+        for q in range(50):
+            exact = set(np.argsort(-(unit @ unit[q]))[:10])
+            found = {row for row, _ in index.search(vectors[q], k=10)}
+            hits += len(exact & found)
+        recall = hits / 500
+        print(f"   recall@10 = {recall:.2f}")
+        assert recall >= 0.9
+
+        # Topic filter only returns rows of that topic
+        results = index.search(vectors[0], k=5, row_mask=store.topic_mask("t1"))
+        assert results and all(row % 3 == 1 for row, _ in results)
+
+        # Delete + insert are reflected without a rebuild
+        row = store.delete("t0/n0")
+        index.remove(row)
+        assert all(r != row for r, _ in index.search(vectors[0], k=5))
+        new_row = store.put("t0/new", vectors[0])
+        index.add(new_row)
+        assert index.search(vectors[0], k=1)[0][0] == new_row
+
+        # Persisted state is picked up (and caught up) by a fresh instance
+        index.save()
+        store.put("t0/late", vectors[1] * 2)
+        reopened = ANNIndex(EmbeddingStore(tmp), path, nprobe=8, min_train=1000)
+        assert reopened.trained_on == index.trained_on
+        assert reopened.search(vectors[1], k=2)[0][1] > 0.999
+
+
+def test_store_semantic_search():
+    print("🧪 Testing MemoryStore.semantic_search")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=os.path.join(tmp, "trash"))
+        basis = np.eye(4, dtype=np.float32)
+        nodes = []
+        for i in range(4):
+            node = MemoryNode(id=f"n{i}", topic="alpha" if i < 2 else "beta", title=f"n{i}",
+                              content_path="", creation_date=datetime.now(),
+                              last_access_date=datetime.now(), embedding=basis[i].tolist())
+            store.save_node(node)
+            nodes.append(node)
+
+        hits = store.semantic_search([1.0, 0.1, 0.0, 0.0], k=2)
+        assert [h[1] for h in hits] == [nodes[0].id, nodes[1].id]
+        assert hits[0][0] == "alpha" and hits[0][2] > 0.99
+
+        hits = store.semantic_search([1.0, 0.1, 0.0, 0.0], k=2, topic="beta")
+        assert {h[1] for h in hits} == {nodes[2].id, nodes[3].id}
+
+        store.move_to_trash(nodes[0])
+        assert nodes[0].id not in [h[1] for h in store.semantic_search(basis[0], k=4)]
+
+        # Duplicate check only reports neighbours above the threshold
+        near = store.find_similar([0.0, 1.0, 0.05, 0.0], 0.75)
+        assert [h[1] for h in near] == [nodes[1].id]
+        assert store.find_similar([0.0, 1.0, 0.05, 0.0], 0.75, topic="beta") == []
+
+
+if __name__ == "__main__":
+    test_ivf_recall_and_maintenance()
+    test_store_semantic_search()
+    print("✅ ANN index tests passed")
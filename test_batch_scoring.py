@@ -0,0 +1,73 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from models import MemoryNode, NodeState
+from storage import MemoryStore
+from algorithms import calculate_importance, calculate_importance_many, calculate_importance_batch
+
+
+def _node(created, accessed, access=0, retrieval=0, s=0.95):
+    return MemoryNode(id='b', topic='test', title='Batch', content_path='',
+                      creation_date=created, last_access_date=accessed,
+                      access_count=access, retrieval_count=retrieval, stability_factor=s)
+
+
+def test_batch_matches_scalar():
+    print("🧪 Testing batch importance equivalence")
+    now = datetime(2026, 3, 1, 12, 0, 0)
+    nodes = [
+        _node(now, now),                                                  # grace period
+        _node(now - timedelta(days=3, hours=23), now - timedelta(days=3)),  # last grace day
+        _node(now - timedelta(days=4), now - timedelta(days=4)),          # first decayed day
+        _node(now - timedelta(days=60), now - timedelta(days=60)),        # decayed to dust
+        _node(now - timedelta(days=60), now + timedelta(days=2)),         # negative days clamp
+        _node(now - timedelta(days=90), now - timedelta(days=30), access=1000),  # bonus cap
+        _node(now - timedelta(days=90), now - timedelta(days=30), s=1.0),
+        _node(now - timedelta(hours=1), now + timedelta(hours=5), access=3, retrieval=4),
+    ]
+    scalar = np.array([calculate_importance(n, now) for n in nodes])
+    batch = calculate_importance_many(nodes, now)
+    assert np.allclose(scalar, batch, rtol=0, atol=1e-12)
+
+    raw = calculate_importance_batch(
+        np.array([n.creation_date for n in nodes], dtype='datetime64[us]'),
+        np.array([n.last_access_date for n in nodes], dtype='datetime64[us]'),
+        [n.stability_factor for n in nodes],
+        [n.access_count for n in nodes],
+        [n.retrieval_count for n in nodes],
+        now,
+    )
+    assert np.allclose(raw, batch, rtol=0, atol=0)
+    assert calculate_importance_many([], now).shape == (0,)
+
+
+def test_catalog_columns_score_like_nodes():
+    print("🧪 Testing catalog columnar scoring")
+    now = datetime(2026, 3, 1, 12, 0, 0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+        for i in range(12):
+            node = _node(now - timedelta(days=5 * i, minutes=i), now - timedelta(days=2 * i), access=i)
+            node.id = f"c{i:02d}"
+            node.state = NodeState.GOLDEN if i % 4 == 0 else NodeState.SILVER
+            store.save_node(node)
+        nodes = store.list_nodes()
+        cols, scores = store.score_catalog(current_date=now)
+        assert cols["id"] == [n.id for n in nodes]
+        assert np.allclose(scores, [calculate_importance(n, now) for n in nodes], rtol=0, atol=1e-12)
+        cols, scores = store.score_catalog(state=NodeState.GOLDEN, current_date=now)
+        assert cols["id"] == ["c00", "c04", "c08"]
+
+
+if __name__ == '__main__':
+    test_batch_matches_scalar()
+    test_catalog_columns_score_like_nodes()
@@ -0,0 +1,114 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from models import MemoryNode, LazyMemoryNode, NodeState
+from storage import MemoryStore
+
+
+def _make_node(node_id, topic="test", state=NodeState.SILVER, days_ago=0):
+    ts = datetime.now() - timedelta(days=days_ago)
+    return MemoryNode(
+        id=node_id, topic=topic, title=f"Node {node_id}", content_path="",
+        creation_date=ts, last_access_date=ts, state=state,
+        L0_abstract=f"abstract {node_id}", L1_overview=f"overview {node_id}"
+    )
+
+
+def test_catalog_tracks_save_and_trash():
+    print("🧪 Testing catalog index")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+        store.save_node(_make_node("a1", topic="alpha"))
+        store.save_node(_make_node("b1", topic="beta", state=NodeState.GOLDEN))
+        store.save_node(_make_node("a2", topic="alpha"))
+
+        nodes = store.list_nodes()
+        assert [n.id for n in nodes] == ["a1", "a2", "b1"]
+        assert [n.id for n in store.list_nodes("alpha")] == ["a1", "a2"]
+        assert [n.id for n in store.list_nodes(state=NodeState.GOLDEN)] == ["b1"]
+        assert nodes[0].L0_abstract == "abstract a1"
+        assert nodes[0].L1_overview == "overview a1"
+
+        # Keyed lookups come back in key order, missing keys skipped, across query chunks
+        keys = [("beta", "b1"), ("alpha", "zz"), ("alpha", "a1")] + [("alpha", f"x{i}") for i in range(900)] + [("alpha", "a2")]
+        assert [r["id"] for r in store.catalog.rows_for(keys)] == ["b1", "a1", "a2"]
+
+        store.move_to_trash(nodes[0])
+        assert [n.id for n in store.list_nodes()] == ["a2", "b1"]
+
+
+def test_catalog_rebuild_from_files():
+    print("🧪 Testing catalog rebuild")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+        for i in range(3):
+            store.save_node(_make_node(f"n{i}"))
+        store.catalog.close()
+        os.remove(os.path.join(tmp, "catalog.sqlite3"))
+
+        # A fresh store regenerates the missing catalog from node.meta.json
+        fresh = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+        assert [n.id for n in fresh.list_nodes()] == ["n0", "n1", "n2"]
+        assert fresh.rebuild_index() == 3
+
+
+def test_lazy_nodes_defer_content_reads():
+    print("🧪 Testing lazy node hydration")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+        node = _make_node("lz")
+        store.save_node(node)
+        with open(node.content_path, 'w', encoding='utf-8') as f:
+            f.write("full L2 text")
+
+        for lazy_node in (store.list_nodes()[0], store.load_node("test", "lz")):
+            assert isinstance(lazy_node, LazyMemoryNode)
+            assert not lazy_node.is_loaded("L0_abstract")
+            assert lazy_node.state == NodeState.SILVER
+            assert not lazy_node.is_loaded("L0_abstract")
+            assert lazy_node.L0_abstract == "abstract lz"
+            assert lazy_node.L1_overview == "overview lz"
+            assert lazy_node.content == "full L2 text"
+
+        eager = store.load_node("test", "lz", lazy=False)
+        assert type(eager) is MemoryNode
+        assert eager.L1_overview == "overview lz"
+        assert store.list_nodes(lazy=False)[0].to_dict() == store.list_nodes()[0].to_dict()
+
+        # Saving a lazily listed node reads nothing and leaves L0/L1 on disk intact
+        reads = []
+        lazy_node = store.list_nodes()[0].bind_loader(lambda n, name: reads.append(name))
+        lazy_node.access_count += 1
+        store.save_node(lazy_node)
+        assert reads == []
+        reloaded = store.load_node("test", "lz", lazy=False)
+        assert reloaded.access_count == eager.access_count + 1
+        assert (reloaded.L0_abstract, reloaded.L1_overview) == ("abstract lz", "overview lz")
+
+
+def test_parallel_loading_keeps_order():
+    print("🧪 Testing parallel node loading")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+        for i in range(30):
+            store.save_node(_make_node(f"p{i:02d}", topic=f"t{i % 3}"))
+        serial = store.list_nodes(lazy=False, workers=1)
+        parallel = store.list_nodes(lazy=False, workers=8)
+        assert [n.id for n in parallel] == [n.id for n in serial]
+        assert [n.L0_abstract for n in parallel] == [n.L0_abstract for n in serial]
+        siblings = store.get_siblings(serial[0], lazy=False, workers=8)
+        assert [n.id for n in siblings] == [n.id for n in serial if n.topic == serial[0].topic][1:]
+
+
+if __name__ == '__main__':
+    test_catalog_tracks_save_and_trash()
+    test_catalog_rebuild_from_files()
+    test_lazy_nodes_defer_content_reads()
+    test_parallel_loading_keeps_order()
@@ -0,0 +1,82 @@
+import sys
+import os
+import random
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from models import MemoryNode, NodeState
+from storage import MemoryStore
+from maintenance import MaintenanceManager
+from algorithms import calculate_importance, days_until_below, predict_transition_date
+from config import THRESHOLD_SILVER, THRESHOLD_DUST, STABILITY_ROLE, STABILITY_WORLD, STABILITY_USER
+
+
+def _random_node(rng, i, now):
+    created = now - timedelta(days=rng.uniform(0, 400), seconds=rng.randint(0, 86399))
+    return MemoryNode(
+        id=f"n{i:03d}", topic=rng.choice(["alpha", "beta"]), title=f"n{i}", content_path="",
+        creation_date=created, last_access_date=created + timedelta(days=rng.uniform(0, 60)),
+        access_count=rng.choice([0, 1, 5, 40]), retrieval_count=rng.randint(0, 30),
+        stability_factor=rng.choice([STABILITY_USER, STABILITY_ROLE, STABILITY_WORLD, 0.9, 0.7]),
+        state=rng.choice([NodeState.SILVER, NodeState.BRONZE]),
+    )
+
+
+def test_predicted_dates_match_the_formula():
+    print("🧪 Testing closed-form decay transition dates")
+    rng = random.Random(3)
+    now = datetime(2025, 6, 1, 12, 0)
+    for i in range(500):
+        node = _random_node(rng, i, now)
+        threshold = THRESHOLD_SILVER if node.state == NodeState.SILVER else THRESHOLD_DUST
+        due = predict_transition_date(node)
+        if due is None:
+            far = node.last_access_date + timedelta(days=20000)
+            assert calculate_importance(node, far) >= threshold
+            continue
+        assert calculate_importance(node, due) < threshold
+        grace_end = node.creation_date + timedelta(days=4)
+        if due > grace_end:
+            assert calculate_importance(node, due - timedelta(microseconds=1)) >= threshold
+
+    assert days_until_below(THRESHOLD_SILVER, 1.0, 0.0) is None
+    assert days_until_below(THRESHOLD_DUST, 0.95, 1e9) is None  # growth term alone stays above
+
+
+def test_due_only_gc_matches_full_scan_and_persists():
+    print("🧪 Testing due-only GC against a full scan")
+    rng = random.Random(9)
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = os.path.join(tmp, "trash")
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=trash)
+        for i in range(120):
+            store.save_node(_random_node(rng, i, now))
+        gc = MaintenanceManager(store)
+
+        full = gc.run_garbage_collection(dry_run=True, full=True)
+        due = gc.run_garbage_collection(dry_run=True)
+        assert full["scanned"] == 120 and due["scanned"] < full["scanned"]
+        for key in ("downgraded_silver", "marked_dust"):
+            assert due[key] == full[key]
+
+        report = gc.run_garbage_collection(dry_run=False)
+        assert report["trashed"] == full["marked_dust"]
+        counts = store.count_by_state()
+        assert counts[NodeState.DUST] == 0
+        assert sum(counts.values()) == 120 - report["trashed"]
+
+        # State changes were persisted, so nothing is due any more
+        assert store.list_due_nodes(now) == []
+        assert gc.run_garbage_collection(dry_run=True)["scanned"] == 0
+
+
+if __name__ == "__main__":
+    test_predicted_dates_match_the_formula()
+    test_due_only_gc_matches_full_scan_and_persists()
+    print("✅ Decay calendar tests passed")
@@ -0,0 +1,148 @@
+import sys
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from models import MemoryNode
+from storage import MemoryStore
+from embedding_store import EmbeddingStore
+from embedders import SentenceTransformerEmbedder
+from config import EMBEDDING_MODEL
+import algorithms
+
+
+def test_append_update_tombstone_compact():
+    print("🧪 Testing packed embedding store")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(tmp)
+        for i in range(100):
+            store.put(f"t/n{i}", np.full(8, i, dtype=np.float32))
+        # Updates tombstone the old row and append a new one
+        assert store.put("t/n5", np.full(8, -1.0)) == 100
+        assert len(store) == 100 and store.tombstones == 1
+        assert store.get("t/n5")[0] == -1.0
+
+        for i in range(0, 100, 2):
+            store.delete(f"t/n{i}")
+        assert store.tombstones == 51 and store.get("t/n4") is None
+
+        # Journal replay restores the row map after reopening
+        reopened = EmbeddingStore(tmp)
+        assert len(reopened) == 50 and reopened.get("t/n7")[0] == 7.0
+
+        assert reopened.compact() == 51
+        keys, mat = reopened.matrix()
+        assert keys == [f"t/n{i}" for i in range(1, 100, 2) if i != 5] + ["t/n5"]
+        assert mat.shape == (50, 8) and mat[0, 0] == 1.0
+        assert EmbeddingStore(tmp).get("t/n99")[0] == 99.0
+
+
+def test_store_migrates_legacy_embedding_files():
+    print("🧪 Testing legacy embedding.npy migration")
+    with tempfile.TemporaryDirectory() as tmp:
+        node_dir = os.path.join(tmp, "topics", "alpha", "old1")
+        os.makedirs(node_dir)
+        np.save(os.path.join(node_dir, "embedding.npy"), np.array([0.5, 0.25, 0.125]))
+        # An unreadable file and one of the wrong dimension are kept for a retry
+        for name, write in (("broken", lambda p: open(p, 'wb').write(b"not npy")),
+                            ("wide", lambda p: np.save(p, np.ones(5)))):
+            os.makedirs(os.path.join(tmp, "topics", "alpha", name))
+            write(os.path.join(tmp, "topics", "alpha", name, "embedding.npy"))
+
+        store = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+        assert np.allclose(store.embeddings.get("alpha/old1"), [0.5, 0.25, 0.125])
+        assert not os.path.exists(os.path.join(node_dir, "embedding.npy"))
+        for name in ("broken", "wide"):
+            assert os.path.exists(os.path.join(tmp, "topics", "alpha", name, "embedding.npy"))
+            assert f"alpha/{name}" not in store.embeddings
+
+        # Legacy vectors were made by the configured sentence-transformers model
+        assert store.embeddings.backend == f"sentence-transformers:{EMBEDDING_MODEL}"
+
+        previous, algorithms._embedder_cache = algorithms._embedder_cache, SentenceTransformerEmbedder(EMBEDDING_MODEL)
+        try:
+            node = MemoryNode(id="new1", topic="alpha", title="t", content_path="",
+                              creation_date=datetime.now(), last_access_date=datetime.now(),
+                              embedding=[1.0, 0.0, 0.0])
+            store.save_node(node)
+            assert store.list_nodes()[0].embedding == [1.0, 0.0, 0.0]
+            store.move_to_trash(node)
+            assert "alpha/new1" not in store.embeddings
+        finally:
+            algorithms._embedder_cache = previous
+
+
+def test_quantized_precisions_and_conversion():
+    print("🧪 Testing float16 / int8 storage precision")
+    rng = np.random.default_rng(5)
+    vectors = rng.normal(size=(300, 32)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(tmp, precision="int8")
+        rows = store.put_many([(f"t/n{i}", v) for i, v in enumerate(vectors)])
+        assert rows == list(range(300)) and store.matrix()[1].dtype == np.int8
+        assert store.nbytes == 300 * (32 + 4)
+        err = np.abs(store.get("t/n7") - vectors[7]).max()
+        assert err <= np.abs(vectors[7]).max() / 127
+
+        # Cosine ranking straight on the int8 rows matches full precision
+        from algorithms import cosine_top_k
+        exact, _ = cosine_top_k(vectors[3], vectors, k=10)
+        quant, _ = cosine_top_k(vectors[3], store.matrix()[1], k=10)
+        assert len(set(exact) & set(quant)) >= 9
+
+        # Reopening with another precision converts the stored rows
+        store.delete("t/n0")
+        f16 = EmbeddingStore(tmp, precision="float16")
+        assert f16.matrix()[1].dtype == np.float16 and f16.layout_version == 1
+        assert len(f16) == 299 and f16.get("t/n0") is None
+        assert np.allclose(f16.get("t/n7"), vectors[7], atol=0.05)
+        assert EmbeddingStore(tmp, precision="float16").precision == "float16"
+        assert not os.path.exists(os.path.join(tmp, "scales.npy"))
+
+
+def _put_keys(directory, prefix, count):
+    store = EmbeddingStore(directory)
+    for i in range(count):
+        store.put(f"{prefix}/n{i}", np.full(8, i, dtype=np.float32))
+
+
+def test_writers_in_other_processes_are_not_lost():
+    print("🧪 Testing embedding store sharing across processes")
+    with tempfile.TemporaryDirectory() as tmp:
+        a = EmbeddingStore(tmp)
+        a.put_many([(f"a/n{i}", np.full(8, i, dtype=np.float32)) for i in range(10)])
+        b = EmbeddingStore(tmp)  # another process's view
+        b.put_many([(f"b/n{i}", np.full(8, -i, dtype=np.float32)) for i in range(5)])
+        for i in range(4):
+            a.delete(f"a/n{i}")
+        assert a.maybe_compact() == 4
+        reopened = EmbeddingStore(tmp)
+        assert len(reopened) == 11 and reopened.tombstones == 0
+        assert reopened.get("b/n3")[0] == -3 and reopened.get("a/n7")[0] == 7
+
+        # Stale writers append to fresh rows instead of overwriting each other
+        b.put("b/x", np.ones(8))
+        a.put("a/x", np.full(8, 2.0))
+        reopened = EmbeddingStore(tmp)
+        assert reopened.get("b/x")[0] == 1 and reopened.get("a/x")[0] == 2
+
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            list(pool.map(_put_keys, [tmp] * 4, ["p0", "p1", "p2", "p3"], [40] * 4))
+        reopened = EmbeddingStore(tmp)
+        assert len(reopened) == 13 + 160
+        assert all(reopened.get(f"p{p}/n{i}")[0] == i for p in range(4) for i in range(40))
+
+
+if __name__ == '__main__':
+    test_append_update_tombstone_compact()
+    test_store_migrates_legacy_embedding_files()
+    test_quantized_precisions_and_conversion()
+    test_writers_in_other_processes_are_not_lost()
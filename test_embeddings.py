@@ -0,0 +1,189 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+import algorithms
+from embedding_cache import EmbeddingCache
+from embedders import Embedder, SentenceTransformerEmbedder, HashingEmbedder
+
+
+class FakeModel:
+    """Stands in for SentenceTransformer: 4-dim vectors derived from text length."""
+    def __init__(self):
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls.append(len(texts))
+        return np.array([[len(t), 1.0, 0.0, 0.5] for t in texts], dtype=np.float32)
+
+
+def test_get_embeddings_batches_and_blanks():
+    print("🧪 Testing batched embedding generation")
+    model = FakeModel()
+    previous, algorithms._embedder_cache = algorithms._embedder_cache, SentenceTransformerEmbedder("fake", model)
+    enabled, algorithms.EMBEDDING_CACHE_ENABLED = algorithms.EMBEDDING_CACHE_ENABLED, False
+    try:
+        vectors = algorithms.get_embeddings(["abc", "", "   ", "hello"], batch_size=8)
+        assert vectors.dtype == np.float32 and vectors.shape == (4, 4)
+        assert vectors[0, 0] == 3 and vectors[3, 0] == 5
+        assert not vectors[1].any() and not vectors[2].any()
+        assert model.calls == [2]  # one model call for both real texts
+        assert algorithms.get_embedding("ab") == [2.0, 1.0, 0.0, 0.5]
+
+        items = [f"text-{i}" * (i + 1) for i in range(10)]
+        seen = []
+        for batch, batch_vectors in algorithms.iter_embedding_batches(items, lambda x: x, batch_size=3, max_pending=1):
+            assert len(batch) == len(batch_vectors) <= 3
+            seen.extend(zip(batch, batch_vectors[:, 0]))
+        assert [item for item, _ in seen] == items
+        assert all(length == len(item) for item, length in seen)
+    finally:
+        algorithms._embedder_cache = previous
+        algorithms.EMBEDDING_CACHE_ENABLED = enabled
+
+
+def test_embedding_cache_hits_evicts_and_invalidates():
+    print("🧪 Testing content-hash embedding cache")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        model = FakeModel()
+        previous, algorithms._embedder_cache = algorithms._embedder_cache, SentenceTransformerEmbedder("model-a", model)
+        algorithms._embedding_caches[path] = EmbeddingCache(path, "model-a", max_entries=3)
+        try:
+            first = algorithms.get_embeddings(["alpha", "beta"], cache_path=path)
+            # Whitespace-only differences normalize to the same key
+            second = algorithms.get_embeddings(["alpha", "  beta \n"], cache_path=path)
+            assert np.array_equal(first, second)
+            assert model.calls == [2]
+            cache = algorithms.get_embedding_cache(path)
+            stats = cache.stats()
+            assert stats["hits"] == 2 and stats["misses"] == 2
+
+            # Each store directory has its own cache
+            other_path = os.path.join(tmp, "other", "cache.sqlite3")
+            os.makedirs(os.path.dirname(other_path))
+            algorithms.get_embeddings(["alpha"], cache_path=other_path)
+            assert model.calls == [2, 1] and algorithms.get_embedding_cache(other_path) is not cache
+            algorithms._embedding_caches.pop(other_path).close()
+
+            algorithms.get_embeddings(["gamma", "delta"], cache_path=path)  # exceeds the cap of 3
+            assert len(cache) == 3
+            assert cache.get_many(["delta"])[0] is not None
+            cache.close()
+
+            # Reopening under another model name drops every entry
+            other = EmbeddingCache(path, "model-b", max_entries=3)
+            assert len(other) == 0
+            other.close()
+        finally:
+            algorithms._embedder_cache = previous
+            algorithms._embedding_caches.pop(path, None)
+
+
+def test_embedding_server_coalesces_concurrent_clients():
+    print("🧪 Testing resident embedding server")
+    import threading
+    from embedding_server import EmbeddingServer, EmbeddingClient
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embed.sock")
+        model = FakeModel()
+        embedder = SentenceTransformerEmbedder("fake", model)
+        server = EmbeddingServer(path, embedder, max_batch=64, max_wait_ms=200).start()
+        previous_client, algorithms._embedding_client = algorithms._embedding_client, EmbeddingClient(path)
+        unloaded = SentenceTransformerEmbedder("fake")  # same backend id, model never loaded here
+        previous, algorithms._embedder_cache = algorithms._embedder_cache, unloaded
+        enabled, algorithms.EMBEDDING_CACHE_ENABLED = algorithms.EMBEDDING_CACHE_ENABLED, False
+        try:
+            # get_embeddings goes through the server without loading a model in-process
+            vectors = algorithms.get_embeddings(["abc", "", "hello"])
+            assert vectors.shape == (3, 4) and vectors[2, 0] == 5 and not vectors[1].any()
+            assert unloaded._model is None
+
+            # Concurrent clients share one model call
+            model.calls.clear()
+            results = {}
+            threads = [threading.Thread(target=lambda i=i: results.setdefault(
+                i, EmbeddingClient(path).encode(["x" * i, "y" * (i + 1)]))) for i in range(1, 5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert sum(model.calls) == 8 and len(model.calls) < 4
+            assert all(results[i][1][0, 0] == i and results[i][1][1, 0] == i + 1 for i in range(1, 5))
+        finally:
+            server.stop()
+            algorithms._embedding_client = previous_client
+            algorithms._embedder_cache = previous
+            algorithms.EMBEDDING_CACHE_ENABLED = enabled
+        assert not os.path.exists(path)
+        assert EmbeddingClient(path).encode(["abc"]) is None
+
+
+def test_hashing_embedder_and_backend_isolation():
+    print("🧪 Testing hashing embedder and backend bookkeeping")
+    from storage import MemoryStore
+    embedder = HashingEmbedder(dim=256)
+    vectors = embedder.encode(["Queue-first retries reduce partial failures",
+                               "queue first retries reduce partial failure",
+                               "Tomatoes grow best in full sun", ""])
+    assert vectors.shape == (4, 256) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0) and not vectors[3].any()
+    assert vectors[0] @ vectors[1] > 0.6 > vectors[0] @ vectors[2]
+    assert np.array_equal(embedder.encode(["Tomatoes grow best in full sun"])[0], vectors[2])
+
+    class Incomplete(Embedder):  # no dim: rejected when created, not on first use
+        def encode(self, texts, batch_size=32):
+            return np.zeros((len(texts), 1), dtype=np.float32)
+    try:
+        Incomplete()
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+
+    previous, algorithms._embedder_cache = algorithms._embedder_cache, embedder
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+            store._put_embedding("t/a", vectors[0])
+            assert store.embeddings.backend == embedder.id
+            assert store.semantic_search(vectors[1], k=1)[0][1] == "a"
+
+            # Another backend never compares against (or mixes into) the stored vectors
+            algorithms._embedder_cache = HashingEmbedder(dim=128)
+            other = MemoryStore(memory_dir=tmp, trash_dir=os.path.join(tmp, ".trash"))
+            assert not other.embeddings_compatible()
+            assert other.semantic_search(np.ones(128), k=1) == []
+            assert other._put_embedding("t/b", np.ones(128)) is False
+            other.embeddings.reset(other.embedding_backend)
+            assert other._put_embedding("t/b", np.ones(128)) and other.embeddings.dim == 128
+
+            # reembed reads back exactly the text encode embedded, after metadata-only saves too
+            from models import MemoryNode
+            node = MemoryNode(id="c", topic="t", title="Title", content_path="", L0_abstract="Abstract",
+                              creation_date=datetime.now(), last_access_date=datetime.now())
+            store.save_node(node, content="Queue-first retries")
+            node.update_access()
+            store.save_node(node)
+            for loaded in (store.load_node("t", "c"), store.load_node("t", "c", lazy=True)):
+                assert store.embedding_text(loaded) == store.embedding_source("Queue-first retries", "Abstract", "Title")
+            assert store.embedding_source(" ", "", "Title") == "Title"
+    finally:
+        algorithms._embedder_cache = previous
+
+
+if __name__ == '__main__':
+    test_get_embeddings_batches_and_blanks()
+    test_embedding_cache_hits_evicts_and_invalidates()
+    test_embedding_server_coalesces_concurrent_clients()
+    test_hashing_embedder_and_backend_isolation()
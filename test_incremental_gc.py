@@ -0,0 +1,106 @@
+import sys
+import os
+import random
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+import maintenance
+from models import MemoryNode, NodeState
+from storage import MemoryStore
+from maintenance import MaintenanceManager
+from config import STABILITY_ROLE, STABILITY_USER
+
+
+def _populate(store, seed, now, count=150, golden=8):
+    rng = random.Random(seed)
+    for i in range(count):
+        created = now - timedelta(days=rng.uniform(0, 300))
+        store.save_node(MemoryNode(
+            id=f"n{i:03d}", topic=rng.choice(["alpha", "beta", "gamma"]), title=f"n{i}", content_path="",
+            creation_date=created, last_access_date=created + timedelta(days=rng.uniform(0, 30)),
+            access_count=rng.choice([0, 1, 5, 40]), retrieval_count=rng.randint(0, 20),
+            stability_factor=rng.choice([STABILITY_USER, STABILITY_ROLE, 0.9, 0.7]),
+            state=NodeState.GOLDEN if i < golden else rng.choice([NodeState.SILVER, NodeState.BRONZE]),
+        ))
+
+
+class _Crash(Exception):
+    pass
+
+
+def test_incremental_gc_resumes_to_the_same_result():
+    print("🧪 Testing budgeted, resumable incremental GC")
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = os.path.join(tmp, "trash")
+        saved, maintenance.SOFT_CAP_GOLDEN = maintenance.SOFT_CAP_GOLDEN, 3
+        try:
+            reference = MemoryStore(memory_dir=os.path.join(tmp, "ref"), trash_dir=trash)
+            store = MemoryStore(memory_dir=os.path.join(tmp, "inc"), trash_dir=trash)
+            _populate(reference, 5, now)
+            _populate(store, 5, now)
+            expected = MaintenanceManager(reference).run_garbage_collection(dry_run=False)
+            assert expected["marked_dust"] > 0
+
+            gc = MaintenanceManager(store)
+            preview = gc.run_incremental_gc(dry_run=True, batch_size=16)
+            assert preview["complete"] and not os.path.exists(gc.checkpoint_path)
+            assert preview["marked_dust"] == expected["marked_dust"]
+            assert preview["downgraded_silver"] == expected["downgraded_silver"]
+            assert sum(store.count_by_state().values()) == 150  # dry run wrote nothing
+
+            # Crash once in the middle of a batch; the rerun redoes that batch
+            move, calls = store.move_to_trash, []
+
+            def flaky_move(node):
+                calls.append(node.id)
+                if len(calls) == 3:
+                    raise _Crash()
+                move(node)
+            store.move_to_trash = flaky_move
+            try:
+                gc.run_incremental_gc(batch_size=16, max_nodes=40)
+                assert False, "expected the injected crash"
+            except _Crash:
+                pass
+            assert os.path.exists(gc.checkpoint_path)
+
+            runs, report = 0, {"complete": False}
+            while not report["complete"]:
+                report = gc.run_incremental_gc(batch_size=16, max_nodes=40)
+                runs += 1
+                assert runs < 20
+            assert runs > 1
+            assert not os.path.exists(gc.checkpoint_path)
+            assert report["marked_dust"] == report["trashed"] == expected["marked_dust"]
+            assert store.count_by_state() == reference.count_by_state()
+            assert store.list_due_nodes(now) == []
+        finally:
+            maintenance.SOFT_CAP_GOLDEN = saved
+
+
+def test_incremental_gc_safety_net_uses_catalog_counts():
+    print("🧪 Testing the incremental GC safety net")
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=os.path.join(tmp, "trash"))
+        old = now - timedelta(days=400)
+        for i in range(maintenance.MIN_KEEP_NODES + 2):
+            store.save_node(MemoryNode(
+                id=f"d{i:02d}", topic="alpha", title=f"d{i}", content_path="",
+                creation_date=old, last_access_date=old, stability_factor=0.7, state=NodeState.BRONZE,
+            ))
+        report = MaintenanceManager(store).run_incremental_gc(batch_size=5)
+        assert report["safety_net"] and not report["complete"] and report["trashed"] == 0
+        assert store.count_by_state()[NodeState.BRONZE] == maintenance.MIN_KEEP_NODES + 2
+
+
+if __name__ == "__main__":
+    test_incremental_gc_resumes_to_the_same_result()
+    test_incremental_gc_safety_net_uses_catalog_counts()
+    print("✅ Incremental GC tests passed")
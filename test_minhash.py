@@ -0,0 +1,64 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from models import MemoryNode
+from storage import MemoryStore
+from minhash import text_signature, duplicate_clusters
+
+
+BASE = ("We chose queue-first retries to reduce partial failure risk. "
+        "Workers pull jobs, retry with exponential backoff and park poison messages. ") * 3
+
+
+def test_signature_estimates_jaccard():
+    print("🧪 Testing MinHash signatures and LSH clustering")
+    near = BASE.replace("exponential", "jittered exponential")
+    other = "A completely different note about gardening tomatoes in spring. " * 4
+    sigs = np.stack([text_signature(t) for t in (BASE, near, other, BASE.upper(), "", "")])
+    assert (sigs[0] == sigs[3]).all()          # normalization ignores case
+    assert (sigs[0] == sigs[1]).mean() > 0.8
+    assert (sigs[0] == sigs[2]).mean() < 0.2
+
+    clusters = duplicate_clusters(sigs, bands=16, threshold=0.8)
+    assert [members for members, _ in clusters] == [[0, 1, 3]]  # empty texts never cluster
+
+
+def test_store_dedup_incremental():
+    print("🧪 Testing MemoryStore.find_lexical_duplicates")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=os.path.join(tmp, "trash"))
+        texts = {"a": BASE, "b": BASE + " Extra.", "c": "Unrelated gardening notes. " * 5}
+        for node_id, text in texts.items():
+            node = MemoryNode(id=node_id, topic="my topic!", title=node_id, content_path="",
+                              creation_date=datetime.now(), last_access_date=datetime.now())
+            store.save_node(node, content=text)
+            node.update_access()
+            store.save_node(node)  # metadata-only saves keep the content
+
+        clusters = store.find_lexical_duplicates()
+        assert len(clusters) == 1
+        assert [(m["topic_dir"], m["id"]) for m in clusters[0][0]] == [("mytopic", "a"), ("mytopic", "b")]
+        assert len(store.minhash) == 3
+
+        # Unchanged files are served from the sidecar; an edit is picked up
+        entries = [("mytopic", i, os.path.join(store._get_node_dir("mytopic", i), "content.md")) for i in "abc"]
+        _, recomputed = store.minhash.refresh(entries)
+        assert recomputed == 0
+        with open(entries[2][2], 'w') as f:
+            f.write(BASE)
+        assert len(store.find_lexical_duplicates(topic="my topic!")[0][0]) == 3
+
+
+if __name__ == "__main__":
+    test_signature_estimates_jaccard()
+    test_store_dedup_incremental()
+    print("✅ MinHash tests passed")
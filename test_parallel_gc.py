@@ -0,0 +1,59 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+import maintenance
+from storage import MemoryStore
+from maintenance import MaintenanceManager
+from test_incremental_gc import _populate
+
+
+def _states(store):
+    return {(n.topic, n.id): n.state for n in store.list_nodes()}
+
+
+def test_parallel_gc_matches_serial():
+    print("🧪 Testing topic-sharded parallel GC against a serial run")
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = os.path.join(tmp, "trash")
+        saved, maintenance.SOFT_CAP_GOLDEN = maintenance.SOFT_CAP_GOLDEN, 3
+        try:
+            serial = MemoryStore(memory_dir=os.path.join(tmp, "serial"), trash_dir=trash)
+            parallel = MemoryStore(memory_dir=os.path.join(tmp, "parallel"), trash_dir=trash)
+            for store in (serial, parallel):
+                _populate(store, 11, now)
+                rng = np.random.default_rng(0)
+                for node in store.list_nodes():
+                    store.save_embedding(node, rng.normal(size=16))
+            s_gc, p_gc = MaintenanceManager(serial), MaintenanceManager(parallel)
+
+            for full in (True, False):
+                expected = s_gc.run_garbage_collection(dry_run=True, full=full, current_time=now)
+                got = p_gc.run_garbage_collection(dry_run=True, full=full, workers=3, current_time=now)
+                assert got == expected
+
+            expected = s_gc.run_garbage_collection(current_time=now)
+            got = p_gc.run_garbage_collection(workers=3, current_time=now)
+            assert expected["trashed"] > 0 and got == expected
+            assert _states(parallel) == _states(serial)
+            assert len(parallel.embeddings) == len(serial.embeddings) == 150 - expected["trashed"]
+            reopened = MemoryStore(memory_dir=parallel.memory_dir, trash_dir=trash)
+            assert sorted(k for k in reopened.embeddings.matrix()[0] if k) == \
+                sorted(k for k in serial.embeddings.matrix()[0] if k)
+            assert parallel.list_due_nodes(now) == []
+        finally:
+            maintenance.SOFT_CAP_GOLDEN = saved
+
+
+if __name__ == "__main__":
+    test_parallel_gc_matches_serial()
+    print("✅ Parallel GC tests passed")
@@ -0,0 +1,231 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+import heapq
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from models import MemoryNode, NodeState
+from storage import MemoryStore
+from projection import ProjectionEngine, ContextRenderer, estimate_tokens
+from algorithms import calculate_importance_many, cosine_similarity, top_k_indices
+from test_incremental_gc import _populate
+
+
+def test_projection_cache_hits_and_invalidation():
+    print("🧪 Testing the projection cache")
+    with tempfile.TemporaryDirectory() as tmp:
+        memory_dir = os.path.join(tmp, "memory")
+        store = MemoryStore(memory_dir=memory_dir, trash_dir=os.path.join(tmp, "trash"))
+        _populate(store, 3, datetime.now(), count=60)
+        target = store.list_nodes(topic="alpha")[0]
+        engine = ProjectionEngine(store)
+
+        first = engine.project_context("alpha", target.id)
+        assert first == engine.project_context("alpha", target.id, use_cache=False)
+        again = engine.project_context("alpha", target.id)
+        assert again == first and engine.cache_stats()["hits"] == 1
+        again["core"].append("mutated by caller")
+        assert engine.project_context("alpha", target.id) == first  # callers get copies
+
+        engine.project_context("alpha", target.id, max_siblings=2)  # other options: own entry
+        assert engine.cache_stats()["misses"] == 2
+
+        # A local save bumps the generation
+        sibling = store.list_nodes(topic="alpha")[1]
+        sibling.L0_abstract = "freshly edited"
+        store.save_node(sibling)
+        engine.project_context("alpha", target.id)
+        stats = engine.cache_stats()
+        assert stats["invalidations"] == 1 and stats["misses"] == 3
+
+        # A write through another connection (another process) moves SQLite's data_version
+        engine.project_context("alpha", target.id)
+        other = MemoryStore(memory_dir=memory_dir, trash_dir=os.path.join(tmp, "trash"))
+        other.save_node(MemoryNode(id="zz", topic="alpha", title="new", content_path="",
+                                   creation_date=datetime.now(), last_access_date=datetime.now(),
+                                   state=NodeState.GOLDEN))
+        context = engine.project_context("alpha", target.id)
+        assert engine.cache_stats()["invalidations"] == 2
+        assert any("Global: new" in g for g in context["golden"])
+
+
+def test_top_k_indices_match_heapq_nlargest():
+    print("🧪 Testing vectorized top-k selection")
+    rng = random.Random(4)
+    for _ in range(50):
+        scores = [float(rng.randint(0, 6)) for _ in range(rng.randint(0, 40))]
+        k = rng.randint(0, 12)
+        expected = heapq.nlargest(k, range(len(scores)), key=lambda i: scores[i])
+        assert list(top_k_indices(np.array(scores), k)) == expected
+
+
+def _brute_force(nodes, k, now):
+    scored = list(zip(nodes, calculate_importance_many(nodes, now)))
+    scored.sort(key=lambda x: (-x[1], x[0].topic, x[0].id))
+    return [(n.id, round(float(s), 9)) for n, s in scored[:k]]
+
+
+def test_rankings_match_full_scan_and_track_writes():
+    print("🧪 Testing maintained golden/topic rankings")
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=os.path.join(tmp, "trash"))
+        _populate(store, 8, now, count=120, golden=30)
+        # Identical twins force score ties
+        for i in range(4):
+            store.save_node(MemoryNode(id=f"tie{i}", topic="alpha", title="tie", content_path="",
+                                       creation_date=now - timedelta(days=10), last_access_date=now - timedelta(days=1),
+                                       access_count=40, stability_factor=1.0, state=NodeState.GOLDEN))
+        target = store.list_nodes(topic="alpha")[3]
+
+        def check(at):
+            siblings = [(n.id, round(s, 9)) for n, s in store.top_siblings(target, 5, current_date=at)]
+            assert siblings == _brute_force(store.get_siblings(target), 5, at)
+            golden = [n for n in store.list_nodes(state=NodeState.GOLDEN) if n.id != target.id]
+            assert [(n.id, round(s, 9)) for n, s in store.top_golden(10, target.id, current_date=at)] == \
+                _brute_force(golden, 10, at)
+
+        check(now)
+        misses = store.rankings.misses
+        check(now + timedelta(seconds=1))
+        assert store.rankings.misses == misses  # still valid: served from the rankings
+        for days in (1, 7, 40):
+            check(now + timedelta(days=days))
+
+        # Writes outside the golden set keep the golden ranking; golden writes drop it
+        store.top_golden(10, current_date=now)
+        silver = store.list_nodes(topic="beta", state=NodeState.SILVER)[0]
+        store.save_node(silver)
+        misses = store.rankings.misses
+        store.top_golden(10, current_date=now)
+        assert store.rankings.misses == misses
+
+        # Membership follows state changes
+        best = store.top_golden(1, current_date=now)[0][0]
+        best.state = NodeState.SILVER
+        store.save_node(best)
+        assert best.id not in [n.id for n, _ in store.top_golden(10, current_date=now)]
+        check(now)
+        store.move_to_trash(store.top_siblings(target, 1, current_date=now)[0][0])
+        check(now)
+
+
+def test_project_many_shares_rankings_and_fits_budget():
+    print("🧪 Testing batch projection")
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=os.path.join(tmp, "trash"))
+        _populate(store, 3, now, count=90, golden=12)
+        engine = ProjectionEngine(store)
+        nodes = store.list_nodes()
+        targets = [(n.topic, n.id) for n in nodes[:4] + nodes[40:44]] + [("alpha", "missing")]
+
+        calls = []
+        top = store.rankings.top
+        store.rankings.top = lambda scope, k, current_date=None: calls.append(scope) or top(scope, k, current_date)
+        batch = engine.project_many(targets, max_tokens=None)
+        store.rankings.top = top
+        assert calls.count(None) == 1 and len(calls) == 1 + len({n.topic for n in nodes[:4] + nodes[40:44]})
+
+        assert batch["contexts"] == [engine.project_context(t, i, use_cache=False) for t, i in targets]
+        assert batch["contexts"][-1]["core"] == []
+        assert batch["omitted"] == 0
+        for context in batch["contexts"]:
+            for entry in context["siblings"] + context["golden"]:
+                assert batch["rendered"].count(entry) == 1
+
+        # Cached contexts are reused; a tight budget keeps every core, then drops the rest
+        hits = engine.cache_stats()["hits"]
+        small = engine.project_many(targets, max_tokens=600)
+        assert engine.cache_stats()["hits"] == hits + len(targets)
+        assert small["omitted"] > 0 and small["tokens"] <= 600
+        cores = [c["core"][0] for c in small["contexts"] if c["core"]]
+        assert estimate_tokens("\n".join(cores)) < 400
+        assert all(core in small["rendered"] for core in cores)
+
+
+def test_budgeted_streaming_render():
+    print("🧪 Testing token-budgeted, streaming rendering")
+    context = {
+        "core": ["Title: T\nTopic: py\nAbstract: core abstract\nOverview: a long core overview " + "x " * 40],
+        "siblings": [f"Sibling: S{i} (Score: 3.00)\nAbstract: sibling abstract {i}" for i in range(3)],
+        "ancestors": [],
+        "golden": ["Global: G\nAbstract: golden abstract"],
+    }
+    engine = ProjectionEngine(store=None, tokenizer=lambda text: len(text.split()))
+    legacy = "\n".join(["=== CONTEXT MASK ===", "--- TARGET CORE ---"] + context["core"]
+                       + ["\n--- RELATED SIBLINGS ---"] + context["siblings"]
+                       + ["\n--- GLOBAL ANCHORS ---"] + context["golden"])
+    assert engine.render_context(context) == legacy
+    assert "".join(engine.iter_render(context, 34)) == engine.render_context(context, 34)
+
+    renderer = ContextRenderer(34, engine.tokenizer)
+    chunks = list(renderer.iter_chunks(context))
+    rendered = "".join(chunks)
+    assert renderer.tokens == sum(len(c.split()) for c in chunks) <= 34
+    assert "core abstract" in rendered and "Overview" not in rendered  # cut at the L1 boundary
+    assert "sibling abstract 0" in rendered and renderer.truncated >= 1
+    assert rendered.index("Sibling: S0") < rendered.index("GLOBAL ANCHORS")
+
+    tiny = ContextRenderer(20, engine.tokenizer)
+    rendered = "".join(tiny.iter_chunks(context))
+    assert "Title: T\nTopic: py" in rendered and "Abstract: core" not in rendered  # cut at the L0 boundary
+    assert tiny.omitted > 0 and tiny.tokens <= 20
+
+
+def test_semantic_siblings_blend_similarity_and_importance():
+    print("🧪 Testing semantic sibling selection")
+    now = datetime.now()
+    rng = np.random.default_rng(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=os.path.join(tmp, "trash"))
+        _populate(store, 6, now, count=90)
+        nodes = store.list_nodes(topic="beta")
+        vectors = {n.id: rng.standard_normal(16).astype(np.float32) for n in nodes[:-1]}  # last one has none
+        store.embeddings.set_backend(store.embedding_backend)
+        store.embeddings.put_many([(f"beta/{node_id}", vec) for node_id, vec in vectors.items()])
+        target = nodes[0]
+
+        by_similarity = sorted((n for n in nodes[1:-1]),
+                               key=lambda n: -cosine_similarity(vectors[target.id].tolist(), vectors[n.id].tolist()))
+        picked = store.semantic_siblings(target, 5, weight=1.0, current_date=now)
+        assert [n.id for n, _ in picked] == [n.id for n in by_similarity[:5]]
+
+        # weight 0 ranks by importance alone (over the nodes with embeddings)
+        ranked = [(n.id, round(s, 9)) for n, s in store.top_siblings(target, 10, current_date=now)
+                  if n.id != nodes[-1].id][:5]
+        assert [(n.id, round(s, 9)) for n, s in store.semantic_siblings(target, 5, weight=0.0, current_date=now)] == ranked
+
+        # No embedding: plain top siblings; writes refresh the row alignment
+        assert store.semantic_siblings(nodes[-1], 5, current_date=now) == store.top_siblings(nodes[-1], 5, current_date=now)
+        store.move_to_trash(by_similarity[0])
+        assert by_similarity[0].id not in [n.id for n, _ in store.semantic_siblings(target, 5, weight=1.0)]
+
+        engine = ProjectionEngine(store)
+        semantic = engine.project_context(target.topic, target.id, semantic=True)
+        assert semantic == engine.project_many([(target.topic, target.id)], semantic=True)["contexts"][0]
+        assert engine.project_context(target.topic, target.id)["siblings"] != semantic["siblings"]
+
+        # Re-embedding a sibling invalidates cached semantic projections
+        outsider = [n for n in nodes[1:-1] if not any(f" {n.title} " in s for s in semantic["siblings"])][0]
+        store.save_embedding(outsider, vectors[target.id])
+        refreshed = engine.project_context(target.topic, target.id, semantic=True)["siblings"]
+        assert refreshed[0].startswith(f"Sibling: {outsider.title} ")
+
+
+if __name__ == "__main__":
+    test_projection_cache_hits_and_invalidation()
+    test_top_k_indices_match_heapq_nlargest()
+    test_rankings_match_full_scan_and_track_writes()
+    test_project_many_shares_rankings_and_fits_budget()
+    test_budgeted_streaming_render()
+    test_semantic_siblings_blend_similarity_and_importance()
+    print("✅ Projection tests passed")
@@ -0,0 +1,89 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from qmd_bridge import QMDBridge
+from storage import MemoryStore
+from maintenance import MaintenanceManager
+from test_incremental_gc import _populate
+
+
+def test_delete_nodes_runs_one_update():
+    print("🧪 Testing batched QMD deletions")
+    with tempfile.TemporaryDirectory() as tmp:
+        previous_home, os.environ["HOME"] = os.environ.get("HOME"), tmp
+        try:
+            sync_dir = Path(tmp) / ".cache" / "sacred-essence" / "qmd-sync"
+            sync_dir.mkdir(parents=True)
+            for name in ("alpha_n1.md", "alpha_n1_0f3a.md", "my_topic_n2.md", "beta_n3.md",
+                         "beta_n1.md", "topic_n2.md", "alpha_n1_x_n4.md"):
+                (sync_dir / name).write_text("x", encoding="utf-8")
+
+            bridge = QMDBridge("sacred-l2", memory_dir=tmp)
+            calls = []
+            bridge.collection_exists = lambda: True
+            bridge._run_qmd = lambda args, timeout=None: (calls.append(args), (True, ""))[1]
+
+            assert bridge.delete_nodes([("alpha", "n1"), ("my_topic", "n2")]) == 3
+            # Same ids in other topics, and ids that merely contain them, are left alone
+            assert sorted(p.name for p in sync_dir.iterdir()) == \
+                ["alpha_n1_x_n4.md", "beta_n1.md", "beta_n3.md", "topic_n2.md"]
+            assert calls == [["update"], ["embed", "-f"]]
+            assert bridge.delete_nodes([("alpha", "missing")]) == 0 and len(calls) == 2
+
+            # Without a topic, delete_node keeps its old meaning: that id in any topic
+            (sync_dir / "gamma_n3_7c1e.md").write_text("x", encoding="utf-8")
+            assert bridge.delete_node("n3") is True
+            assert sorted(p.name for p in sync_dir.iterdir()) == ["alpha_n1_x_n4.md", "beta_n1.md", "topic_n2.md"]
+            assert bridge.delete_node("n1", "gamma") is False
+        finally:
+            os.environ["HOME"] = previous_home
+
+
+class _RecordingBridge:
+    def __init__(self):
+        self.deleted, self.audits = [], 0
+
+    def delete_nodes(self, node_ids):
+        self.deleted.append(list(node_ids))
+        return len(node_ids)
+
+    def audit_and_cleanup(self, dry_run=True):
+        self.audits += 1
+        return {"orphaned_in_qmd": [], "missing_in_qmd": []}
+
+
+def test_gc_uses_one_bridge_and_one_batch():
+    print("🧪 Testing that GC batches its QMD deletions")
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = os.path.join(tmp, "trash")
+        previous = MaintenanceManager.__dict__["_open_bridge"]
+        bridges = []
+
+        def open_bridge():
+            bridges.append(_RecordingBridge())
+            return bridges[-1]
+        MaintenanceManager._open_bridge = staticmethod(open_bridge)
+        try:
+            store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=trash)
+            _populate(store, 5, now)
+            report = MaintenanceManager(store).run_garbage_collection()
+            assert report["trashed"] > 0 and report["qmd_audit"] == {"orphaned": 0, "missing": 0}
+            assert len(bridges) == 1 and bridges[0].audits == 1
+            assert len(bridges[0].deleted) == 1 and len(bridges[0].deleted[0]) == report["trashed"]
+            assert all(store.load_node(topic, node_id) is None for topic, node_id in bridges[0].deleted[0])
+        finally:
+            MaintenanceManager._open_bridge = previous
+
+
+if __name__ == "__main__":
+    test_delete_nodes_runs_one_update()
+    test_gc_uses_one_bridge_and_one_batch()
+    print("✅ QMD batch deletion tests passed")
@@ -0,0 +1,87 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from storage import MemoryStore
+from embedding_store import EmbeddingStore
+from scheduler import MaintenanceScheduler, read_status
+from test_incremental_gc import _populate
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+def test_scheduler_paces_gc_and_backs_off():
+    print("🧪 Testing the maintenance scheduler")
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = os.path.join(tmp, "trash")
+        store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=trash)
+        _populate(store, 5, datetime.now())
+        os.makedirs(os.path.join(trash, "alpha_old_20200101_000000"))  # past retention
+        keys = [f"{n.topic}/{n.id}" for n in store.list_nodes()]
+        store.embeddings.put_many([(key, np.ones(4)) for key in keys])
+        # Another process (e.g. encode) adds vectors after the daemon opened the store
+        EmbeddingStore(os.path.join(store.memory_dir, "embeddings")).put_many(
+            [(f"alpha/late{i}", np.full(4, 2.0)) for i in range(3)])
+        daemon_view = store.embeddings
+        clock = _FakeClock()
+        intervals = {"gc": 3600, "trash": 86400, "audit": 0, "sync": 0}
+
+        def make():
+            return MaintenanceScheduler(store, intervals=intervals, max_files_per_second=50,
+                                        idle_seconds=60, gc_batch_size=16, clock=clock, sleep=clock.sleep)
+
+        scheduler = make()
+        assert scheduler.due_tasks() == ["gc", "trash"]
+        assert scheduler.run_pending() == ["gc", "trash"]
+        gc_result = scheduler.status["tasks"]["gc"]["result"]
+        assert gc_result["complete"] and gc_result["trashed"] > 0
+        # Every processed node was paced against the 50 files/s budget
+        assert clock.slept >= gc_result["scanned"] / 50 - 1e-6
+        # Trash cleanup works on the store's own trash directory
+        assert gc_result["cleaned_trash"] == 1
+        assert not os.path.exists(os.path.join(trash, "alpha_old_20200101_000000"))
+        # Tasks start from freshly loaded indexes, so the other process's vectors survive compaction
+        assert store.embeddings is not daemon_view and "alpha/late2" in store.embeddings
+        store.embeddings.compact()
+        reopened = EmbeddingStore(os.path.join(store.memory_dir, "embeddings"))
+        assert reopened.tombstones == 0 and len(reopened) == len(keys) - gc_result["trashed"] + 3
+        assert reopened.get("alpha/late2")[0] == 2.0
+
+        status = read_status(store.memory_dir)
+        assert status["state"] == "idle" and status["tasks"]["gc"]["runs"] == 1
+        assert "audit" not in status["next_due"]
+
+        # A restarted scheduler remembers the last runs
+        assert make().due_tasks() == []
+        clock.now += 3601
+        scheduler = make()
+        assert scheduler.due_tasks() == ["gc"]
+
+        store.mark_activity()
+        assert scheduler.run_pending() == []
+        status = read_status(store.memory_dir)
+        assert status["state"] == "backing off" and status["tasks"]["gc"]["runs"] == 1
+
+
+if __name__ == "__main__":
+    test_scheduler_paces_gc_and_backs_off()
+    print("✅ Scheduler tests passed")
@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from algorithms import (
+    cosine_similarity, cosine_scores, cosine_top_k, cosine_top_k_many,
+    cosine_similarity_matrix, normalize_rows,
+)
+
+
+def test_top_k_matches_pairwise():
+    print("🧪 Testing vectorized top-k cosine against the pairwise function")
+    rng = np.random.default_rng(3)
+    mat = rng.normal(size=(500, 16)).astype(np.float32)
+    mat[10] = 0.0
+    query = rng.normal(size=16)
+
+    pairwise = np.array([cosine_similarity(query.tolist(), row.tolist()) for row in mat])
+    idx, scores = cosine_top_k(query, mat, k=5)
+    assert list(idx) == list(np.argsort(-pairwise)[:5])
+    assert np.allclose(scores, pairwise[idx], atol=1e-5)
+
+    # Pre-normalized input and masks
+    unit, _ = normalize_rows(mat)
+    q_unit, _ = normalize_rows(query)
+    idx_n, _ = cosine_top_k(q_unit, unit, k=5, normalized=True)
+    assert list(idx_n) == list(idx)
+    mask = np.arange(500) % 2 == 0
+    idx_m, _ = cosine_top_k(query, mat, k=500, mask=mask)
+    assert len(idx_m) == 250 and all(i % 2 == 0 for i in idx_m)
+    rows, sims = cosine_scores(query, mat, mask=mask)  # unsorted, row order
+    assert list(rows) == list(np.flatnonzero(mask)) and np.allclose(sims, pairwise[mask], atol=1e-5)
+
+    # Wrapper edge cases keep their old results
+    assert cosine_similarity([], [1.0]) == 0.0
+    assert cosine_similarity([1.0, 0.0], [1.0]) == 0.0
+    assert cosine_similarity([0.0, 0.0], [1.0, 0.0]) == 0.0
+    assert abs(cosine_similarity([1.0, 1.0], [1.0, 0.0]) - 0.70710678) < 1e-6
+
+
+def test_matrix_vs_matrix():
+    print("🧪 Testing matrix-vs-matrix top-k")
+    rng = np.random.default_rng(4)
+    queries = rng.normal(size=(7, 8))
+    mat = rng.normal(size=(40, 8))
+    sims = cosine_similarity_matrix(queries, mat)
+    idx, scores = cosine_top_k_many(queries, mat, k=3, chunk_size=3)
+    for q in range(7):
+        assert list(idx[q]) == list(np.argsort(-sims[q])[:3])
+        assert np.allclose(scores[q], sims[q, idx[q]], atol=1e-5)
+
+    mask = np.zeros((7, 40), dtype=bool)
+    mask[:, :2] = True
+    idx, scores = cosine_top_k_many(queries, mat, k=3, mask=mask)
+    assert set(idx[0, :2]) == {0, 1} and idx[0, 2] == -1 and np.isneginf(scores[0, 2])
+
+
+if __name__ == "__main__":
+    test_top_k_matches_pairwise()
+    test_matrix_vs_matrix()
+    print("✅ Similarity tests passed")
@@ -0,0 +1,81 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+REPO_DIR = Path(__file__).resolve().parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+import numpy as np
+
+import maintenance
+from models import NodeState
+from storage import MemoryStore
+from maintenance import MaintenanceManager
+from simulator import simulate_store
+from config import STABILITY_ROLE
+from test_incremental_gc import _populate
+
+
+def _listing(root):
+    return sorted((path, os.path.getsize(os.path.join(path, name)), name)
+                  for path, _, names in os.walk(root) for name in names)
+
+
+def test_simulation_matches_real_gc_and_writes_nothing():
+    print("🧪 Testing the decay simulator against real GC runs")
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = os.path.join(tmp, "trash")
+        saved, maintenance.SOFT_CAP_GOLDEN = maintenance.SOFT_CAP_GOLDEN, 3
+        try:
+            store = MemoryStore(memory_dir=os.path.join(tmp, "memory"), trash_dir=trash)
+            _populate(store, 21, now)
+            rng = np.random.default_rng(1)
+            for node in store.list_nodes():
+                store.save_embedding(node, rng.normal(size=8))
+            before = store.count_by_state()
+
+            history = simulate_store(store, days=60, start=now, soft_cap_golden=3)
+            assert len(history) == 61 and store.count_by_state() == before
+            assert history[0]["live_bytes"] > 0 and history[0]["trash_bytes"] > 0
+
+            # A baseline-format store (per-node embedding.npy) is sized without being migrated
+            legacy = MemoryStore(memory_dir=os.path.join(tmp, "legacy"), trash_dir=os.path.join(tmp, "legacy_trash"))
+            _populate(legacy, 5, now)
+            for node in legacy.list_nodes():
+                np.save(os.path.join(legacy._get_node_dir(node.topic, node.id), "embedding.npy"), rng.normal(size=8))
+            for target in (legacy, MemoryStore(memory_dir=store.memory_dir, trash_dir=trash)):
+                target.catalog
+                listing = _listing(target.memory_dir)
+                simulate_store(target, days=5, start=now)
+                assert _listing(target.memory_dir) == listing
+            cols = store.catalog.score_columns()
+            packed = store.disk_footprint(cols["topic_dir"], cols["id"])
+            unopened = target.disk_footprint(cols["topic_dir"], cols["id"])
+            assert all(np.array_equal(a, b) for a, b in zip(packed, unopened)) and packed[1].all()
+
+            # A tighter ROLE stability can only decay faster
+            tighter = simulate_store(store, days=60, start=now, soft_cap_golden=3,
+                                     stability={STABILITY_ROLE: 0.9}, disk=False)
+            assert tighter[-1]["silver"] <= history[-1]["silver"]
+
+            gc = MaintenanceManager(store)
+            for day in (0, 30, 60):
+                gc.run_garbage_collection(full=True, current_time=now + timedelta(days=day))
+                counts = store.count_by_state()
+                expected = history[day]
+                assert counts[NodeState.GOLDEN] == expected["golden"]
+                assert counts[NodeState.SILVER] == expected["silver"]
+                assert counts[NodeState.BRONZE] == expected["bronze"]
+                assert counts[NodeState.DUST] == 0
+            assert sum(e["trashed"] for e in history) == 150 - sum(counts.values())
+        finally:
+            maintenance.SOFT_CAP_GOLDEN = saved
+
+
+if __name__ == "__main__":
+    test_simulation_matches_real_gc_and_writes_nothing()
+    print("✅ Simulator tests passed")